@@ -0,0 +1,108 @@
+"""
+Paginated, sortable and searchable team and logo lists for the admin dashboard.
+
+The dashboard only shows the rows in view, so it asks for a window of the
+list by offset and limit and gets the total alongside to size its
+scrollbar. Sorting and searching happen in SQL; only the requested window
+is turned into dicts.
+"""
+
+import json
+from sqlalchemy import select, func
+from models import db, Team, Logo
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sort key -> (column, default direction); id breaks ties so windows never overlap or skip rows
+TEAM_SORTS = {
+    'score': ('score', 'desc'),
+    'name': ('name', 'asc'),
+    'newest': ('id', 'desc'),
+}
+
+LOGO_SORTS = {
+    'name': ('name', 'asc'),
+    'answer': ('correct_answer', 'asc'),
+    'newest': ('id', 'desc'),
+}
+
+def page_args(args, sorts, default_sort):
+    """(search, sort, order, offset, limit) from request args, clamped to what the lists accept"""
+    sort = args.get('sort', default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    order = args.get('order', sorts[sort][1])
+    if order not in ('asc', 'desc'):
+        order = sorts[sort][1]
+    offset = max(0, args.get('offset', 0, type=int))
+    limit = max(1, min(args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    search = (args.get('q') or '').strip()
+    return search, sort, order, offset, limit
+
+def _ordering(columns, sorts, sort, order):
+    column = columns[sorts[sort][0]]
+    direction = column.desc() if order == 'desc' else column.asc()
+    tiebreak = columns['id'].desc() if order == 'desc' else columns['id'].asc()
+    return (direction, tiebreak)
+
+def _page(query, columns, sorts, sort, order, offset, limit):
+    total = db.session.scalar(select(func.count()).select_from(query.subquery()))
+    rows = db.session.execute(
+        query.order_by(*_ordering(columns, sorts, sort, order)).offset(offset).limit(limit)
+    ).all()
+    return rows, total
+
+def _json_list(value):
+    try:
+        return json.loads(value or '[]')
+    except ValueError:
+        return []
+
+def team_page(search='', sort='score', order='desc', offset=0, limit=DEFAULT_PAGE_SIZE):
+    """A window of teams with their leaderboard rank; returns (teams, total matching)"""
+    # Rank over every team, so a filtered or re-sorted list still shows leaderboard positions
+    ranked = select(
+        Team.id, Team.name, Team.members, Team.score,
+        func.rank().over(order_by=Team.score.desc()).label('rank')
+    ).subquery()
+    query = select(ranked)
+    if search:
+        query = query.where(
+            ranked.c.name.contains(search, autoescape=True) | ranked.c.members.contains(search, autoescape=True)
+        )
+    rows, total = _page(query, ranked.c, TEAM_SORTS, sort, order, offset, limit)
+    teams = [
+        {
+            'id': row.id,
+            'name': row.name,
+            'members': _json_list(row.members),
+            'score': row.score,
+            'rank': row.rank
+        }
+        for row in rows
+    ]
+    return teams, total
+
+def logo_page(search='', sort='name', order='asc', offset=0, limit=DEFAULT_PAGE_SIZE):
+    """A window of the logo catalog; returns (logos, total matching)"""
+    query = select(Logo.id, Logo.name, Logo.image_url, Logo.correct_answer, Logo.alternative_answers)
+    if search:
+        query = query.where(
+            Logo.name.contains(search, autoescape=True)
+            | Logo.correct_answer.contains(search, autoescape=True)
+            | Logo.alternative_answers.contains(search, autoescape=True)
+        )
+    columns = {'id': Logo.id, 'name': Logo.name, 'correct_answer': Logo.correct_answer}
+    rows, total = _page(query, columns, LOGO_SORTS, sort, order, offset, limit)
+    logos = [
+        {
+            'id': row.id,
+            'name': row.name,
+            'image_url': row.image_url,
+            'correct_answer': row.correct_answer,
+            'alternative_answers': _json_list(row.alternative_answers)
+        }
+        for row in rows
+    ]
+    return logos, total
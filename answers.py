@@ -0,0 +1,65 @@
+import threading
+from sqlalchemy import event as sa_event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import db, Answer
+
+class AnswerDictionary:
+    """Integer ids for the distinct normalized answers of each game.
+
+    Guesses reference an Answer row instead of repeating the text. Known ids
+    are kept in memory; an id created inside a transaction is only cached
+    once that transaction commits, so a rolled back guess cannot leave a
+    dangling id in the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        # Per instance, so two dictionaries never share or drop each other's pending ids
+        self._info_key = ('new_answers', id(self))
+        sa_event.listen(Session, 'after_commit', self._after_commit)
+        sa_event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def detach(self):
+        """Stop listening to session commits; ids added in open transactions are not cached"""
+        if sa_event.contains(Session, 'after_commit', self._after_commit):
+            sa_event.remove(Session, 'after_commit', self._after_commit)
+            sa_event.remove(Session, 'after_soft_rollback', self._after_rollback)
+
+    def lookup(self, game_id, text):
+        """Id of text in game_id's dictionary, adding it in the current transaction if it is new"""
+        key = (game_id, text)
+        answer_id = self._ids.get(key)
+        if answer_id is not None:
+            return answer_id
+        pending = db.session.info.setdefault(self._info_key, {})
+        if key in pending:
+            return pending[key]
+
+        query = select(Answer.id).where(Answer.game_id == game_id, Answer.text == text)
+        answer_id = db.session.scalar(query)
+        if answer_id is not None:
+            with self._lock:
+                self._ids[key] = answer_id
+            return answer_id
+
+        # A concurrent request may add the same answer first; either way one row exists afterwards
+        db.session.execute(sqlite_insert(Answer).values(game_id=game_id, text=text).on_conflict_do_nothing())
+        answer_id = pending[key] = db.session.scalar(query)
+        return answer_id
+
+    def _after_commit(self, session):
+        pending = session.info.pop(self._info_key, None)
+        if pending:
+            with self._lock:
+                self._ids.update(pending)
+
+    def _after_rollback(self, session, previous_transaction):
+        session.info.pop(self._info_key, None)
+
+    def discard_game(self, game_id):
+        """Drop the cached ids of a game"""
+        with self._lock:
+            for key in [key for key in self._ids if key[0] == game_id]:
+                del self._ids[key]
@@ -1,54 +1,229 @@
 import os
+import gzip
 import json
+import time
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from datetime import datetime, timedelta, timezone
+from flask import (Flask, Blueprint, current_app, render_template, request, jsonify, redirect, url_for, flash, session,
+                   stream_with_context)
 from flask_cors import CORS
+from sqlalchemy import select, insert, update, func, exists, false
+from sqlalchemy.exc import IntegrityError
 from werkzeug.middleware.proxy_fix import ProxyFix
-from models import db, Team, Logo, Game, Guess, GameTeam
+from models import db, Team, Logo, Game, Guess, GameTeam, ArchivedGame, ArchivedQuestion, QuestionResult
 from game_manager import GameManager
+from guess_archive import archive_game, archive_finished_games, decode_payload
+from event_log import GameEventLog
+import metrics
+import serialization
+from serialization import respond
+from sql_profiler import sql_profiler
+from sampling_profiler import sampling_profiler
+from auth import (admin_required, check_admin_password, issue_team_token, read_team_token,
+                  request_team_token, team_tokens_required, team_cache)
+from log_config import configure_logging
+import db_setup
+import assets
+import team_import
+import guess_history
+import admin_lists
+from idempotency import guess_results, request_idempotency_key
+import rate_limit
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger('autoquizer.app')
+game_log = logging.getLogger('autoquizer.game')
+guess_log = logging.getLogger('autoquizer.guess')
+team_log = logging.getLogger('autoquizer.team')
+admin_log = logging.getLogger('autoquizer.admin')
 
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Page and API routes, registered on the app by create_app
+bp = Blueprint('game', __name__)
 
-# Enable CORS for all routes
-CORS(app)
+# Game manager shared by all requests in this process; create_app attaches the event log
+game_manager = GameManager()
 
-# Configure database - temporarily use SQLite to avoid endpoint issues
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///game.db"
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app(config=None):
+    """Build the Flask app and its connection pool.
 
-# Initialize database
-db.init_app(app)
+    Schema setup and seeding are not done here; run `flask init-db` once per
+    deploy (see db_setup.py) so worker startup stays cheap.
+    """
+    # Configure logging - records are formatted and written by a background thread
+    configure_logging()
 
-# Initialize game manager
-game_manager = GameManager()
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    # Configure database - temporarily use SQLite to avoid endpoint issues
+    # GAME_DATABASE_URL lets benchmarks and tests point the app at a scratch database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("GAME_DATABASE_URL", "sqlite:///game.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Hold status requests open only where a waiting client does not pin a worker
+    # and one process owns the state version (threaded workers, or asgi.py)
+    app.config["LONG_POLL"] = os.environ.get('LONG_POLL', '0') == '1'
+    if config:
+        app.config.update(config)
+
+    # Initialize database
+    db.init_app(app)
+    with app.app_context():
+        metrics.instrument_engine(db.engine)
+        sql_profiler.instrument_engine(db.engine)
+
+    # Fast JSON encoding and compressed, cached status payloads; registered
+    # first so compression runs after every other after_request hook
+    serialization.init_app(app)
+
+    # Per-route latency, in-flight and SQL metrics served at /metrics
+    metrics.init_app(app)
+
+    # Opt-in per-request SQL profiling and N+1 detection (SQL_PROFILE=1)
+    sql_profiler.init_app(app)
+
+    # Admin-only sampling profiler for live games, idle unless started
+    sampling_profiler.init_app(app)
+    if os.environ.get('SAMPLING_PROFILER', '0') == '1':
+        sampling_profiler.start()
+
+    # Per-team/IP rate limits on hot endpoints, a concurrency cap and admin load shedding
+    rate_limit.init_app(app)
+
+    # Append-only game event log
+    if os.environ.get('EVENT_LOG_ENABLED', '1') == '1':
+        game_manager.attach_event_log(GameEventLog.from_env(os.path.join(app.instance_path, 'events')))
+
+    # Rebuild in-memory state of a running game on the first request rather than at boot
+    app.before_request(game_manager.ensure_restored)
+
+    # Fingerprinted, precompressed static files built by `flask build-assets`
+    assets.init_app(app)
+
+    app.register_blueprint(bp)
+    db_setup.register_commands(app)
+    team_import.register_commands(app, game_manager)
+    return app
+
+# Longest a long-poll status request is held open, in seconds
+LONG_POLL_MAX_WAIT = 25
+
+# How long each question stays open, in seconds
+QUESTION_SECONDS = 30
+
+def question_timing(round_start_time):
+    """Absolute timing of the open question as Unix timestamps.
+
+    Clients count down to question_deadline on their own clock, corrected by
+    the /api/time offset, instead of re-syncing from time_remaining.
+    next_change_at is when the status next changes without anyone acting;
+    None means only an admin or team action will change it.
+    """
+    if not round_start_time:
+        return {'question_deadline': None, 'next_change_at': None}
+    deadline = round_start_time.replace(tzinfo=timezone.utc).timestamp() + QUESTION_SECONDS
+    return {'question_deadline': deadline, 'next_change_at': deadline}
+
+def wait_for_change(since, wait):
+    """Hold a long-poll request until the state version moves past since or wait elapses.
 
-# Predefined list of dummy answers for teams that don't guess
-DUMMY_ANSWERS = [
-    "apple", "banana", "orange", "purple", "green", "blue", "red", "yellow",
-    "cat", "dog", "bird", "fish", "tree", "flower", "house", "car",
-    "book", "pen", "table", "chair", "window", "door", "water", "fire",
-    "moon", "star", "sun", "cloud", "rain", "snow", "wind", "earth",
-    "music", "dance", "sing", "play", "run", "walk", "jump", "swim",
-    "happy", "sad", "good", "bad", "big", "small", "fast", "slow"
-]
+    Never sleeps past the current question's deadline, so the request that
+    wakes then closes the expired question like a regular poll would.
+    Returns False if no concurrency slot was free for the work after waking.
+    """
+    broadcaster = game_manager.broadcaster
+    if broadcaster.version != since:
+        return True
+    game = broadcaster.frame('team_status', team_status_frame)['game']
+    if game and game['round_start_time']:
+        remaining = QUESTION_SECONDS - (datetime.utcnow() - game['round_start_time']).total_seconds()
+        wait = min(wait, max(0, remaining) + 0.1)
+    # Give the pooled connection and the concurrency slot back while the request sleeps
+    db.session.close()
+    rate_limit.admission.release_slot()
+    broadcaster.wait(since, wait)
+    return rate_limit.admission.reacquire_slot()
+
+def current_team(team_name=None):
+    """Identify the calling team as (team, enrolled_game_id).
+
+    Token-carrying clients are resolved through the id-keyed team cache
+    without touching the database; clients that only send a team name are
+    looked up by name unless TEAM_TOKENS_REQUIRED is set.
+    """
+    claims = read_team_token(request_team_token())
+    if claims:
+        team = team_cache.get(claims[0])
+        if team is not None:
+            return team, claims[1]
+    if team_name and not team_tokens_required():
+        return Team.query.filter_by(name=team_name).first(), None
+    return None, None
+
+def team_score_and_guess(team_id, game=None):
+    """(score, has_guessed) for a team in one query; score is None if the team is gone.
+
+    has_guessed is for the game's current question, or False without a game.
+    """
+    guessed = false()
+    if game is not None:
+        guessed = exists().where(
+            Guess.team_id == team_id,
+            Guess.game_id == game.id,
+            Guess.round_number == game.current_round,
+            Guess.logo_id == game.current_logo_id
+        )
+    return tuple(db.session.execute(select(
+        select(Team.score).where(Team.id == team_id).scalar_subquery(),
+        guessed
+    )).one())
+
+def enroll_team(game, team):
+    """Auto-enroll a team in the active game; returns the GameTeam or None on failure"""
+    try:
+        game_team = GameTeam(
+            game_id=game.id,
+            team_id=team.id
+        )
+        db.session.add(game_team)
+        game_manager.record_event(game, 'teams_enrolled', team_ids=[team.id])
+        db.session.commit()
+        team_log.info("Auto-enrolled team '%s' in current active game", team.name)
+        return game_team
+    except Exception as e:
+        team_log.error("Error auto-enrolling team: %s", e)
+        db.session.rollback()
+        return None
+
+def close_if_expired(game):
+    """Close the current question once its 30 second timer has run out"""
+    if not game.round_start_time:
+        return False
+    elapsed = (datetime.utcnow() - game.round_start_time).total_seconds()
+    if elapsed < 30:
+        return False
+    # Timer expired - auto advance question
+    try:
+        if game_manager.close_question(game):
+            game_log.info("Auto-advanced to next question due to timer expiry")
+            return True
+    except Exception as e:
+        game_log.error("Error in auto-advance: %s", e)
+    return False
 
 def check_and_auto_advance(game):
     """Check if all participating teams have guessed and auto-advance if so"""
     try:
-        # Get participating teams for this game
-        participating_teams = GameTeam.query.filter_by(game_id=game.id).all()
-        if not participating_teams:
+        # Count participating teams for this game
+        participating_count = GameTeam.query.filter_by(game_id=game.id).count()
+        if not participating_count:
             return False
         
         # Count how many participating teams have guessed for the current logo
@@ -58,192 +233,81 @@ def check_and_auto_advance(game):
             Guess.logo_id == game.current_logo_id
         ).count()
         
-        logging.info(f"Teams guessed: {teams_guessed}/{len(participating_teams)} for question {game.current_question}")
+        game_log.debug("Teams guessed: %s/%s for question %s", teams_guessed, participating_count, game.current_question)
         
-        if teams_guessed >= len(participating_teams):
-            # All participating teams have guessed, advance immediately
-            logos = Logo.query.all()
-            game_manager.advance_question(game, logos)
-            db.session.commit()
-            logging.info(f"Auto-advanced to next question - all participating teams guessed")
-            return True
+        if teams_guessed >= participating_count:
+            # All participating teams have guessed, close the question immediately
+            if game_manager.close_question(game):
+                game_log.info("Auto-advanced to next question - all participating teams guessed")
+                return True
         
         return False
         
     except Exception as e:
-        logging.error(f"Error in check_and_auto_advance: {e}")
+        logger.error("Error in check_and_auto_advance: %s", e)
         return False
 
-def submit_dummy_answers_for_missing_teams(game):
-    """Submit dummy answers for participating teams that haven't guessed yet"""
-    try:
-        import random
-        
-        # Get participating teams for this game
-        participating_teams = GameTeam.query.filter_by(game_id=game.id).all()
-        if not participating_teams:
-            return
-        
-        # Find teams that haven't guessed for the current logo
-        teams_that_guessed = set()
-        
-        existing_guesses = Guess.query.filter(
-            Guess.game_id == game.id,
-            Guess.round_number == game.current_round,
-            Guess.logo_id == game.current_logo_id
-        ).all()
-        
-        for guess in existing_guesses:
-            teams_that_guessed.add(guess.team_id)
-        
-        # Submit dummy answers for participating teams that haven't guessed
-        for game_team in participating_teams:
-            if game_team.team_id not in teams_that_guessed:
-                team = Team.query.get(game_team.team_id)
-                dummy_answer = random.choice(DUMMY_ANSWERS)
-                
-                dummy_guess = Guess(
-                    team_id=game_team.team_id,
-                    game_id=game.id,
-                    round_number=game.current_round,
-                    logo_id=game.current_logo_id,
-                    question_number=game.current_question,
-                    guess_text=dummy_answer,
-                    guess=f"{dummy_answer}_{game.current_logo_id}",  # Legacy field for compatibility
-                    is_correct=False,  # Dummy answers are always incorrect
-                    timestamp=datetime.utcnow()
-                )
-                db.session.add(dummy_guess)
-                logging.info(f"Added dummy answer '{dummy_answer}' for team '{team.name}'")
-        
-        db.session.commit()
-        
-    except Exception as e:
-        logging.error(f"Error submitting dummy answers: {e}")
-
-# Create tables and load sample data
-with app.app_context():
-    db.create_all()
-    
-    # Handle database schema migration for new game features
-    try:
-        # Check if we need to add new columns
-        from sqlalchemy import text
-        result = db.session.execute(text("PRAGMA table_info(game)"))
-        columns = [row[1] for row in result.fetchall()]
-        
-        if 'current_question' not in columns:
-            # Add new columns for question tracking
-            db.session.execute(text("ALTER TABLE game ADD COLUMN current_question INTEGER DEFAULT 1"))
-            db.session.execute(text("ALTER TABLE game ADD COLUMN questions_per_round INTEGER DEFAULT 10"))
-            db.session.execute(text("ALTER TABLE game ADD COLUMN used_logo_ids TEXT"))
-            db.session.commit()
-            logging.info("Database schema updated with new game features")
-    except Exception as e:
-        logging.warning(f"Game schema migration skipped: {e}")
-    
-    # Handle database schema migration for new guess tracking features
-    try:
-        # Check if we need to add new columns to guess table
-        result = db.session.execute(text("PRAGMA table_info(guess)"))
-        columns = [row[1] for row in result.fetchall()]
-        
-        if 'logo_id' not in columns:
-            # Add new columns for proper guess tracking
-            db.session.execute(text("ALTER TABLE guess ADD COLUMN logo_id INTEGER"))
-            db.session.execute(text("ALTER TABLE guess ADD COLUMN question_number INTEGER"))
-            db.session.execute(text("ALTER TABLE guess ADD COLUMN guess_text TEXT"))
-            db.session.commit()
-            logging.info("Database schema updated with new guess tracking features")
-    except Exception as e:
-        logging.warning(f"Guess schema migration skipped: {e}")
-    
-    # Load sample logos if none exist
-    try:
-        logo_count = Logo.query.count()
-        if logo_count == 0:
-            try:
-                with open('data/sample_logos.json', 'r') as f:
-                    sample_logos = json.load(f)
-                    for logo_data in sample_logos:
-                        logo = Logo(
-                            name=logo_data['name'],
-                            image_url=logo_data['image_url'],
-                            correct_answer=logo_data['correct_answer'],
-                            alternative_answers=json.dumps(logo_data.get('alternative_answers', []))
-                        )
-                        db.session.add(logo)
-                    db.session.commit()
-                    logging.info(f"Loaded {len(sample_logos)} sample logos")
-            except FileNotFoundError:
-                logging.warning("Sample logos file not found, starting with empty logo database")
-    except Exception as e:
-        logging.warning(f"Could not check logo count: {e}")
-        db.session.rollback()
-
-@app.route('/')
+@bp.route('/')
 def index():
     """Landing page with team registration"""
     return render_template('index.html')
 
-@app.route('/team/<team_name>')
+@bp.route('/team/<team_name>')
 def team_dashboard(team_name):
     """Team dashboard for playing the game"""
     team = Team.query.filter_by(name=team_name).first()
     if not team:
         flash('Team not found. Please register first.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('game.index'))
     return render_template('team.html', team=team)
 
-@app.route('/admin')
+@bp.route('/spectator')
+def spectator():
+    """Read-only game view for the big screen and spectators' phones"""
+    return render_template('spectator.html')
+
+@bp.route('/admin')
 def admin():
     """Admin login page"""
     return render_template('admin_login.html')
 
-@app.route('/admin/dashboard')
+@bp.route('/admin/dashboard')
 def admin_dashboard():
     """Protected admin dashboard"""
     return render_template('admin.html')
 
-@app.route('/api/admin/login', methods=['POST'])
+@bp.route('/api/admin/login', methods=['POST'])
 def admin_login():
     """Admin login with password"""
     try:
         data = request.get_json()
         password = data.get('password', '')
         
-        # Simple password check (you can change this)
-        admin_password = os.environ.get('ADMIN_PASSWORD', 'admin123')
-        
-        if password == admin_password:
+        # Simple password check (set ADMIN_PASSWORD to change it)
+        if check_admin_password(password):
+            session['is_admin'] = True
             return jsonify({'success': True, 'redirect_url': '/admin/dashboard'})
         else:
             return jsonify({'error': 'Invalid password'}), 401
             
     except Exception as e:
-        logging.error(f"Admin login error: {e}")
+        admin_log.error("Admin login error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 # API Endpoints
 
-@app.route('/api/register_team', methods=['POST'])
+@bp.route('/api/register_team', methods=['POST'])
 def register_team():
     """Register a new team"""
     try:
         data = request.get_json()
         team_name = data.get('team_name', '').strip()
-        members = data.get('members', [])
+        members = team_import.clean_members(data.get('members', []))
         
-        if not team_name:
-            return jsonify({'error': 'Team name is required'}), 400
-        
-        # Validate team name - only allow alphanumeric characters, spaces, and hyphens
-        import re
-        if not re.match(r'^[a-zA-Z0-9\s\-]+$', team_name):
-            return jsonify({'error': 'Team name can only contain letters, numbers, spaces, and hyphens'}), 400
-        
-        if not members or len(members) == 0:
-            return jsonify({'error': 'At least one team member is required'}), 400
+        # Same rules as bulk registration: letters, numbers, spaces and hyphens, and one to ten named members
+        error = team_import.validate_team(team_name, members)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Check if team already exists
         existing_team = Team.query.filter_by(name=team_name).first()
@@ -257,157 +321,261 @@ def register_team():
             score=0
         )
         db.session.add(team)
+        game_manager.mark_changed()
         db.session.commit()
         
-        logging.info(f"Team '{team_name}' registered with {len(members)} members")
+        team_log.info("Team '%s' registered with %s members", team_name, len(members), extra={'team_id': team.id})
         return jsonify({
             'success': True,
             'team_id': team.id,
             'team_name': team.name,
-            'redirect_url': url_for('team_dashboard', team_name=team.name)
+            'team_token': issue_team_token(team.id),
+            'redirect_url': url_for('game.team_dashboard', team_name=team.name)
         })
         
     except Exception as e:
-        logging.error(f"Error registering team: {e}")
+        team_log.error("Error registering team: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/submit_guess', methods=['POST'])
+@bp.route('/api/admin/teams/bulk', methods=['POST'])
+@admin_required
+def bulk_register_teams():
+    """Register many teams from JSON, CSV or NDJSON, with a result per row"""
+    try:
+        enroll = request.args.get('enroll', '0') == '1'
+        if request.mimetype == 'text/csv':
+            rows = team_import.parse_csv(request.get_data(as_text=True))
+        elif request.mimetype == 'application/x-ndjson':
+            rows = team_import.parse_ndjson(request.get_data(as_text=True))
+        else:
+            data = request.get_json(silent=True) or {}
+            rows = data.get('teams')
+            enroll = enroll or bool(data.get('enroll'))
+            if not isinstance(rows, list):
+                return jsonify({'error': 'Send {"teams": [...]} as JSON, or a CSV or NDJSON body'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(rows) > team_import.MAX_IMPORT_ROWS:
+        return jsonify({'error': f'At most {team_import.MAX_IMPORT_ROWS} teams per request'}), 413
+    
+    try:
+        summary = team_import.register_teams(rows, game_manager, enroll=enroll)
+        return respond({'success': True, **summary})
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A team name was registered while importing; nothing was imported, please retry'}), 409
+    except Exception as e:
+        team_log.error("Error in bulk registration: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/submit_guess', methods=['POST'])
 def submit_guess():
-    """Submit a guess for the current round"""
+    """Submit a guess for the current round.
+
+    With an idempotency key, a retried submission gets the first one's
+    outcome back from memory instead of being run again.
+    """
+    idempotency_key = None
     try:
         data = request.get_json()
         team_name = data.get('team_name')
         guess = data.get('guess', '').strip().lower()
         
-        if not team_name or not guess:
+        if not guess:
             return jsonify({'error': 'Team name and guess are required'}), 400
         
-        team = Team.query.filter_by(name=team_name).first()
-        if not team:
-            return jsonify({'error': 'Team not found'}), 404
+        # The question the client is answering, when it says; a guess for a closed question is refused
+        question = (data.get('current_round'), data.get('current_question'))
+        if not all(isinstance(part, int) for part in question):
+            question = None
+        
+        key = request_idempotency_key()
+        if key is not None:
+            # Keys are scoped to the team as the client identifies itself and to the question,
+            # so the same key and text on a later question is a new guess; no database access
+            claims = read_team_token(request_team_token())
+            idempotency_key = (claims[0] if claims else team_name, question, key)
+            state, response = guess_results.claim(idempotency_key, guess)
+            if state != 'new':
+                idempotency_key = None
+                metrics.GUESS_RETRIES.inc(outcome=state)
+                if state == 'replay':
+                    payload, status = response
+                    return jsonify({**payload, 'replayed': True}), status
+                if state == 'mismatch':
+                    return jsonify({'error': 'Idempotency key was already used for a different guess'}), 422
+                response = jsonify({'error': 'Guess is still being processed'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+        
+        payload, status = record_guess(team_name, guess, question)
+        if idempotency_key is not None:
+            # Only outcomes that a retry would repeat are kept
+            if status in (200, 409):
+                guess_results.complete(idempotency_key, (payload, status))
+            else:
+                guess_results.release(idempotency_key)
+        return jsonify(payload), status
         
-        game = Game.query.filter_by(status='active').first()
-        if not game:
-            return jsonify({'error': 'No active game'}), 400
-        
-        # Check if team is participating in the current game
+    except Exception as e:
+        if idempotency_key is not None:
+            guess_results.release(idempotency_key)
+        guess_log.error("Error submitting guess: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def record_guess(team_name, guess, question=None):
+    """Grade and store a team's guess; returns the response payload and status.
+
+    question, the (round, question) the client was answering, makes a guess
+    that arrives after that question closed a 409 instead of an answer to the next one.
+    """
+    team, enrolled_game_id = current_team(team_name)
+    if not team:
+        return {'error': 'Team not found'}, 404
+    
+    game = Game.query.filter_by(status='active').first()
+    if not game:
+        return {'error': 'No active game'}, 400
+    
+    if question is not None and question != (game.current_round, game.current_question):
+        return {'error': 'That question has already closed', 'closed': True}, 409
+    
+    # Check if team is participating in the current game; a token issued
+    # for this game already vouches for the enrollment
+    if enrolled_game_id != game.id:
         game_team = GameTeam.query.filter_by(game_id=game.id, team_id=team.id).first()
         if not game_team:
-            return jsonify({'error': 'Team is not participating in the current game'}), 400
-        
-        # Check if team has already guessed for this question
-        existing_guess = Guess.query.filter(
-            Guess.team_id == team.id,
-            Guess.game_id == game.id,
-            Guess.round_number == game.current_round,
-            Guess.logo_id == game.current_logo_id
-        ).first()
-        
-        if existing_guess:
-            return jsonify({'error': 'Team has already submitted a guess for this question'}), 400
-        
-        # Get current logo
-        logo = Logo.query.get(game.current_logo_id)
-        if not logo:
-            return jsonify({'error': 'No logo found for current round'}), 400
-        
-        # Check if guess is correct
-        correct_answers = [logo.correct_answer.lower()]
-        if logo.alternative_answers:
-            try:
-                alternative_answers = json.loads(logo.alternative_answers)
-                correct_answers.extend([ans.lower() for ans in alternative_answers])
-            except:
-                pass
-        
-        is_correct = guess in correct_answers
-        
-        # Save guess with proper fields
-        guess_obj = Guess(
-            team_id=team.id,
-            game_id=game.id,
-            round_number=game.current_round,
-            logo_id=game.current_logo_id,
-            question_number=game.current_question,
-            guess_text=guess,
-            guess=f"{guess}_{game.current_logo_id}",  # Legacy field for compatibility
-            is_correct=is_correct,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(guess_obj)
-        
-        # Update team score if correct
-        if is_correct:
-            team.score += 1
-        
+            return {'error': 'Team is not participating in the current game'}, 400
+    
+    # Check if team has already guessed for this question
+    existing_guess = Guess.query.filter(
+        Guess.team_id == team.id,
+        Guess.game_id == game.id,
+        Guess.round_number == game.current_round,
+        Guess.logo_id == game.current_logo_id
+    ).first()
+    
+    if existing_guess:
+        metrics.GUESS_RETRIES.inc(outcome='duplicate')
+        return {'error': 'Team has already submitted a guess for this question', 'duplicate': True}, 409
+    
+    # Get current logo
+    logo = Logo.query.get(game.current_logo_id)
+    if not logo:
+        return {'error': 'No logo found for current round'}, 400
+    
+    # Check if guess is correct
+    is_correct = game_manager.grade(logo, guess)
+    
+    # The text is stored once per game in the answer dictionary; the guess keeps its id
+    guess_obj = Guess(
+        team_id=team.id,
+        game_id=game.id,
+        round_number=game.current_round,
+        logo_id=game.current_logo_id,
+        question_number=game.current_question,
+        answer_id=game_manager.answers.lookup(game.id, guess),
+        is_correct=is_correct,
+        timestamp=datetime.utcnow()
+    )
+    db.session.add(guess_obj)
+    game_manager.record_event(
+        game, 'guess', guess_obj.timestamp,
+        team_id=team.id, text=guess, correct=is_correct
+    )
+    
+    # Update team score if correct, without loading the team row
+    if is_correct:
+        db.session.execute(update(Team).where(Team.id == team.id).values(score=Team.score + 1))
+    
+    try:
         db.session.commit()
-        
-        logging.info(f"Team '{team_name}' guessed '{guess}' - {'Correct' if is_correct else 'Incorrect'}")
-        
-        return jsonify({
-            'success': True,
-            'is_correct': is_correct,
-            'correct_answer': logo.correct_answer if is_correct else None
-        })
-        
-    except Exception as e:
-        logging.error(f"Error submitting guess: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+    except IntegrityError:
+        # Another submission for the team, or the question closing, got there first
+        db.session.rollback()
+        metrics.GUESS_RETRIES.inc(outcome='duplicate')
+        return {'error': 'Team has already submitted a guess for this question', 'duplicate': True}, 409
+    
+    # Count the guess towards the question's analytics
+    game_manager.analytics.record_guess(game, guess, is_correct, guess_obj.timestamp)
+    metrics.GUESSES.inc(result='correct' if is_correct else 'incorrect')
+    
+    guess_log.info("Team '%s' guessed '%s' - %s", team.name, guess, 'Correct' if is_correct else 'Incorrect',
+                   extra={'team_id': team.id, 'game_id': game.id, 'question': game.current_question})
+    
+    return {
+        'success': True,
+        'is_correct': is_correct,
+        'correct_answer': logo.correct_answer if is_correct else None
+    }, 200
+
+@bp.route('/api/time')
+def server_time():
+    """Server clock for the client's offset handshake"""
+    response = jsonify({'server_time': time.time()})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
-@app.route('/api/status/<team_name>')
-def get_team_status(team_name):
+@bp.route('/api/status')
+@bp.route('/api/status/<team_name>')
+def get_team_status(team_name=None):
     """Get current game status for a team"""
     try:
-        team = Team.query.filter_by(name=team_name).first()
-        if not team:
+        # Long-poll: ?since=<version>&wait=<seconds> holds the request until the state changes;
+        # where that is unsafe, long_poll tells the client to poll on an interval instead
+        long_poll = current_app.config['LONG_POLL']
+        since = request.args.get('since', type=int)
+        wait = min(request.args.get('wait', 0, type=float), LONG_POLL_MAX_WAIT)
+        if long_poll and since is not None and wait > 0 and not wait_for_change(since, wait):
+            return rate_limit.admission.busy_response()
+        version = game_manager.broadcaster.version
+        
+        team_ref, enrolled_game_id = current_team(team_name)
+        if not team_ref:
             return jsonify({'error': 'Team not found'}), 404
         
         game = Game.query.filter_by(status='active').first()
         
         if not game:
+            team_score, _ = team_score_and_guess(team_ref.id)
+            if team_score is None:
+                return jsonify({'error': 'Team not found'}), 404
             return jsonify({
                 'game_status': 'waiting',
-                'team_score': team.score,
-                'message': 'Waiting for game to start...'
+                'team_score': team_score,
+                'message': 'Waiting for game to start...',
+                'next_change_at': None,
+                'version': version,
+                'long_poll': long_poll
             })
         
-        # Check if team is enrolled in current game, and auto-enroll if not
-        game_team = GameTeam.query.filter_by(game_id=game.id, team_id=team.id).first()
-        if not game_team:
-            # Auto-enroll team in current active game
-            try:
-                game_team = GameTeam(
-                    game_id=game.id,
-                    team_id=team.id
-                )
-                db.session.add(game_team)
-                db.session.commit()
-                logging.info(f"Auto-enrolled team '{team.name}' in current active game")
-            except Exception as e:
-                logging.error(f"Error auto-enrolling team: {e}")
-                db.session.rollback()
+        # Check if team is enrolled in current game, and auto-enroll if not;
+        # a token issued for this game already vouches for the enrollment
+        game_team = None
+        if enrolled_game_id != game.id:
+            game_team = GameTeam.query.filter_by(game_id=game.id, team_id=team_ref.id).first()
+        if enrolled_game_id != game.id and not game_team:
+            game_team = enroll_team(game, team_ref)
         
         # Check if we need to auto-advance due to timer expiry
-        if game.round_start_time:
-            elapsed = (datetime.utcnow() - game.round_start_time).total_seconds()
-            if elapsed >= 30:
-                # Timer expired - auto advance question
-                try:
-                    submit_dummy_answers_for_missing_teams(game)
-                    logos = Logo.query.all()
-                    game_manager.advance_question(game, logos)
-                    db.session.commit()
-                    logging.info(f"Auto-advanced to next question due to timer expiry")
-                except Exception as e:
-                    logging.error(f"Error in auto-advance: {e}")
-        
-        # Reload game state after potential auto-advance
-        game = Game.query.filter_by(status='active').first()
-        if not game:
+        close_if_expired(game)
+        
+        # A commit above expires the game, so this refreshes it by primary key
+        # only when something changed instead of re-running the status query
+        if game.status != 'active':
+            team_score, _ = team_score_and_guess(team_ref.id)
+            if team_score is None:
+                return jsonify({'error': 'Team not found'}), 404
             return jsonify({
                 'game_status': 'finished',
-                'team_score': team.score,
-                'message': 'Game has ended'
+                'team_score': team_score,
+                'message': 'Game has ended',
+                'next_change_at': None,
+                'version': version,
+                'long_poll': long_poll
             })
         
         # Get current logo
@@ -415,16 +583,10 @@ def get_team_status(team_name):
         if game.current_logo_id:
             logo = Logo.query.get(game.current_logo_id)
         
-        # Check if team has guessed for this specific logo 
-        has_guessed = False
-        if game and logo:
-            existing_guess = Guess.query.filter(
-                Guess.team_id == team.id,
-                Guess.game_id == game.id,
-                Guess.round_number == game.current_round,
-                Guess.logo_id == game.current_logo_id
-            ).first()
-            has_guessed = existing_guess is not None
+        # Score and whether the team has guessed this specific logo, in one query
+        team_score, has_guessed = team_score_and_guess(team_ref.id, game if logo else None)
+        if team_score is None:
+            return jsonify({'error': 'Team not found'}), 404
         
         # Calculate time remaining
         time_remaining = 0
@@ -432,104 +594,276 @@ def get_team_status(team_name):
             elapsed = (datetime.utcnow() - game.round_start_time).total_seconds()
             time_remaining = max(0, 30 - elapsed)
         
-        return jsonify({
+        status = {
             'game_status': game.status,
             'current_round': game.current_round,
             'total_rounds': game.total_rounds,
             'current_question': getattr(game, 'current_question', 1),
             'questions_per_round': getattr(game, 'questions_per_round', 10),
-            'team_score': team.score,
+            'team_score': team_score,
             'logo_url': logo.image_url if logo else None,
             'has_guessed': has_guessed,
             'time_remaining': int(time_remaining),
-            'round_active': time_remaining > 0 and game.status == 'active'
+            'round_active': time_remaining > 0 and game.status == 'active',
+            **question_timing(game.round_start_time),
+            'version': version,
+            'long_poll': long_poll
+        }
+        
+        # Hand out a token that records the enrollment so later requests skip the check
+        if enrolled_game_id != game.id and game_team is not None:
+            status['team_token'] = issue_team_token(team_ref.id, game.id)
+        
+        return respond(status)
+        
+    except Exception as e:
+        logger.error("Error getting team status: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def admin_status_payload(summary=False):
+    """Game, teams and logo catalog as shown on the admin dashboard and leaderboards.
+
+    With summary the team and logo lists are left out and only counted; the
+    dashboard pages through them with /api/admin/teams and /api/admin/logos.
+    """
+    game = Game.query.filter_by(status='active').first()
+    teams = [] if summary else Team.query.order_by(Team.score.desc()).all()
+    logos = [] if summary else Logo.query.all()
+    
+    team_data = []
+    for team in teams:
+        members = []
+        try:
+            members = json.loads(team.members)
+        except:
+            pass
+    
+        team_data.append({
+            'id': team.id,
+            'name': team.name,
+            'members': members,
+            'score': team.score
         })
+    
+    logo_data = []
+    for logo in logos:
+        alternatives = []
+        try:
+            alternatives = json.loads(logo.alternative_answers or '[]')
+        except:
+            pass
+    
+        logo_data.append({
+            'id': logo.id,
+            'name': logo.name,
+            'image_url': logo.image_url,
+            'correct_answer': logo.correct_answer,
+            'alternative_answers': alternatives
+        })
+    
+    game_data = None
+    if game:
+        # Calculate time remaining
+        time_remaining = 0
+        if game.round_start_time:
+            elapsed = (datetime.utcnow() - game.round_start_time).total_seconds()
+            time_remaining = max(0, 30 - elapsed)
+    
+        current_logo = None
+        if game.current_logo_id:
+            # Reuse the catalog loaded above instead of another lookup
+            if summary:
+                logo = db.session.get(Logo, game.current_logo_id)
+            else:
+                logo = next((logo for logo in logos if logo.id == game.current_logo_id), None)
+            if logo:
+                current_logo = {
+                    'id': logo.id,
+                    'name': logo.name,
+                    'image_url': logo.image_url,
+                    'correct_answer': logo.correct_answer
+                }
+    
+        game_data = {
+            'id': game.id,
+            'status': game.status,
+            'current_round': game.current_round,
+            'total_rounds': game.total_rounds,
+            'current_question': getattr(game, 'current_question', 1),
+            'questions_per_round': getattr(game, 'questions_per_round', 10),
+            'current_logo': current_logo,
+            'time_remaining': int(time_remaining),
+            'round_active': time_remaining > 0 and game.status == 'active',
+            **question_timing(game.round_start_time)
+        }
+    
+    if summary:
+        return {
+            'game': game_data,
+            'team_count': db.session.scalar(select(func.count(Team.id))),
+            'logo_count': db.session.scalar(select(func.count(Logo.id)))
+        }
+    return {
+        'game': game_data,
+        'teams': team_data,
+        'logos': logo_data
+    }
+
+def team_status_frame():
+    """Game-wide part of the team status: built once per state version and shared by all team streams"""
+    game = Game.query.filter_by(status='active').first()
+    scores = dict(db.session.execute(select(Team.id, Team.score)).all())
+    if not game:
+        return {'game': None, 'scores': scores, 'guessed': set()}
+    
+    logo = db.session.get(Logo, game.current_logo_id) if game.current_logo_id else None
+    guessed = set()
+    if logo:
+        guessed = set(db.session.scalars(select(Guess.team_id).where(
+            Guess.game_id == game.id,
+            Guess.round_number == game.current_round,
+            Guess.logo_id == game.current_logo_id
+        )))
+    return {
+        'game': {
+            'id': game.id,
+            'current_round': game.current_round,
+            'total_rounds': game.total_rounds,
+            'current_question': game.current_question,
+            'questions_per_round': game.questions_per_round,
+            'logo_url': logo.image_url if logo else None,
+            'round_start_time': game.round_start_time
+        },
+        'scores': scores,
+        'guessed': guessed
+    }
+
+def team_status_from_frame(frame, team_id):
+    """One team's view of a status frame, in the same shape as /api/status"""
+    game = frame['game']
+    if game is None:
+        return {
+            'game_status': 'waiting',
+            'team_score': frame['scores'].get(team_id, 0),
+            'message': 'Waiting for game to start...',
+            'next_change_at': None
+        }
+    
+    time_remaining = 0
+    if game['round_start_time']:
+        elapsed = (datetime.utcnow() - game['round_start_time']).total_seconds()
+        time_remaining = max(0, 30 - elapsed)
+    
+    return {
+        'game_status': 'active',
+        'current_round': game['current_round'],
+        'total_rounds': game['total_rounds'],
+        'current_question': game['current_question'],
+        'questions_per_round': game['questions_per_round'],
+        'team_score': frame['scores'].get(team_id, 0),
+        'logo_url': game['logo_url'],
+        'has_guessed': team_id in frame['guessed'],
+        'time_remaining': int(time_remaining),
+        'round_active': time_remaining > 0,
+        **question_timing(game['round_start_time'])
+    }
+
+def spectator_payload():
+    """Public view of the game: current logo, deadline and leaderboard, without answers or members"""
+    game = Game.query.filter_by(status='active').first()
+    leaderboard = [
+        {'name': name, 'score': score}
+        for name, score in db.session.execute(select(Team.name, Team.score).order_by(Team.score.desc(), Team.name))
+    ]
+    if not game:
+        return {'game': None, 'leaderboard': leaderboard}
+    
+    logo = db.session.get(Logo, game.current_logo_id) if game.current_logo_id else None
+    guesses = 0
+    if logo:
+        guesses = db.session.scalar(select(func.count(Guess.id)).where(
+            Guess.game_id == game.id,
+            Guess.round_number == game.current_round,
+            Guess.logo_id == game.current_logo_id
+        ))
+    return {
+        'game': {
+            'current_round': game.current_round,
+            'total_rounds': game.total_rounds,
+            'current_question': game.current_question,
+            'questions_per_round': game.questions_per_round,
+            'logo_url': logo.image_url if logo else None,
+            'guesses': guesses,
+            'teams': GameTeam.query.filter_by(game_id=game.id).count(),
+            **question_timing(game.round_start_time)
+        },
+        'leaderboard': leaderboard
+    }
+
+def spectator_frame():
+    """Spectator payload serialized and compressed once per state version, shared by every viewer"""
+    body = serialization.dumps_bytes(spectator_payload())
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, mtime=0),
+        'etag': hashlib.blake2b(body, digest_size=16).hexdigest()
+    }
+
+def spectator_stamp():
+    """Cheap fingerprint of what the spectator view shows, read from the database in one query.
+
+    The state version only counts changes committed by this process; the
+    stamp also moves when another worker starts a question or records a guess.
+    """
+    active = select(Game.id).where(Game.status == 'active').order_by(Game.id).limit(1).scalar_subquery()
+    
+    def of_active(column):
+        return select(column).where(Game.id == active).scalar_subquery()
+    
+    return tuple(db.session.execute(select(
+        active,
+        of_active(Game.current_round),
+        of_active(Game.current_question),
+        of_active(Game.current_logo_id),
+        of_active(Game.round_start_time),
+        select(func.count()).select_from(GameTeam).where(GameTeam.game_id == active).scalar_subquery(),
+        select(func.max(Guess.id)).scalar_subquery(),
+        select(func.count(Team.id)).scalar_subquery(),
+        select(func.sum(Team.score)).scalar_subquery()
+    )).one())
+
+@bp.route('/api/spectator/status')
+def get_spectator_status():
+    """Spectator view from the shared frame; one stamp query unless the state changed"""
+    try:
+        # Keyed on the stamp too, so every worker rebuilds once another one changed the game
+        key = (game_manager.broadcaster.version, spectator_stamp())
+        frame = game_manager.broadcaster.frame('spectator_poll', spectator_frame, key=key)
+        response = current_app.response_class(frame['body'], mimetype='application/json')
+        response.set_etag(frame['etag'], weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        response.make_conditional(request)
+        if response.status_code == 200 and request.accept_encodings['gzip']:
+            response.set_data(frame['gzip'])
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
         
     except Exception as e:
-        logging.error(f"Error getting team status: {e}")
+        logger.error("Error getting spectator status: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/status')
+@bp.route('/api/admin/status')
 def get_admin_status():
-    """Get current game status for admin"""
+    """Get current game status for admin; ?summary=1 counts teams and logos instead of listing them"""
     try:
-        game = Game.query.filter_by(status='active').first()
-        teams = Team.query.order_by(Team.score.desc()).all()
-        logos = Logo.query.all()
-        
-        team_data = []
-        for team in teams:
-            members = []
-            try:
-                members = json.loads(team.members)
-            except:
-                pass
-            
-            team_data.append({
-                'id': team.id,
-                'name': team.name,
-                'members': members,
-                'score': team.score
-            })
-        
-        logo_data = []
-        for logo in logos:
-            alternatives = []
-            try:
-                alternatives = json.loads(logo.alternative_answers or '[]')
-            except:
-                pass
-            
-            logo_data.append({
-                'id': logo.id,
-                'name': logo.name,
-                'image_url': logo.image_url,
-                'correct_answer': logo.correct_answer,
-                'alternative_answers': alternatives
-            })
-        
-        game_data = None
-        if game:
-            # Calculate time remaining
-            time_remaining = 0
-            if game.round_start_time:
-                elapsed = (datetime.utcnow() - game.round_start_time).total_seconds()
-                time_remaining = max(0, 30 - elapsed)
-            
-            current_logo = None
-            if game.current_logo_id:
-                logo = Logo.query.get(game.current_logo_id)
-                if logo:
-                    current_logo = {
-                        'id': logo.id,
-                        'name': logo.name,
-                        'image_url': logo.image_url,
-                        'correct_answer': logo.correct_answer
-                    }
-            
-            game_data = {
-                'id': game.id,
-                'status': game.status,
-                'current_round': game.current_round,
-                'total_rounds': game.total_rounds,
-                'current_question': getattr(game, 'current_question', 1),
-                'questions_per_round': getattr(game, 'questions_per_round', 10),
-                'current_logo': current_logo,
-                'time_remaining': int(time_remaining),
-                'round_active': time_remaining > 0 and game.status == 'active'
-            }
-        
-        return jsonify({
-            'game': game_data,
-            'teams': team_data,
-            'logos': logo_data
-        })
+        return respond(admin_status_payload(summary=request.args.get('summary') == '1'))
         
     except Exception as e:
-        logging.error(f"Error getting admin status: {e}")
+        logger.error("Error getting admin status: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/start_game', methods=['POST'])
+@bp.route('/api/admin/start_game', methods=['POST'])
 def start_game():
     """Start a new game"""
     try:
@@ -537,19 +871,20 @@ def start_game():
         active_games = Game.query.filter_by(status='active').all()
         for game in active_games:
             game.status = 'finished'
+            game_manager.record_event(game, 'game_finished')
+            archive_game(game)
+            game_manager.discard_game(game.id)
         
         # Reset all team scores
-        teams = Team.query.all()
-        for team in teams:
-            team.score = 0
+        db.session.execute(update(Team).values(score=0))
         
-        # Get available logos
-        logos = Logo.query.all()
-        if not logos:
+        # Count available logos; the game manager picks each question's logo itself
+        logo_count = db.session.scalar(select(func.count(Logo.id)))
+        if not logo_count:
             return jsonify({'error': 'No logos available. Please add logos first.'}), 400
         
         # Create new game - single round with all questions
-        questions_per_round = len(logos)  # All questions in one round
+        questions_per_round = logo_count  # All questions in one round
         total_rounds = 1  # Only one round
         game = Game(
             status='active',
@@ -563,28 +898,28 @@ def start_game():
         db.session.add(game)
         db.session.flush()  # Get the game ID
         
-        # Enroll all existing teams as participants in this game
-        teams = Team.query.all()
-        for team in teams:
-            game_team = GameTeam(
-                game_id=game.id,
-                team_id=team.id
-            )
-            db.session.add(game_team)
+        # Enroll all existing teams as participants in this game, in one batched insert
+        team_ids = db.session.scalars(select(Team.id)).all()
+        if team_ids:
+            joined_at = datetime.utcnow()
+            db.session.execute(insert(GameTeam), [
+                {'game_id': game.id, 'team_id': team_id, 'joined_at': joined_at} for team_id in team_ids
+            ])
         
         # Start first round
-        game_manager.start_round(game, logos)
+        game_manager.start_round(game)
+        game_manager.record_event(game, 'teams_enrolled', team_ids=team_ids)
         
         db.session.commit()
         
-        logging.info(f"New game started with {total_rounds} rounds")
+        admin_log.info("New game started with %s rounds", total_rounds)
         return jsonify({'success': True, 'game_id': game.id})
         
     except Exception as e:
-        logging.error(f"Error starting game: {e}")
+        logger.error("Error starting game: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/next_round', methods=['POST'])
+@bp.route('/api/admin/next_round', methods=['POST'])
 def next_round():
     """Advance to the next round (admin sends 'NEXT ROUND')"""
     try:
@@ -595,24 +930,27 @@ def next_round():
         if game.current_round >= game.total_rounds:
             # End the game
             game.status = 'finished'
+            game_manager.record_event(game, 'game_finished')
+            archive_game(game)
+            game_id = game.id
             db.session.commit()
+            game_manager.discard_game(game_id)
             return jsonify({'success': True, 'game_finished': True})
         
         # Advance to next round
         game.current_round += 1
-        logos = Logo.query.all()
-        game_manager.start_round(game, logos)
+        game_manager.start_round(game)
         
         db.session.commit()
         
-        logging.info(f"Advanced to round {game.current_round}")
+        admin_log.info("Advanced to round %s", game.current_round)
         return jsonify({'success': True, 'current_round': game.current_round})
         
     except Exception as e:
-        logging.error(f"Error advancing round: {e}")
+        logger.error("Error advancing round: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/next_question', methods=['POST'])
+@bp.route('/api/admin/next_question', methods=['POST'])
 def next_question():
     """Advance to the next question (automatic after 30 seconds)"""
     try:
@@ -620,54 +958,41 @@ def next_question():
         if not game:
             return jsonify({'error': 'No active game'}), 400
         
-        # Before advancing, submit dummy answers for teams that haven't guessed
-        submit_dummy_answers_for_missing_teams(game)
+        # Ignore requests for a question that has already been closed elsewhere
+        data = request.get_json(silent=True) or {}
+        expected_question = data.get('question')
+        expected_round = data.get('round')
+        if (expected_question is not None and expected_question != game.current_question) or \
+                (expected_round is not None and expected_round != game.current_round):
+            return jsonify({'success': True, 'already_closed': True, 'current_question': game.current_question})
         
-        logos = Logo.query.all()
-        result = game_manager.advance_question(game, logos)
-        
-        db.session.commit()
+        # Placeholder answers, result freezing and the advance happen in one transaction
+        game_manager.close_question(game)
         
         if game.status == 'finished':
-            logging.info(f"Game completed with all questions answered")
+            game_log.info("Game completed with all questions answered")
             return jsonify({'success': True, 'game_finished': True})
         else:
-            logging.info(f"Advanced to question {game.current_question} in round {game.current_round}")
+            game_log.info("Advanced to question %s in round %s", game.current_question, game.current_round)
             return jsonify({'success': True, 'current_question': game.current_question})
         
     except Exception as e:
-        logging.error(f"Error advancing question: {e}")
+        logger.error("Error advancing question: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/logos', methods=['GET'])
+@bp.route('/api/admin/logos', methods=['GET'])
 def get_logos():
-    """Get all logos"""
+    """Get a page of the logo catalog, searched with ?q= and sorted with ?sort=name|answer|newest"""
     try:
-        logos = Logo.query.all()
-        logo_data = []
-        
-        for logo in logos:
-            alternatives = []
-            try:
-                alternatives = json.loads(logo.alternative_answers or '[]')
-            except:
-                pass
-            
-            logo_data.append({
-                'id': logo.id,
-                'name': logo.name,
-                'image_url': logo.image_url,
-                'correct_answer': logo.correct_answer,
-                'alternative_answers': alternatives
-            })
-        
-        return jsonify({'logos': logo_data})
+        search, sort, order, offset, limit = admin_lists.page_args(request.args, admin_lists.LOGO_SORTS, 'name')
+        logos, total = admin_lists.logo_page(search, sort, order, offset, limit)
+        return respond({'logos': logos, 'total': total, 'offset': offset, 'limit': limit})
         
     except Exception as e:
-        logging.error(f"Error getting logos: {e}")
+        logger.error("Error getting logos: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/logos', methods=['POST'])
+@bp.route('/api/admin/logos', methods=['POST'])
 def add_logo():
     """Add a new logo"""
     try:
@@ -687,16 +1012,17 @@ def add_logo():
             alternative_answers=json.dumps(alternative_answers)
         )
         db.session.add(logo)
+        game_manager.mark_changed()
         db.session.commit()
         
-        logging.info(f"Added new logo: {name}")
+        admin_log.info("Added new logo: %s", name)
         return jsonify({'success': True, 'logo_id': logo.id})
         
     except Exception as e:
-        logging.error(f"Error adding logo: {e}")
+        logger.error("Error adding logo: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/logos/<int:logo_id>', methods=['DELETE'])
+@bp.route('/api/admin/logos/<int:logo_id>', methods=['DELETE'])
 def delete_logo(logo_id):
     """Delete a logo"""
     try:
@@ -705,16 +1031,17 @@ def delete_logo(logo_id):
             return jsonify({'error': 'Logo not found'}), 404
         
         db.session.delete(logo)
+        game_manager.mark_changed()
         db.session.commit()
         
-        logging.info(f"Deleted logo: {logo.name}")
+        admin_log.info("Deleted logo: %s", logo.name)
         return jsonify({'success': True})
         
     except Exception as e:
-        logging.error(f"Error deleting logo: {e}")
+        logger.error("Error deleting logo: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/stop_game', methods=['POST'])
+@bp.route('/api/admin/stop_game', methods=['POST'])
 def stop_game():
     """Stop the current game immediately"""
     try:
@@ -726,42 +1053,46 @@ def stop_game():
         game.status = 'finished'
         game.current_logo_id = None
         game.round_start_time = None
+        game_manager.record_event(game, 'game_finished')
+        archive_game(game)
+        game_id = game.id
         
         db.session.commit()
+        game_manager.discard_game(game_id)
         
-        logging.info("Game stopped by admin")
+        admin_log.info("Game stopped by admin")
         return jsonify({'success': True, 'message': 'Game stopped successfully'})
         
     except Exception as e:
-        logging.error(f"Error stopping game: {e}")
+        logger.error("Error stopping game: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/restart_game', methods=['POST'])
+@bp.route('/api/admin/restart_game', methods=['POST'])
 def restart_game():
     """Restart the game - reset everything and start fresh"""
     try:
         # End any existing games
         active_games = Game.query.all()
+        ended_ids = []
         for game in active_games:
+            if game.status != 'finished':
+                game_manager.record_event(game, 'game_finished')
+                ended_ids.append(game.id)
             game.status = 'finished'
         
         # Reset all team scores
-        teams = Team.query.all()
-        for team in teams:
-            team.score = 0
-        
-        # Clear all guesses
-        guesses = Guess.query.all()
-        for guess in guesses:
-            db.session.delete(guess)
-        
-        # Get available logos
-        logos = Logo.query.all()
-        if not logos:
+        db.session.execute(update(Team).values(score=0))
+        
+        # Archive guesses of the ended games instead of discarding them
+        archive_finished_games()
+        
+        # Count available logos; the game manager picks each question's logo itself
+        logo_count = db.session.scalar(select(func.count(Logo.id)))
+        if not logo_count:
             return jsonify({'error': 'No logos available. Please add logos first.'}), 400
         
         # Create new game - single round with all questions
-        questions_per_round = len(logos)  # All questions in one round
+        questions_per_round = logo_count  # All questions in one round
         total_rounds = 1  # Only one round
         game = Game(
             status='active',
@@ -776,18 +1107,33 @@ def restart_game():
         db.session.flush()  # Get the game ID
         
         # Start first round
-        game_manager.start_round(game, logos)
+        game_manager.start_round(game)
         
         db.session.commit()
+        for game_id in ended_ids:
+            game_manager.discard_game(game_id)
         
-        logging.info("Game restarted by admin")
+        admin_log.info("Game restarted by admin")
         return jsonify({'success': True, 'game_id': game.id, 'message': 'Game restarted successfully'})
         
     except Exception as e:
-        logging.error(f"Error restarting game: {e}")
+        logger.error("Error restarting game: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/admin/team/<int:team_id>', methods=['DELETE'])
+@bp.route('/api/admin/teams')
+@admin_required
+def get_teams():
+    """Get a page of teams with their rank, searched with ?q= and sorted with ?sort=score|name|newest"""
+    try:
+        search, sort, order, offset, limit = admin_lists.page_args(request.args, admin_lists.TEAM_SORTS, 'score')
+        teams, total = admin_lists.team_page(search, sort, order, offset, limit)
+        return respond({'teams': teams, 'total': total, 'offset': offset, 'limit': limit})
+        
+    except Exception as e:
+        logger.error("Error getting teams: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/team/<int:team_id>', methods=['DELETE'])
 def remove_team(team_id):
     """Remove a team and all associated data"""
     try:
@@ -804,6 +1150,8 @@ def remove_team(team_id):
         
         # Remove the team itself
         db.session.delete(team)
+        team_cache.invalidate(team_id)
+        game_manager.mark_changed()
         
         # Commit the transaction
         db.session.commit()
@@ -814,7 +1162,7 @@ def remove_team(team_id):
         if game:
             auto_advanced = check_and_auto_advance(game)
         
-        logging.info(f"Removed team '{team_name}' (ID: {team_id}) and {deleted_guesses} associated guesses")
+        admin_log.info("Removed team '%s' (ID: %s) and %s associated guesses", team_name, team_id, deleted_guesses)
         
         return jsonify({
             'success': True, 
@@ -826,8 +1174,197 @@ def remove_team(team_id):
         
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Error removing team: {e}")
+        logger.error("Error removing team: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/history')
+def get_game_history():
+    """List archived games, newest first"""
+    try:
+        archived_games = ArchivedGame.query.order_by(ArchivedGame.game_id.desc()).all()
+
+        history = []
+        for archived in archived_games:
+            team_scores = {}
+            try:
+                team_scores = json.loads(archived.team_scores or '{}')
+            except:
+                pass
+
+            history.append({
+                'game_id': archived.game_id,
+                'total_questions': archived.total_questions,
+                'guess_count': archived.guess_count,
+                'archived_at': archived.archived_at.isoformat() if archived.archived_at else None,
+                'teams': sorted(
+                    [{'id': int(team_id), **entry} for team_id, entry in team_scores.items()],
+                    key=lambda entry: entry['score'],
+                    reverse=True
+                )
+            })
+
+        return jsonify({'games': history})
+
+    except Exception as e:
+        logger.error("Error getting game history: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/history/<int:game_id>')
+def get_game_history_detail(game_id):
+    """Get the archived guesses of one game, optionally for a single question"""
+    try:
+        archived = db.session.get(ArchivedGame, game_id)
+        if not archived:
+            return jsonify({'error': 'Archived game not found'}), 404
+
+        # Only the requested partitions are read and decompressed
+        query = ArchivedQuestion.query.filter_by(game_id=game_id)
+        round_number = request.args.get('round', type=int)
+        question_number = request.args.get('question', type=int)
+        if round_number is not None:
+            query = query.filter_by(round_number=round_number)
+        if question_number is not None:
+            query = query.filter_by(question_number=question_number)
+
+        questions = []
+        for partition in query.order_by(ArchivedQuestion.round_number, ArchivedQuestion.question_number):
+            questions.append({
+                'round_number': partition.round_number,
+                'question_number': partition.question_number,
+                'logo_id': partition.logo_id,
+                'guesses': decode_payload(partition.payload)
+            })
+
+        team_scores = {}
+        try:
+            team_scores = json.loads(archived.team_scores or '{}')
+        except:
+            pass
+
+        return jsonify({
+            'game_id': game_id,
+            'total_questions': archived.total_questions,
+            'guess_count': archived.guess_count,
+            'teams': team_scores,
+            'questions': questions
+        })
+
+    except Exception as e:
+        logger.error("Error getting game history detail: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/games/<int:game_id>/guesses')
+@admin_required
+def get_game_guesses(game_id):
+    """Page through a game's guesses in (round, question, team) order, live or archived"""
+    try:
+        try:
+            after = guess_history.decode_cursor(request.args.get('cursor'))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if not guess_history.game_exists(game_id):
+            return jsonify({'error': 'Game not found'}), 404
+        
+        guesses, next_cursor = guess_history.guess_page(
+            game_id,
+            after,
+            limit=request.args.get('limit', guess_history.DEFAULT_PAGE_SIZE, type=int),
+            team_id=request.args.get('team_id', type=int)
+        )
+        return respond({'game_id': game_id, 'guesses': guesses, 'next_cursor': next_cursor})
+        
+    except Exception as e:
+        logger.error("Error getting game guesses: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/games/<int:game_id>/export')
+@admin_required
+def export_game_results(game_id):
+    """Stream every guess of a game as CSV or NDJSON"""
+    try:
+        format = request.args.get('format', 'csv')
+        if format not in guess_history.EXPORT_MIMETYPES:
+            return jsonify({'error': 'Format must be csv or ndjson'}), 400
+        if not guess_history.game_exists(game_id):
+            return jsonify({'error': 'Game not found'}), 404
+        
+        # Rows are read a page at a time while the body is sent, so memory does not grow with the game
+        chunks = guess_history.export_chunks(game_id, format, team_id=request.args.get('team_id', type=int))
+        response = current_app.response_class(
+            stream_with_context(chunks), mimetype=guess_history.EXPORT_MIMETYPES[format]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="game-{game_id}-results.{format}"'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+        
+    except Exception as e:
+        logger.error("Error exporting game results: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/api/admin/analytics')
+def get_question_analytics():
+    """Get per-question analytics from the precomputed aggregates"""
+    try:
+        game = Game.query.filter_by(status='active').first()
+        game_id = request.args.get('game_id', type=int)
+        if game_id is None:
+            # Default to the active game, then to the most recent game with closed questions
+            if game:
+                game_id = game.id
+            else:
+                latest = QuestionResult.query.order_by(QuestionResult.game_id.desc()).first()
+                game_id = latest.game_id if latest else None
+        
+        questions = []
+        if game_id is not None:
+            results = QuestionResult.query.filter_by(game_id=game_id).order_by(
+                QuestionResult.round_number, QuestionResult.question_number
+            ).all()
+            for result in results:
+                answered = (result.correct_count or 0) + (result.incorrect_count or 0)
+                top_wrong_answers = []
+                latency_histogram = []
+                try:
+                    top_wrong_answers = json.loads(result.top_wrong_answers or '[]')
+                    latency_histogram = json.loads(result.latency_histogram or '[]')
+                except:
+                    pass
+                
+                questions.append({
+                    'round_number': result.round_number,
+                    'question_number': result.question_number,
+                    'logo_id': result.logo_id,
+                    'correct': result.correct_count,
+                    'incorrect': result.incorrect_count,
+                    'no_answer': result.missing_count,
+                    'accuracy': round(result.correct_count / answered, 4) if answered else None,
+                    'avg_latency_ms': result.avg_latency_ms,
+                    'top_wrong_answers': top_wrong_answers,
+                    'latency_histogram': latency_histogram
+                })
+        
+        # Counters of the question still in progress come from memory
+        live_question = None
+        if game and game.id == game_id:
+            live_question = {
+                'round_number': game.current_round,
+                'question_number': game.current_question,
+                'logo_id': game.current_logo_id,
+                **game_manager.analytics.live(game.id, game.current_round, game.current_question)
+            }
+        
+        return jsonify({
+            'game_id': game_id,
+            'questions': questions,
+            'live_question': live_question
+        })
+        
+    except Exception as e:
+        logger.error("Error getting question analytics: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        db_setup.init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
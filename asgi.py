@@ -0,0 +1,317 @@
+"""
+asyncio serving mode.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Team, admin and spectator status streams (server-sent events) are served on the event
+loop, so an idle connected client costs a socket and a small coroutine
+instead of a worker thread. Every other route is handed to the Flask app on
+a thread pool. Both share the same GameManager, models and state version.
+Run a single process per box; the state version is per process.
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode
+from models import db, Team, Game, GameTeam
+from auth import is_admin, read_team_token, team_tokens_required, team_cache
+from serialization import dumps_bytes
+from app import (create_app, game_manager, admin_status_payload, team_status_frame,
+                 team_status_from_frame, spectator_frame, enroll_team, close_if_expired,
+                 LONG_POLL_MAX_WAIT)
+import metrics
+
+logger = logging.getLogger('autoquizer.app')
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    # Tell nginx-style proxies not to buffer the stream
+    (b'x-accel-buffering', b'no'),
+]
+
+def _admin_frame():
+    return {'payload': admin_status_payload(), 'built_at': time.monotonic(), 'encoded': {}}
+
+def _admin_event(frame):
+    """Encoded admin status with the countdown advanced to now.
+
+    Every admin stream gets identical bytes for a given second, so they are
+    encoded once and kept on the shared frame.
+    """
+    payload = frame['payload']
+    game = payload['game']
+    remaining = None
+    if game and game['time_remaining']:
+        remaining = int(max(0, game['time_remaining'] - (time.monotonic() - frame['built_at'])))
+    encoded = frame['encoded'].get(remaining)
+    if encoded is None:
+        if remaining is not None:
+            payload = {**payload, 'game': {**game, 'time_remaining': remaining, 'round_active': remaining > 0}}
+        encoded = frame['encoded'][remaining] = dumps_bytes(payload)
+    return encoded
+
+class GameASGI:
+    """ASGI application: status streams on the event loop, everything else through Flask"""
+
+    def __init__(self, flask_app, workers=32, heartbeat=15.0, coalesce=0.25, tick=1.0):
+        self.flask_app = flask_app
+        self.broadcaster = game_manager.broadcaster
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='flask')
+        self.heartbeat = heartbeat
+        self.coalesce = coalesce
+        self.tick = tick
+        self._deadline_task = None
+        self.streams = {
+            '/api/stream/status': self.team_stream,
+            '/api/stream/admin': self.admin_stream,
+            '/api/stream/spectator': self.spectator_stream,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            stream = self.streams.get(scope['path'])
+            if stream is not None and scope['method'] == 'GET':
+                await stream(scope, receive, send)
+            elif scope['path'].startswith('/api/status') and scope['method'] == 'GET':
+                await self.long_poll(scope, receive, send)
+            else:
+                await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.run_sync(game_manager.ensure_restored)
+                self._deadline_task = asyncio.ensure_future(self.close_expired_questions())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._deadline_task is not None:
+                    self._deadline_task.cancel()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_sync(self, function, *args):
+        """Run function inside a Flask app context on the worker pool"""
+        def call():
+            with self.flask_app.app_context():
+                return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def close_expired_questions(self):
+        """Close questions whose timer ran out; stream clients do not poll, so nothing else would"""
+        def check():
+            game = Game.query.filter_by(status='active').first()
+            if game:
+                close_if_expired(game)
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.run_sync(check)
+            except Exception as e:
+                logger.error("Error closing expired question: %s", e)
+
+    async def frame(self, name, build):
+        """Shared frame for the current version, built on the pool only by the first stream to need it"""
+        frame = self.broadcaster.peek(name)
+        if frame is None:
+            frame = await self.run_sync(self.broadcaster.frame, name, build)
+        return frame
+
+    # Streams
+
+    def _resolve_team(self, token, team_name):
+        """Team id for a stream request, enrolling the team in a running game like a status poll would"""
+        claims = read_team_token(token)
+        team = team_cache.get(claims[0]) if claims else None
+        if team is None and team_name and not team_tokens_required():
+            team = Team.query.filter_by(name=team_name).first()
+        if team is None:
+            return None
+        game = Game.query.filter_by(status='active').first()
+        if game and not GameTeam.query.filter_by(game_id=game.id, team_id=team.id).first():
+            enroll_team(game, db.session.get(Team, team.id))
+        return team.id
+
+    async def team_stream(self, scope, receive, send):
+        """Team status pushed on every state change (EventSource can't send headers, so ?token=)"""
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        token = (query.get('token') or [None])[0]
+        team_name = (query.get('team') or [None])[0]
+        team_id = await self.run_sync(self._resolve_team, token, team_name)
+        if team_id is None:
+            await self._send_json(send, 404, {'error': 'Team not found'})
+            return
+        await self._stream(
+            receive, send, 'team',
+            lambda: self.frame('team_status', team_status_frame),
+            lambda frame: dumps_bytes(team_status_from_frame(frame, team_id))
+        )
+
+    def _is_admin(self, scope):
+        """Admin session cookie or password header, checked as admin_required does for Flask routes"""
+        with self.flask_app.request_context(self._environ(scope, b'')):
+            return is_admin()
+
+    async def admin_stream(self, scope, receive, send):
+        """Admin status (answers and member lists included) pushed on every state change; admins only"""
+        if not self._is_admin(scope):
+            await self._send_json(send, 403, {'error': 'Admin login required'})
+            return
+        await self._stream(receive, send, 'admin', lambda: self.frame('admin_status', _admin_frame), _admin_event)
+
+    async def spectator_stream(self, scope, receive, send):
+        """Spectator view pushed on every state change; every viewer gets the frame's bytes as is"""
+        await self._stream(
+            receive, send, 'spectator',
+            lambda: self.frame('spectator', spectator_frame),
+            lambda frame: frame['body']
+        )
+
+    async def _stream(self, receive, send, label, load_frame, encode):
+        async def events():
+            await send({'type': 'http.response.start', 'status': 200, 'headers': SSE_HEADERS})
+            version = None
+            while True:
+                current = self.broadcaster.version
+                if current != version:
+                    data = encode(await load_frame())
+                    await send({
+                        'type': 'http.response.body',
+                        'body': b'id: %d\ndata: %s\n\n' % (current, data),
+                        'more_body': True
+                    })
+                    version = current
+                    # Let bursts of changes (a wave of guesses) collapse into one event
+                    await asyncio.sleep(self.coalesce)
+                    continue
+                if await self.broadcaster.wait_async(version, self.heartbeat) == version:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        metrics.STREAMS_OPEN.inc(stream=label)
+        tasks = [asyncio.ensure_future(events()), asyncio.ensure_future(disconnected())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error("Error in %s stream: %s", label, task.exception())
+        finally:
+            for task in tasks:
+                task.cancel()
+            metrics.STREAMS_OPEN.dec(stream=label)
+
+    async def _send_json(self, send, status, payload):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': dumps_bytes(payload)})
+
+    async def long_poll(self, scope, receive, send):
+        """Status request; a ?since=&wait= long-poll waits on the event loop instead of a worker thread"""
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        try:
+            since = int(query.pop('since')[0])
+            wait = min(float(query.pop('wait')[0]), LONG_POLL_MAX_WAIT)
+        except (KeyError, ValueError):
+            since = wait = None
+        if since is not None and wait > 0:
+            await self.broadcaster.wait_async(since, wait)
+            # Flask answers with whatever is current now
+            scope = {**scope, 'query_string': urlencode(query, doseq=True).encode('latin-1')}
+        await self.call_wsgi(scope, receive, send)
+
+    # Everything else: the Flask app on the worker pool
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    async def call_wsgi(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = self._environ(scope, bytes(body))
+        loop = asyncio.get_running_loop()
+
+        def send_threadsafe(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            # Iterate in the worker thread so streamed responses are passed on chunk by chunk
+            status_line = []
+
+            def start_response(status, headers, exc_info=None):
+                status_line[:] = [int(status.split(' ', 1)[0]), [
+                    (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+                ]]
+
+            result = self.flask_app(environ, start_response)
+            try:
+                started = False
+                for chunk in result:
+                    if not started:
+                        send_threadsafe({'type': 'http.response.start', 'status': status_line[0], 'headers': status_line[1]})
+                        started = True
+                    if chunk:
+                        send_threadsafe({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if not started:
+                    send_threadsafe({'type': 'http.response.start', 'status': status_line[0], 'headers': status_line[1]})
+                send_threadsafe({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        await loop.run_in_executor(self.executor, run)
+
+def create_asgi_app():
+    return GameASGI(
+        # Waiting status requests are held on the event loop, so clients may long-poll
+        create_app({'LONG_POLL': True}),
+        workers=int(os.environ.get('ASGI_WORKER_THREADS', '32')),
+        heartbeat=float(os.environ.get('STREAM_HEARTBEAT', '15')),
+        coalesce=float(os.environ.get('STREAM_COALESCE', '0.25'))
+    )
+
+app = create_asgi_app()
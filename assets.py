@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Static asset build and serving.
+
+`flask --app main build-assets` (or `python assets.py`) minifies the files
+in static/, writes them to static/dist/ under content-hashed names with
+.gz (and .br when brotli is installed) siblings, and records the mapping in
+static/dist/manifest.json. Templates call asset_url('js/team.js'); with a
+manifest present that resolves to /assets/js/team.<hash>.js, served from
+the precompressed file with immutable cache headers. Without a build the
+plain /static/ URL is used, so development needs no build step.
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import shutil
+import hashlib
+import logging
+import mimetypes
+import click
+from flask import request, url_for, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('autoquizer.app')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST = 'manifest.json'
+
+# Files that go through the build
+ASSET_EXTENSIONS = ('.js', '.css')
+
+# Hashed names never change content, so browsers may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,])\s*')
+_CSS_COLON = re.compile(r':\s+')
+
+def minify_css(source):
+    """Drop comments and collapse whitespace"""
+    css = _CSS_COMMENT.sub('', source)
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = _CSS_COLON.sub(':', css)
+    return css.replace(';}', '}').strip() + '\n'
+
+def minify_js(source):
+    """Conservative whitespace and comment removal.
+
+    Works line by line and keeps the line breaks, so automatic semicolon
+    insertion behaves exactly as in the source; lines inside template
+    literals are left untouched.
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not in_template:
+            if in_comment:
+                in_comment = '*/' not in stripped
+                continue
+            if stripped.startswith('/*'):
+                in_comment = '*/' not in stripped
+                continue
+            if not stripped or stripped.startswith('//'):
+                continue
+            line = stripped
+        lines.append(line)
+        if (line.count('`') - line.count('\\`')) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def _hashed_name(path, content):
+    stem, extension = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR, clean=False):
+    """Minify, fingerprint and precompress static assets; returns the manifest.
+
+    Files from earlier builds are kept unless clean is set, so pages rendered
+    by workers still running the previous release keep resolving.
+    """
+    if clean and os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    manifest = {}
+    for directory, subdirectories, files in os.walk(static_dir):
+        if os.path.abspath(directory).startswith(os.path.abspath(dist_dir)):
+            continue
+        for filename in sorted(files):
+            extension = os.path.splitext(filename)[1]
+            if extension not in ASSET_EXTENSIONS:
+                continue
+            source_path = os.path.join(directory, filename)
+            relative = os.path.relpath(source_path, static_dir).replace(os.sep, '/')
+            with open(source_path, 'r', encoding='utf-8') as f:
+                content = MINIFIERS[extension](f.read()).encode('utf-8')
+            hashed = _hashed_name(relative, content)
+            target = os.path.join(dist_dir, hashed)
+            _write(target, content)
+            _write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(target + '.br', brotli.compress(content, quality=11))
+            manifest[relative] = hashed
+    _write(os.path.join(dist_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def load_manifest(dist_dir=DIST_DIR):
+    try:
+        with open(os.path.join(dist_dir, MANIFEST), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def init_app(app, dist_dir=DIST_DIR):
+    """Add asset_url() to templates, the /assets/ route and `flask build-assets`"""
+    manifest = load_manifest(dist_dir)
+    if manifest:
+        logger.info("Serving %s fingerprinted assets", len(manifest))
+
+    @app.template_global()
+    def asset_url(filename):
+        """URL of the built asset for filename, or the plain static URL without a build"""
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('serve_asset', filename=hashed)
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        """Fingerprinted asset, from its precompressed variant when the client accepts one"""
+        if filename.endswith(('.gz', '.br')) or filename == MANIFEST:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encodings = request.accept_encodings
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if encodings[encoding] and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+                response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(dist_dir, filename, mimetype=mimetype)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.cli.command('build-assets')
+    @click.option('--clean', is_flag=True, help='Remove files from earlier builds first')
+    def build_assets_command(clean):
+        """Minify, fingerprint and precompress static assets into static/dist"""
+        built = build(dist_dir=dist_dir, clean=clean)
+        manifest.clear()
+        manifest.update(built)
+        for source, hashed in sorted(built.items()):
+            click.echo(f'{source} -> {hashed}')
+
+if __name__ == '__main__':
+    for source, hashed in sorted(build(clean='--clean' in sys.argv[1:]).items()):
+        print(f'{source} -> {hashed}')
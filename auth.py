@@ -0,0 +1,107 @@
+import os
+import hmac
+import time
+import threading
+from functools import wraps
+from flask import current_app, session, request, jsonify
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import select
+from models import db, Team
+
+# Header team clients send their token in
+TEAM_TOKEN_HEADER = 'X-Team-Token'
+
+def admin_password():
+    """Admin password from the environment (you can change this)"""
+    return os.environ.get('ADMIN_PASSWORD', 'admin123')
+
+def check_admin_password(password):
+    """Constant-time comparison against the admin password"""
+    return hmac.compare_digest(str(password or '').encode('utf-8'), admin_password().encode('utf-8'))
+
+def is_admin():
+    """True for a logged-in admin session or a request carrying the admin password header"""
+    if session.get('is_admin'):
+        return True
+    header = request.headers.get('X-Admin-Password')
+    return header is not None and check_admin_password(header)
+
+def admin_required(view):
+    """Reject requests that are not from an admin with 403"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({'error': 'Admin login required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def team_tokens_required():
+    """When set, team endpoints stop accepting a bare team name"""
+    return os.environ.get('TEAM_TOKENS_REQUIRED', '0') == '1'
+
+def _team_serializer():
+    serializer = current_app.extensions.get('team_tokens')
+    if serializer is None:
+        serializer = current_app.extensions['team_tokens'] = URLSafeSerializer(
+            current_app.secret_key, salt='team-token'
+        )
+    return serializer
+
+def issue_team_token(team_id, game_id=None):
+    """Signed token carrying the team id and the game it is enrolled in"""
+    return _team_serializer().dumps([team_id, game_id])
+
+def read_team_token(token):
+    """(team_id, game_id) from a token, or None if it is missing or was tampered with.
+
+    Verification is an HMAC check in memory; no database access.
+    """
+    if not token:
+        return None
+    try:
+        team_id, game_id = _team_serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        return None
+    return team_id, game_id
+
+def request_team_token():
+    """Team token from the request header, or from the JSON body for simple clients"""
+    token = request.headers.get(TEAM_TOKEN_HEADER)
+    if token is None and request.is_json:
+        token = (request.get_json(silent=True) or {}).get('team_token')
+    return token
+
+class TeamCache:
+    """Team id -> (id, name) rows so token-authenticated requests skip the team lookup.
+
+    Names never change once registered; entries expire after ttl seconds so a
+    team removed by another worker stops resolving soon after.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, team_id):
+        entry = self._entries.get(team_id)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        team = db.session.execute(select(Team.id, Team.name).where(Team.id == team_id)).first()
+        with self._lock:
+            if team is None:
+                self._entries.pop(team_id, None)
+            else:
+                self._entries[team_id] = (team, now + self.ttl)
+        return team
+
+    def invalidate(self, team_id=None):
+        """Drop one team, or every team when team_id is None"""
+        with self._lock:
+            if team_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(team_id, None)
+
+team_cache = TeamCache(ttl=float(os.environ.get('TEAM_CACHE_TTL', '60')))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Car Logo Guessing Game.
+
+Measures how long a fresh worker process takes before it can serve traffic:
+interpreter start, importing app.py, create_app() and the first request.
+The scratch database is initialized once with db_setup.init_db(), the way a
+deploy runs `flask init-db` before starting workers, so each run measures
+only what a gunicorn worker does on boot.
+
+    python benchmarks/cold_start.py --runs 20 --output cold_start.json
+    python benchmarks/cold_start.py --runs 20 --compare cold_start.json
+    python benchmarks/cold_start.py --max-ms 1500
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from load_test import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ('import_ms', 'create_app_ms', 'first_request_ms', 'ready_ms', 'process_ms')
+
+# Runs inside each worker process; prints the phase timings as JSON
+WORKER = """
+import time
+started = time.perf_counter()
+import logging
+logging.disable(logging.CRITICAL)
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app()
+created = time.perf_counter()
+response = application.test_client().get('/api/admin/status')
+finished = time.perf_counter()
+assert response.status_code == 200, response.status_code
+import json
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (finished - created) * 1000,
+    'ready_ms': (finished - started) * 1000
+}))
+"""
+
+def prepare_database(env):
+    """Create, migrate and seed the scratch database once, as a deploy would"""
+    subprocess.run(
+        [sys.executable, '-c', 'import logging; logging.disable(logging.CRITICAL)\n'
+         'from app import create_app\nimport db_setup\n'
+         'with create_app().app_context(): db_setup.init_db()'],
+        cwd=ROOT, env=env, check=True
+    )
+
+def run_worker(env):
+    """Start one fresh interpreter and return its phase timings"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - started) * 1000
+    return timings
+
+def summarize(runs):
+    report = {'runs': len(runs), 'phases': {}}
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        report['phases'][phase] = {
+            'p50_ms': round(percentile(values, 0.50), 2),
+            'p95_ms': round(percentile(values, 0.95), 2),
+            'max_ms': round(max(values), 2)
+        }
+    return report
+
+def print_report(report):
+    print(f"\n{report['runs']} cold starts\n")
+    print(f"{'phase':20} {'p50':>10} {'p95':>10} {'max':>10}")
+    for phase, entry in report['phases'].items():
+        print(f"{phase:20} {entry['p50_ms']:>8.1f}ms {entry['p95_ms']:>8.1f}ms {entry['max_ms']:>8.1f}ms")
+
+def compare(report, baseline, tolerance):
+    """Return a list of phases whose median regressed relative to baseline"""
+    regressions = []
+    for phase, base in baseline['phases'].items():
+        entry = report['phases'].get(phase)
+        if entry is not None and entry['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{phase}: p50 {base['p50_ms']}ms -> {entry['p50_ms']}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker cold-start time')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p50 regression (fraction)')
+    parser.add_argument('--max-ms', type=float, help='fail if the median time to first response exceeds this')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='autoquizer-cold-')
+    env = dict(os.environ)
+    env['GAME_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'cold_start.db')}"
+    env['EVENT_LOG_DIR'] = os.path.join(workdir, 'events')
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+
+    prepare_database(env)
+    runs = [run_worker(env) for _ in range(args.runs)]
+    report = summarize(runs)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nReport written to {args.output}')
+
+    failures = []
+    if args.compare:
+        with open(args.compare) as f:
+            failures.extend(compare(report, json.load(f), args.tolerance))
+    if args.max_ms is not None and report['phases']['ready_ms']['p50_ms'] > args.max_ms:
+        failures.append(f"ready_ms: p50 {report['phases']['ready_ms']['p50_ms']}ms exceeds {args.max_ms}ms")
+    if failures:
+        print('\nRegressions:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
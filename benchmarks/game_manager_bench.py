@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the game state machine.
+
+Times GameManager.start_round, start_question, advance_question,
+close_question and answer grading, plus the admin, team and spectator status
+payloads, against an in-memory SQLite database seeded with a synthetic
+catalog and teams. Each operation runs inside a transaction that is rolled
+back, so every repetition sees the same state; close_question commits, so
+its game is rebuilt before each repetition, outside the timing.
+
+Catalog size is scaled with a few teams and team count with a small
+catalog, so each axis shows its own growth:
+
+    python benchmarks/game_manager_bench.py --output game_manager.json
+    python benchmarks/game_manager_bench.py --check
+    python benchmarks/game_manager_bench.py --logos 10,1000,100000 --teams 10,1000,10000
+
+--check compares against benchmarks/game_manager_baseline.json (or
+--compare PATH) and exits non-zero when an operation issues more SQL
+statements than its baseline. Query counts are exact on any machine, so
+this is safe as a review gate anywhere. --timing also fails on a median
+time regressed beyond --tolerance; times only compare with a baseline
+recorded on similar hardware, so re-record it with --output first.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set before app.py is imported: an in-memory database and no event log files
+os.environ['GAME_DATABASE_URL'] = 'sqlite://'
+os.environ['EVENT_LOG_ENABLED'] = '0'
+logging.disable(logging.CRITICAL)
+
+from sqlalchemy import select, insert, delete
+from load_test import percentile
+from app import (create_app, game_manager, admin_status_payload, team_status_frame,
+                 team_status_from_frame, spectator_payload)
+from models import db, Team, Logo, Game, Guess, GameTeam, Answer, QuestionResult
+from sql_profiler import sql_profiler
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_manager_baseline.json')
+
+DEFAULT_LOGOS = (10, 1000, 100000)
+DEFAULT_TEAMS = (10, 1000, 10000)
+
+# Size of the other axis while one is scaled
+FIXED_LOGOS = 10
+FIXED_TEAMS = 10
+
+# Questions already played when the benchmarked question starts (at most half the catalog)
+PLAYED_QUESTIONS = 100
+
+def seed(logo_count, team_count):
+    """Fresh schema with logo_count logos and team_count teams"""
+    db.drop_all()
+    db.create_all()
+    now = datetime.utcnow()
+    db.session.execute(insert(Logo), [
+        {
+            'name': f'Logo {index}',
+            'image_url': f'/static/logos/{index}.png',
+            'correct_answer': f'brand {index}',
+            'alternative_answers': json.dumps([f'brand{index}', f'brand {index} motors']),
+            'created_at': now
+        }
+        for index in range(logo_count)
+    ])
+    db.session.execute(insert(Team), [
+        {'name': f'team {index}', 'members': json.dumps(['a', 'b']), 'score': index % 7, 'created_at': now}
+        for index in range(team_count)
+    ])
+    db.session.commit()
+
+def new_game(logo_count, guessed_share=0.5):
+    """An active game with every team enrolled, some questions played and a share of teams answered"""
+    played = min(PLAYED_QUESTIONS, logo_count // 2)
+    game = Game(
+        status='active',
+        current_round=1,
+        total_rounds=1,
+        current_question=played + 1,
+        questions_per_round=logo_count,
+        current_logo_id=logo_count,
+        round_start_time=datetime.utcnow(),
+        used_logo_ids=json.dumps(list(range(1, played + 1)) + [logo_count]),
+        created_at=datetime.utcnow()
+    )
+    db.session.add(game)
+    db.session.flush()
+
+    team_ids = db.session.scalars(select(Team.id)).all()
+    now = datetime.utcnow()
+    db.session.execute(insert(GameTeam), [
+        {'game_id': game.id, 'team_id': team_id, 'joined_at': now} for team_id in team_ids
+    ])
+    guessed = team_ids[:int(len(team_ids) * guessed_share)]
+    if guessed:
+        answer_id = game_manager.answers.lookup(game.id, 'brand 1')
+        db.session.execute(insert(Guess), [
+            {
+                'team_id': team_id, 'game_id': game.id, 'round_number': 1, 'logo_id': game.current_logo_id,
+                'question_number': game.current_question, 'answer_id': answer_id, 'is_placeholder': False,
+                'is_correct': False, 'timestamp': now
+            }
+            for team_id in guessed
+        ])
+    db.session.commit()
+    return game
+
+def clear_games():
+    # SQLite reuses the ids of deleted games, so nothing cached for them may survive
+    for game_id in db.session.scalars(select(Game.id)).all():
+        game_manager.answers.discard_game(game_id)
+        game_manager.analytics.discard_game(game_id)
+    for model in (Guess, QuestionResult, GameTeam, Answer, Game):
+        db.session.execute(delete(model))
+    db.session.commit()
+    db.session.expunge_all()
+
+def measure(operation, repeat, setup=None):
+    """Median and fastest time and SQL statements of operation over repeat runs"""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        with sql_profiler.capture() as capture:
+            started = time.perf_counter()
+            operation(argument)
+            elapsed = time.perf_counter() - started
+        db.session.rollback()
+        timings.append(elapsed * 1000)
+        queries = max(queries, capture.count)
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'min_ms': round(min(timings), 3),
+        'queries': queries
+    }
+
+def bench_state_machine(logo_count, repeat):
+    """Operations whose cost follows the catalog and the questions played"""
+    results = {}
+    game = new_game(logo_count, guessed_share=0)
+    game_id = game.id
+
+    def fresh_game(_=None):
+        return db.session.get(Game, game_id)
+
+    def start_round(game):
+        game.current_question = 1
+        game_manager.start_round(game)
+
+    results['start_round'] = measure(start_round, repeat, fresh_game)
+    results['start_question'] = measure(game_manager.start_question, repeat, fresh_game)
+    results['advance_question'] = measure(game_manager.advance_question, repeat, fresh_game)
+
+    # Grading is pure Python; a detached logo keeps attribute loads out of the timing
+    logo = Logo(correct_answer='Brand 1', alternative_answers=json.dumps(['brand1', 'Brand 1 Motors']))
+    guesses = [f'brand {index}' for index in range(98)] + ['brand1', 'nope']
+    results['grade_100_guesses'] = measure(
+        lambda logo: [game_manager.grade(logo, guess) for guess in guesses], repeat, lambda: logo
+    )
+    clear_games()
+    return results
+
+def bench_close(logo_count, repeat):
+    """close_question commits, so each run gets a freshly built game"""
+    def setup():
+        clear_games()
+        return new_game(logo_count)
+
+    result = measure(game_manager.close_question, repeat, setup)
+    clear_games()
+    return result
+
+def bench_status(logo_count, repeat):
+    """Status payloads as built once per state version"""
+    results = {}
+    game = new_game(logo_count)
+    team_id = db.session.scalar(select(Team.id).limit(1))
+    results['admin_status_payload'] = measure(lambda _: admin_status_payload(), repeat)
+    results['admin_status_summary'] = measure(lambda _: admin_status_payload(summary=True), repeat)
+    results['team_status_frame'] = measure(lambda _: team_status_from_frame(team_status_frame(), team_id), repeat)
+    results['spectator_payload'] = measure(lambda _: spectator_payload(), repeat)
+    clear_games()
+    return results
+
+def run(logo_sizes, team_counts, repeat):
+    """Results keyed by operation[logos=..,teams=..]"""
+    cases = [(logos, FIXED_TEAMS) for logos in logo_sizes]
+    cases += [(FIXED_LOGOS, teams) for teams in team_counts if (FIXED_LOGOS, teams) not in cases]
+    report = {'repeat': repeat, 'results': {}}
+    for logo_count, team_count in cases:
+        started = time.perf_counter()
+        seed(logo_count, team_count)
+        results = {}
+        if team_count == FIXED_TEAMS:
+            results.update(bench_state_machine(logo_count, repeat))
+        if logo_count == FIXED_LOGOS:
+            results['close_question'] = bench_close(logo_count, repeat)
+        results.update(bench_status(logo_count, repeat))
+        for name, result in results.items():
+            report['results'][f'{name}[logos={logo_count},teams={team_count}]'] = result
+        print(f'logos={logo_count} teams={team_count}: {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    return report
+
+def print_report(report):
+    print(f"\n{'operation':58} {'p50':>11} {'min':>11} {'queries':>8}")
+    for name, entry in report['results'].items():
+        print(f"{name:58} {entry['p50_ms']:>9.3f}ms {entry['min_ms']:>9.3f}ms {entry['queries']:>8}")
+
+def compare(report, baseline, tolerance, min_ms, timing=False):
+    """Operations that issue more queries than the baseline, or with timing, whose median regressed"""
+    regressions = []
+    for name, base in baseline['results'].items():
+        entry = report['results'].get(name)
+        if entry is None:
+            continue
+        if entry['queries'] > base['queries']:
+            regressions.append(f"{name}: {base['queries']} -> {entry['queries']} queries")
+        # Sub-millisecond timings are mostly noise; only slower operations are held to the tolerance
+        if timing and entry['p50_ms'] > max(base['p50_ms'] * (1 + tolerance), base['p50_ms'] + min_ms):
+            regressions.append(f"{name}: p50 {base['p50_ms']}ms -> {entry['p50_ms']}ms")
+    return regressions
+
+def sizes(value):
+    return tuple(int(size) for size in value.split(',') if size)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GameManager operations and status payloads')
+    parser.add_argument('--logos', type=sizes, default=DEFAULT_LOGOS, help='catalog sizes, comma separated')
+    parser.add_argument('--teams', type=sizes, default=DEFAULT_TEAMS, help='team counts, comma separated')
+    parser.add_argument('--repeat', type=int, default=7, help='runs per operation')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--check', action='store_true', help=f'compare against {os.path.relpath(DEFAULT_BASELINE, ROOT)}')
+    parser.add_argument('--timing', action='store_true', help='also fail on p50 regressions (same hardware only)')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p50 regression (fraction) with --timing')
+    parser.add_argument('--min-ms', type=float, default=1.0, help='ignore p50 regressions smaller than this')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        report = run(args.logos, args.teams, args.repeat)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nReport written to {args.output}')
+
+    baseline_path = args.compare or (DEFAULT_BASELINE if args.check else None)
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_ms, args.timing)
+        if regressions:
+            print('\nRegressions:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'\nNo regressions against {baseline_path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
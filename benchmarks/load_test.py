@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Load test for the Car Logo Guessing Game.
+
+Starts the app on a local port against a scratch SQLite database (or targets
+an already running server with --url) and simulates N teams behaving like
+static/js/team.js: register, poll /api/status with the team token (plus the leaderboard
+fetch of /api/spectator/status) and submit one guess per question in a burst
+right after the question starts. An admin client starts the game and drives
+/api/admin/next_question at the same time.
+
+Reports p50/p95/p99 latency per endpoint, throughput, error rates and, for
+the in-process server, SQL queries per request. With --seed the team
+behaviour and logo order are reproducible; --output writes the results as
+JSON and --compare checks them against a previous run.
+
+    python benchmarks/load_test.py --teams 200 --questions 5 --seed 42 --output before.json
+    python benchmarks/load_test.py --teams 200 --questions 5 --seed 42 --compare before.json
+
+--asgi serves the app through asgi.py (uvicorn) instead of the threaded
+WSGI server. --idle-connections N additionally holds N spectator status streams
+open on one asyncio loop for the whole run and reports how many stayed
+connected and how long each state change took to reach all of them. For
+10k+ connections run the server in its own process (uvicorn asgi:app) and
+point --url at it; the client raises its open-file limit as far as allowed.
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --teams 50 --idle-connections 10000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlsplit, quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class Recorder:
+    """Thread-safe collection of request timings per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, endpoint, elapsed, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+class Client:
+    """Keep-alive HTTP client that records every request"""
+
+    def __init__(self, base_url, recorder):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.recorder = recorder
+        self.cookie = None
+        self.connection = None
+
+    def request(self, endpoint, method, path, payload=None, headers=None, expected=()):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = dict(headers or {})
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        started = time.perf_counter()
+        status, data = 0, None
+        for attempt in range(2):
+            try:
+                if self.connection is None:
+                    self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                raw = response.read()
+                status = response.status
+                cookie = response.getheader('Set-Cookie')
+                if cookie:
+                    self.cookie = cookie.split(';', 1)[0]
+                try:
+                    data = json.loads(raw) if raw else None
+                except ValueError:
+                    data = None
+                break
+            except (http.client.HTTPException, OSError):
+                # Stale keep-alive connection, reconnect once
+                self.close()
+                status = 0
+        elapsed = time.perf_counter() - started
+        # Any 4xx (429s included) is a failure unless the caller expects it as a game-level outcome
+        self.recorder.add(endpoint, elapsed, 0 < status < 400 or status in expected)
+        return status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+class SimulatedTeam(threading.Thread):
+    """One team polling and guessing the way team.js does"""
+
+    def __init__(self, index, args, base_url, recorder, stop_event, seed, answers):
+        super().__init__(daemon=True)
+        self.name_ = f'Load Team {index:05d}'
+        self.args = args
+        self.client = Client(base_url, recorder)
+        self.stop_event = stop_event
+        self.rng = random.Random(seed)
+        self.guessed = set()
+        self.answers = answers
+        self.token = None
+        self.registered = threading.Event()
+
+    def headers(self):
+        return {'X-Team-Token': self.token} if self.token else {}
+
+    def register(self):
+        status, data = self.client.request('POST /api/register_team', 'POST', '/api/register_team', {
+            'team_name': self.name_,
+            'members': [f'Player {n}' for n in range(self.rng.randint(1, 4))]
+        }, expected=(400,))
+        self.token = (data or {}).get('team_token')
+        return status == 200 or (data or {}).get('error') == 'Team name already exists'
+
+    def run(self):
+        if not self.register():
+            return
+        self.registered.set()
+        # Spread the first poll like real page loads
+        self.stop_event.wait(self.rng.uniform(0, self.args.poll_interval))
+        while not self.stop_event.is_set():
+            if self.token:
+                status, data = self.client.request('GET /api/status', 'GET', '/api/status', headers=self.headers())
+            else:
+                status, data = self.client.request(
+                    'GET /api/status/<team>', 'GET', f'/api/status/{quote(self.name_)}'
+                )
+            if data and data.get('team_token'):
+                self.token = data['team_token']
+            if not self.args.no_leaderboard:
+                self.client.request('GET /api/spectator/status', 'GET', '/api/spectator/status')
+
+            if status == 200 and data and data.get('round_active') and not data.get('has_guessed'):
+                question = (data.get('current_round'), data.get('current_question'))
+                if question not in self.guessed:
+                    self.guessed.add(question)
+                    # Burst: most teams answer within the first couple of seconds
+                    self.stop_event.wait(self.rng.uniform(0, self.args.burst_window))
+                    correct = self.rng.random() < self.args.accuracy
+                    self.client.request('POST /api/submit_guess', 'POST', '/api/submit_guess', {
+                        'team_name': self.name_,
+                        'guess': self.answers.get(question, 'toyota') if correct else f'wrong {self.rng.randint(0, 9)}'
+                    }, headers=self.headers(), expected=(409,))
+                    continue
+            self.stop_event.wait(self.args.poll_interval)
+        self.client.close()
+
+def read_game(client, answers):
+    """Admin view of the running game; shares its current answer with the simulated teams"""
+    status, data = client.request('GET /api/admin/status', 'GET', '/api/admin/status')
+    game = (data or {}).get('game') or {}
+    current_logo = game.get('current_logo') or {}
+    if current_logo.get('correct_answer'):
+        # Teams only see what team.js sees; the answer lets a share of them be right
+        answers[(game.get('current_round'), game.get('current_question'))] = current_logo['correct_answer']
+    return game
+
+def run_admin(args, base_url, recorder, stop_event, answers):
+    """Start the game and advance questions on a fixed schedule"""
+    client = Client(base_url, recorder)
+    status, data = client.request('POST /api/admin/start_game', 'POST', '/api/admin/start_game')
+    if status != 200:
+        print(f'Failed to start game: {status} {data}')
+        stop_event.set()
+        return
+    game = read_game(client, answers)
+    for _ in range(args.questions):
+        if stop_event.wait(args.question_time):
+            break
+        status, data = client.request('POST /api/admin/next_question', 'POST', '/api/admin/next_question', {
+            'round': game.get('current_round'),
+            'question': game.get('current_question')
+        })
+        if (data or {}).get('game_finished'):
+            break
+        game = read_game(client, answers)
+    client.request('POST /api/admin/stop_game', 'POST', '/api/admin/stop_game')
+    stop_event.set()
+    client.close()
+
+class IdleConnections(threading.Thread):
+    """Holds many open status streams on one asyncio loop and records when each event arrives"""
+
+    def __init__(self, count, base_url, path='/api/stream/spectator', batch=500):
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.count = count
+        self.path = path
+        self.batch = batch
+        self.connect_latencies = []
+        self.failures = 0
+        self.dropped = 0
+        self.arrivals = {}
+        self.events = 0
+        self.ready = threading.Event()
+        self._loop = None
+        self._closing = None
+
+    async def _connect(self):
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), 30)
+            writer.write(
+                f'GET {self.path} HTTP/1.1\r\nHost: {self.host}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+            )
+            status = await asyncio.wait_for(reader.readline(), 30)
+            if b' 200 ' not in status:
+                raise ConnectionError(status)
+            while (await reader.readline()) not in (b'\r\n', b''):
+                pass
+        except (OSError, asyncio.TimeoutError, ConnectionError):
+            self.failures += 1
+            return None
+        self.connect_latencies.append(time.perf_counter() - started)
+        return reader, writer
+
+    async def _listen(self, reader):
+        # Chunk-size lines of the chunked encoding are skipped; events arrive one per chunk
+        while True:
+            line = await reader.readline()
+            if not line:
+                if not self._closing.is_set():
+                    self.dropped += 1
+                return
+            if line.startswith(b'id: '):
+                self.arrivals.setdefault(int(line[4:]), []).append(time.perf_counter())
+                self.events += 1
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._closing = asyncio.Event()
+        connections = []
+        for offset in range(0, self.count, self.batch):
+            opened = await asyncio.gather(*(self._connect() for _ in range(min(self.batch, self.count - offset))))
+            connections.extend(connection for connection in opened if connection)
+        listeners = [asyncio.ensure_future(self._listen(reader)) for reader, _ in connections]
+        self.ready.set()
+        await self._closing.wait()
+        for writer in (writer for _, writer in connections):
+            writer.close()
+        for listener in listeners:
+            listener.cancel()
+
+    def run(self):
+        asyncio.run(self._main())
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._closing.set)
+        self.join(30)
+
+    def summary(self):
+        # How long one state change took from the first to the last connection that saw it
+        spreads = [max(times) - min(times) for times in self.arrivals.values() if len(times) > 1]
+        opened = len(self.connect_latencies)
+        return {
+            'requested': self.count,
+            'opened': opened,
+            'failed': self.failures,
+            'dropped': self.dropped,
+            'connect_p50_ms': round(percentile(self.connect_latencies, 0.50) * 1000, 2) if opened else None,
+            'connect_p95_ms': round(percentile(self.connect_latencies, 0.95) * 1000, 2) if opened else None,
+            'events_per_connection': round(self.events / opened, 2) if opened else 0,
+            'fanout_p50_ms': round(percentile(spreads, 0.50) * 1000, 2) if spreads else None,
+            'fanout_p95_ms': round(percentile(spreads, 0.95) * 1000, 2) if spreads else None,
+        }
+
+def raise_open_file_limit():
+    """Allow as many sockets as the hard limit permits"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except (ImportError, ValueError, OSError):
+        return None
+
+class ASGIServer:
+    """uvicorn serving asgi.py on a background thread"""
+
+    def __init__(self, asgi_app):
+        import uvicorn
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        self.server_port = probe.getsockname()[1]
+        probe.close()
+        self.server = uvicorn.Server(uvicorn.Config(
+            asgi_app, host='127.0.0.1', port=self.server_port, log_level='warning', backlog=4096
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+
+    def shutdown(self):
+        self.server.should_exit = True
+        self.thread.join(10)
+
+def start_local_server(args, workdir):
+    """Import the app against a scratch database and serve it on a free port"""
+    os.environ['GAME_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'load_test.db')}"
+    os.environ['EVENT_LOG_DIR'] = os.path.join(workdir, 'events')
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    random.seed(args.seed)
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from werkzeug.serving import make_server
+    from sqlalchemy import event
+    from flask import request, has_request_context
+    from app import create_app
+    from models import db
+    import db_setup
+
+    if args.asgi:
+        import asgi
+        app = asgi.app.flask_app
+    else:
+        app = create_app()
+    with app.app_context():
+        db_setup.init_db()
+
+    query_counts = {}
+    lock = threading.Lock()
+
+    def count_query(*_):
+        if has_request_context() and request.url_rule is not None:
+            endpoint = f'{request.method} {request.url_rule.rule}'
+            with lock:
+                query_counts[endpoint] = query_counts.get(endpoint, 0) + 1
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    if args.asgi:
+        server = ASGIServer(asgi.app)
+    else:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', query_counts
+
+# Map client endpoint labels to Flask rules for query attribution
+RULES = {
+    'GET /api/status/<team>': 'GET /api/status/<team_name>',
+}
+
+def summarize(recorder, elapsed, query_counts):
+    """Build the JSON report"""
+    endpoints = {}
+    total = 0
+    total_errors = 0
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        errors = recorder.errors.get(endpoint, 0)
+        total += len(latencies)
+        total_errors += errors
+        entry = {
+            'requests': len(latencies),
+            'error_rate': round(errors / len(latencies), 4),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(max(latencies) * 1000, 2)
+        }
+        if query_counts is not None:
+            queries = query_counts.get(RULES.get(endpoint, endpoint), 0)
+            entry['queries_per_request'] = round(queries / len(latencies), 2)
+        endpoints[endpoint] = entry
+    return {
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1) if elapsed else None,
+        'error_rate': round(total_errors / total, 4) if total else None,
+        'endpoints': endpoints
+    }
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['duration_s']}s "
+          f"({report['throughput_rps']} req/s, error rate {report['error_rate']})\n")
+    print(f"{'endpoint':36} {'reqs':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}")
+    for endpoint, entry in report['endpoints'].items():
+        print(f"{endpoint:36} {entry['requests']:>7} {entry['error_rate'] * 100:>5.1f}% "
+              f"{entry['p50_ms']:>7.1f}ms {entry['p95_ms']:>6.1f}ms {entry['p99_ms']:>6.1f}ms "
+              f"{entry.get('queries_per_request', '-'):>6}")
+    idle = report.get('idle_connections')
+    if idle:
+        print(f"\nIdle streams: {idle['opened']}/{idle['requested']} open, {idle['failed']} failed, "
+              f"{idle['dropped']} dropped; connect p95 {idle['connect_p95_ms']}ms; "
+              f"{idle['events_per_connection']} events each, fan-out p50 {idle['fanout_p50_ms']}ms "
+              f"p95 {idle['fanout_p95_ms']}ms")
+
+def compare(report, baseline, tolerance):
+    """Return a list of regressions of report relative to baseline"""
+    regressions = []
+    for endpoint, base in baseline['endpoints'].items():
+        entry = report['endpoints'].get(endpoint)
+        if entry is None:
+            continue
+        if entry['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {base['p95_ms']}ms -> {entry['p95_ms']}ms")
+        if entry['error_rate'] > base['error_rate'] + 0.001:
+            regressions.append(f"{endpoint}: error rate {base['error_rate']} -> {entry['error_rate']}")
+        base_queries = base.get('queries_per_request')
+        queries = entry.get('queries_per_request')
+        if base_queries is not None and queries is not None and queries > base_queries * 1.05 + 0.05:
+            regressions.append(f"{endpoint}: queries/request {base_queries} -> {queries}")
+    base_idle, idle = baseline.get('idle_connections'), report.get('idle_connections')
+    if base_idle and idle:
+        if idle['opened'] < base_idle['opened']:
+            regressions.append(f"idle streams opened {base_idle['opened']} -> {idle['opened']}")
+        if base_idle['fanout_p95_ms'] and idle['fanout_p95_ms'] and \
+                idle['fanout_p95_ms'] > base_idle['fanout_p95_ms'] * (1 + tolerance):
+            regressions.append(f"idle stream fan-out p95 {base_idle['fanout_p95_ms']}ms -> {idle['fanout_p95_ms']}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate many teams playing one game')
+    parser.add_argument('--teams', type=int, default=100)
+    parser.add_argument('--questions', type=int, default=5, help='questions the admin plays before stopping')
+    parser.add_argument('--question-time', type=float, default=5.0, help='seconds before the admin advances')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='team status poll interval (team.js: 2s while a question is open)')
+    parser.add_argument('--burst-window', type=float, default=1.0, help='guesses arrive within this many seconds')
+    parser.add_argument('--accuracy', type=float, default=0.5)
+    parser.add_argument('--no-leaderboard', action='store_true', help='skip the /api/spectator/status leaderboard fetch')
+    parser.add_argument('--seed', type=int, default=1, help='fixed seed for reproducible regression runs')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--asgi', action='store_true', help='serve the in-process app through asgi.py (uvicorn)')
+    parser.add_argument('--idle-connections', type=int, default=0, help='hold this many status streams open')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 regression (fraction)')
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    query_counts = None
+    server = None
+    workdir = tempfile.mkdtemp(prefix='autoquizer-load-')
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server, base_url, query_counts = start_local_server(args, workdir)
+
+    idle = None
+    if args.idle_connections:
+        limit = raise_open_file_limit()
+        print(f'Opening {args.idle_connections} idle status streams (open file limit {limit})...')
+        idle = IdleConnections(args.idle_connections, base_url)
+        idle.start()
+        idle.ready.wait()
+
+    stop_event = threading.Event()
+    # Current answer per (round, question), published by the admin client
+    answers = {}
+    teams = [
+        SimulatedTeam(index, args, base_url, recorder, stop_event, args.seed * 100003 + index, answers)
+        for index in range(args.teams)
+    ]
+    print(f'Registering {args.teams} teams against {base_url}...')
+    started = time.perf_counter()
+    for team in teams:
+        team.start()
+    for team in teams:
+        team.registered.wait(30)
+
+    admin = threading.Thread(target=run_admin, args=(args, base_url, recorder, stop_event, answers), daemon=True)
+    admin.start()
+    admin.join()
+    for team in teams:
+        team.join(10)
+    elapsed = time.perf_counter() - started
+
+    if idle is not None:
+        idle.stop()
+    if server is not None:
+        server.shutdown()
+
+    report = summarize(recorder, elapsed, query_counts)
+    if idle is not None:
+        report['idle_connections'] = idle.summary()
+    report['config'] = {
+        key: getattr(args, key)
+        for key in ('teams', 'questions', 'question_time', 'poll_interval', 'burst_window', 'accuracy', 'seed',
+                    'idle_connections')
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nReport written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print('\nRegressions against baseline:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print('\nNo regressions against baseline')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+class StateBroadcaster:
+    """Process-wide game state version with change notification.
+
+    Code that changes game state marks the session; once that transaction
+    commits the version is bumped and everything waiting for a newer version
+    is woken, both threads and asyncio stream handlers. Payloads derived from
+    the state are rendered once per version through frame().
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._waiters = set()
+        self._frames = {}
+        self._frame_locks = {}
+        sa_event.listen(Session, 'after_commit', self._after_commit)
+        sa_event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def mark_changed(self, session):
+        """Publish a new version when session's transaction commits"""
+        session.info['game_state_changed'] = True
+
+    def _after_commit(self, session):
+        if session.info.pop('game_state_changed', None):
+            self.publish()
+
+    def _after_rollback(self, session, previous_transaction):
+        session.info.pop('game_state_changed', None)
+
+    def publish(self):
+        """Bump the version and wake every waiter"""
+        with self._lock:
+            self.version += 1
+            version = self.version
+            self._changed.notify_all()
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, version)
+        return version
+
+    def wait(self, since, timeout):
+        """Block the calling thread until the version moves past since or timeout elapses"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != since, timeout)
+            return self.version
+
+    async def wait_async(self, since, timeout):
+        """Wait until the version moves past since or timeout elapses; returns the current version"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            if self.version != since:
+                return self.version
+            self._waiters.add(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return self.version
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def peek(self, name):
+        """The frame for name if one was already built for the current version, else None"""
+        cached = self._frames.get(name)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        return None
+
+    def frame(self, name, build, key=None):
+        """build() once per version and name; later callers for the same version share the result.
+
+        key, when given, replaces the version as what the frame is built for.
+        """
+        key = self.version if key is None else key
+        cached = self._frames.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with self._lock:
+            building = self._frame_locks.setdefault(name, threading.Lock())
+        with building:
+            cached = self._frames.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            value = build()
+            self._frames[name] = (key, value)
+            return value
+
+def _resolve(future, version):
+    if not future.done():
+        future.set_result(version)
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import logging
+import click
+from sqlalchemy import text
+from models import db, Logo, Guess
+from guess_archive import archive_finished_games
+
+logger = logging.getLogger('autoquizer.db')
+
+SAMPLE_LOGOS_PATH = os.path.join('data', 'sample_logos.json')
+
+def _columns(table):
+    result = db.session.execute(text(f"PRAGMA table_info({table})"))
+    return [row[1] for row in result.fetchall()]
+
+def migrate():
+    """Create missing tables and add columns introduced after a table was first created"""
+    db.create_all()
+
+    # Handle database schema migration for new game features
+    try:
+        if 'current_question' not in _columns('game'):
+            # Add new columns for question tracking
+            db.session.execute(text("ALTER TABLE game ADD COLUMN current_question INTEGER DEFAULT 1"))
+            db.session.execute(text("ALTER TABLE game ADD COLUMN questions_per_round INTEGER DEFAULT 10"))
+            db.session.execute(text("ALTER TABLE game ADD COLUMN used_logo_ids TEXT"))
+            db.session.commit()
+            logger.info("Database schema updated with new game features")
+    except Exception as e:
+        logger.warning("Game schema migration skipped: %s", e)
+
+    # Handle database schema migration for new guess tracking features
+    try:
+        if 'logo_id' not in _columns('guess'):
+            # Add new columns for proper guess tracking
+            db.session.execute(text("ALTER TABLE guess ADD COLUMN logo_id INTEGER"))
+            db.session.execute(text("ALTER TABLE guess ADD COLUMN question_number INTEGER"))
+            db.session.execute(text("ALTER TABLE guess ADD COLUMN guess_text TEXT"))
+            db.session.commit()
+            logger.info("Database schema updated with new guess tracking features")
+    except Exception as e:
+        logger.warning("Guess schema migration skipped: %s", e)
+
+    # Handle database schema migration for per-question analytics
+    try:
+        if 'latency_histogram' not in _columns('question_result'):
+            db.session.execute(text("ALTER TABLE question_result ADD COLUMN avg_latency_ms INTEGER"))
+            db.session.execute(text("ALTER TABLE question_result ADD COLUMN top_wrong_answers TEXT"))
+            db.session.execute(text("ALTER TABLE question_result ADD COLUMN latency_histogram TEXT"))
+            db.session.commit()
+            logger.info("Database schema updated with question analytics")
+    except Exception as e:
+        logger.warning("Question result schema migration skipped: %s", e)
+
+    # Handle database schema migration for dictionary-encoded answers
+    try:
+        migrate_guess_answers()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("Guess answer migration skipped: %s", e)
+
+    # Handle database schema migration for keyset-paginated guess history
+    try:
+        for index in Guess.__table__.indexes:
+            index.create(db.session.connection(), checkfirst=True)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("Guess index migration skipped: %s", e)
+
+# Words the removed submit_dummy_answers_for_missing_teams wrote for teams that did not guess
+LEGACY_DUMMY_ANSWERS = (
+    "apple", "banana", "orange", "purple", "green", "blue", "red", "yellow",
+    "cat", "dog", "bird", "fish", "tree", "flower", "house", "car",
+    "book", "pen", "table", "chair", "window", "door", "water", "fire",
+    "moon", "star", "sun", "cloud", "rain", "snow", "wind", "earth",
+    "music", "dance", "sing", "play", "run", "walk", "jump", "swim",
+    "happy", "sad", "good", "bad", "big", "small", "fast", "slow"
+)
+
+# Legacy guess rows with their answer text and whether they were a placeholder.
+# Placeholders were written with random words, stamped with the question's
+# close time; rows from before guess_text existed keep it in guess as "<text>_<logo_id>".
+# Questions closed before question_result existed have no close time to match, so
+# there a wrong answer that is one of the dummy words is taken to be a placeholder
+# (a heuristic: a team that really answered one of them is flagged too).
+_LEGACY_GUESSES = f"""
+    SELECT id, team_id, game_id, round_number, logo_id, question_number, is_correct, timestamp, text,
+           NOT COALESCE(is_correct, 0) AND (
+               EXISTS (
+                   SELECT 1 FROM question_result r
+                   WHERE r.game_id = g.game_id AND r.round_number = g.round_number
+                     AND r.question_number = g.question_number AND r.closed_at = g.timestamp
+               )
+               OR NOT EXISTS (
+                   SELECT 1 FROM question_result r
+                   WHERE r.game_id = g.game_id AND r.round_number = g.round_number
+                     AND r.question_number = g.question_number
+               ) AND text IN ({', '.join(f"'{word}'" for word in LEGACY_DUMMY_ANSWERS)})
+           ) AS placeholder
+    FROM (
+        SELECT *, COALESCE(guess_text, substr(guess, 1, length(guess) - length('_' || logo_id))) AS text
+        FROM guess_legacy
+    ) g
+"""
+
+def migrate_guess_answers():
+    """Rebuild the guess table with dictionary-encoded answers.
+
+    Moves guess_text into per-game answer rows referenced by answer_id,
+    turns placeholder rows into is_placeholder with no answer and drops the
+    legacy guess column. SQLite cannot drop columns in place, so the table
+    is renamed, recreated from the model and copied over in one transaction.
+    """
+    if 'guess_text' not in _columns('guess'):
+        return False
+    connection = db.session.connection()
+    # pysqlite only opens a transaction before DML; open it now so the DDL is undone with the copy on failure
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+    connection.execute(text("ALTER TABLE guess RENAME TO guess_legacy"))
+    Guess.__table__.create(connection)
+    connection.execute(text(f"""
+        INSERT OR IGNORE INTO answer (game_id, text)
+        SELECT DISTINCT game_id, text FROM ({_LEGACY_GUESSES})
+        WHERE NOT placeholder AND text IS NOT NULL
+    """))
+    copied = connection.execute(text(f"""
+        INSERT INTO guess (id, team_id, game_id, round_number, logo_id, question_number,
+                           answer_id, is_placeholder, is_correct, timestamp)
+        SELECT l.id, l.team_id, l.game_id, l.round_number, l.logo_id, l.question_number,
+               CASE WHEN l.placeholder THEN NULL ELSE a.id END, l.placeholder, l.is_correct, l.timestamp
+        FROM ({_LEGACY_GUESSES}) l
+        LEFT JOIN answer a ON a.game_id = l.game_id AND a.text = l.text
+    """)).rowcount
+    connection.execute(text("DROP TABLE guess_legacy"))
+    db.session.commit()
+    logger.info("Guess table rebuilt with dictionary-encoded answers (%s rows)", copied)
+    return True
+
+def seed_logos(path=SAMPLE_LOGOS_PATH):
+    """Load sample logos if the catalog is empty; returns the number loaded"""
+    try:
+        if Logo.query.count():
+            return 0
+        try:
+            with open(path, 'r') as f:
+                sample_logos = json.load(f)
+        except FileNotFoundError:
+            logger.warning("Sample logos file not found, starting with empty logo database")
+            return 0
+        for logo_data in sample_logos:
+            db.session.add(Logo(
+                name=logo_data['name'],
+                image_url=logo_data['image_url'],
+                correct_answer=logo_data['correct_answer'],
+                alternative_answers=json.dumps(logo_data.get('alternative_answers', []))
+            ))
+        db.session.commit()
+        logger.info("Loaded %s sample logos", len(sample_logos))
+        return len(sample_logos)
+    except Exception as e:
+        logger.warning("Could not seed sample logos: %s", e)
+        db.session.rollback()
+        return 0
+
+def archive_stale_games():
+    """Archive guesses left behind by games that finished before archival existed"""
+    try:
+        archived = archive_finished_games()
+        if archived:
+            db.session.commit()
+        return archived
+    except Exception as e:
+        logger.warning("Guess archival skipped: %s", e)
+        db.session.rollback()
+        return 0
+
+def init_db(seed=True):
+    """Bring the database up to date. Safe to run repeatedly; needs an app context"""
+    migrate()
+    seeded = seed_logos() if seed else 0
+    archived = archive_stale_games()
+    return {'logos_seeded': seeded, 'games_archived': archived}
+
+def register_commands(app):
+    """Add `flask init-db` to the app's CLI"""
+
+    @app.cli.command('init-db')
+    @click.option('--no-seed', is_flag=True, help='Do not load the sample logo catalog')
+    def init_db_command(no_seed):
+        """Create and migrate tables, seed sample logos and archive finished games"""
+        started = time.perf_counter()
+        result = init_db(seed=not no_seed)
+        click.echo(
+            f"Database ready in {(time.perf_counter() - started) * 1000:.0f} ms: "
+            f"{result['logos_seeded']} logos seeded, {result['games_archived']} games archived"
+        )
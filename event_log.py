@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('autoquizer.events')
+
+# fsync policies: every append, at most once per interval, or leave it to the OS
+FSYNC_ALWAYS = 'always'
+FSYNC_INTERVAL = 'interval'
+FSYNC_NEVER = 'never'
+
+def epoch_ms(timestamp=None):
+    """Convert a naive UTC datetime (default: now) to integer epoch milliseconds"""
+    if timestamp is None:
+        timestamp = datetime.utcnow()
+    return int((timestamp - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+def empty_state(game_id):
+    """State of a game before any event has been applied"""
+    return {
+        'game_id': game_id,
+        'status': 'waiting',
+        'current_round': 1,
+        'total_rounds': 1,
+        'current_question': 1,
+        'questions_per_round': 10,
+        'current_logo_id': None,
+        'round_start_ms': None,
+        'used_logo_ids': [],
+        'scores': {},
+        'open_guesses': [],
+        'events': 0
+    }
+
+def apply_event(state, event):
+    """Fold one event into the game state.
+
+    Pure function of (state, event) so replaying a log always produces the
+    same sequence of states.
+    """
+    kind = event['type']
+    scores = state['scores']
+
+    if kind == 'round_started':
+        state.update(
+            status='active',
+            current_round=event['round'],
+            total_rounds=event['total_rounds'],
+            questions_per_round=event['questions_per_round']
+        )
+    elif kind == 'teams_enrolled':
+        for team_id in event['team_ids']:
+            scores.setdefault(str(team_id), 0)
+    elif kind == 'question_started':
+        state.update(
+            current_round=event['round'],
+            current_question=event['question'],
+            current_logo_id=event['logo_id'],
+            round_start_ms=event['t'],
+            used_logo_ids=event['used_logo_ids'],
+            open_guesses=[]
+        )
+    elif kind == 'guess':
+        team_key = str(event['team_id'])
+        scores.setdefault(team_key, 0)
+        if event['correct']:
+            scores[team_key] += 1
+        state['open_guesses'].append([event['team_id'], event['text'], event['correct'], event['t']])
+    elif kind == 'question_closed':
+        state['open_guesses'] = []
+    elif kind == 'game_finished':
+        state.update(status='finished', current_logo_id=None, round_start_ms=None, open_guesses=[])
+
+    state['events'] += 1
+    return state
+
+class GameEventLog:
+    """Append-only per-game JSONL event log with periodic state snapshots"""
+
+    def __init__(self, directory, fsync=FSYNC_INTERVAL, fsync_interval=1.0, snapshot_every=500):
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._files = {}
+        self._appended = {}
+        self._last_fsync = 0.0
+
+    @classmethod
+    def from_env(cls, default_directory):
+        """Build a log from EVENT_LOG_* environment variables"""
+        return cls(
+            os.environ.get('EVENT_LOG_DIR', default_directory),
+            fsync=os.environ.get('EVENT_LOG_FSYNC', FSYNC_INTERVAL),
+            fsync_interval=float(os.environ.get('EVENT_LOG_FSYNC_INTERVAL', '1.0')),
+            snapshot_every=int(os.environ.get('EVENT_LOG_SNAPSHOT_EVERY', '500'))
+        )
+
+    def log_path(self, game_id):
+        return os.path.join(self.directory, f'game-{game_id}.jsonl')
+
+    def snapshot_path(self, game_id):
+        return os.path.join(self.directory, f'game-{game_id}.snapshot.json')
+
+    def _file(self, game_id):
+        handle = self._files.get(game_id)
+        if handle is None:
+            os.makedirs(self.directory, exist_ok=True)
+            handle = self._files[game_id] = open(self.log_path(game_id), 'ab')
+        return handle
+
+    def append(self, game_id, events):
+        """Append events for a game, honouring the fsync policy"""
+        if not events:
+            return
+        data = b''.join(
+            json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n' for event in events
+        )
+        with self._lock:
+            handle = self._file(game_id)
+            handle.write(data)
+            handle.flush()
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(handle.fileno())
+            elif self.fsync == FSYNC_INTERVAL:
+                now = time.monotonic()
+                if now - self._last_fsync >= self.fsync_interval:
+                    os.fsync(handle.fileno())
+                    self._last_fsync = now
+
+            before = self._appended.get(game_id, 0)
+            self._appended[game_id] = before + len(events)
+            take_snapshot = before // self.snapshot_every != self._appended[game_id] // self.snapshot_every
+
+        if take_snapshot:
+            self.snapshot(game_id)
+
+    def close_game(self, game_id):
+        """Flush and close the log file of a game that has ended"""
+        with self._lock:
+            handle = self._files.pop(game_id, None)
+            self._appended.pop(game_id, None)
+            if handle is not None:
+                handle.flush()
+                if self.fsync != FSYNC_NEVER:
+                    os.fsync(handle.fileno())
+                handle.close()
+
+    def _read_snapshot(self, game_id):
+        try:
+            with open(self.snapshot_path(game_id), 'r') as f:
+                snapshot = json.load(f)
+            return snapshot['state'], snapshot['offset']
+        except (FileNotFoundError, ValueError, KeyError):
+            return empty_state(game_id), 0
+
+    def recover(self, game_id):
+        """Rebuild a game's state from its latest snapshot plus the log tail.
+
+        Returns (state, offset) where offset is the log position folded up to.
+        """
+        state, offset = self._read_snapshot(game_id)
+        try:
+            with open(self.log_path(game_id), 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn write at the end of the log, stop before it
+                        break
+                    apply_event(state, json.loads(line))
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return state, offset
+
+    def snapshot(self, game_id):
+        """Write the current state of a game so recovery only replays the tail"""
+        state, offset = self.recover(game_id)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.snapshot_path(game_id)
+        # Each process (and thread) writes its own temp file, so concurrent snapshots can't clobber each other
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'offset': offset, 'state': state}, f, separators=(',', ':'))
+            f.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return state
+
+    def replay(self, game_id):
+        """Yield (event, state) for every event of a game from the beginning"""
+        state = empty_state(game_id)
+        with open(self.log_path(game_id), 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                event = json.loads(line)
+                yield event, apply_event(state, event)
+
+    def latest_game_id(self):
+        """Id of the most recent game that has a log in the directory"""
+        game_ids = []
+        try:
+            for name in os.listdir(self.directory):
+                if name.startswith('game-') and name.endswith('.jsonl'):
+                    game_ids.append(int(name[len('game-'):-len('.jsonl')]))
+        except (FileNotFoundError, ValueError):
+            pass
+        return max(game_ids) if game_ids else None
+
+class PendingEvents:
+    """Buffers events on the SQLAlchemy session and writes them only after commit.
+
+    A rolled back transaction (e.g. a losing question close) leaves no trace
+    in the log.
+    """
+
+    def __init__(self, event_log):
+        self.event_log = event_log
+        # Queued under a key of this instance, so another PendingEvents never writes them
+        self._info_key = ('pending_game_events', id(self))
+        sa_event.listen(Session, 'after_commit', self._after_commit)
+        sa_event.listen(Session, 'after_soft_rollback', self._after_rollback)
+
+    def detach(self):
+        """Stop listening to session commits; events queued in open transactions are dropped"""
+        if sa_event.contains(Session, 'after_commit', self._after_commit):
+            sa_event.remove(Session, 'after_commit', self._after_commit)
+            sa_event.remove(Session, 'after_soft_rollback', self._after_rollback)
+
+    def record(self, session, game_id, kind, timestamp=None, **fields):
+        """Queue an event to be appended when the session commits"""
+        event = {'type': kind, 't': epoch_ms(timestamp), **fields}
+        session.info.setdefault(self._info_key, []).append((game_id, event))
+
+    def _after_commit(self, session):
+        pending = session.info.pop(self._info_key, None)
+        if not pending:
+            return
+        try:
+            by_game = {}
+            for game_id, event in pending:
+                by_game.setdefault(game_id, []).append(event)
+            for game_id, events in by_game.items():
+                self.event_log.append(game_id, events)
+                if any(event['type'] == 'game_finished' for event in events):
+                    self.event_log.close_game(game_id)
+        except Exception as e:
+            logger.error("Error writing game events: %s", e)
+
+    def _after_rollback(self, session, previous_transaction):
+        session.info.pop(self._info_key, None)
+
+def main(argv):
+    """Debugging entry point: replay or recover a game from its event log"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Inspect a game event log')
+    parser.add_argument('command', choices=['replay', 'state'])
+    parser.add_argument('game_id', type=int, nargs='?')
+    parser.add_argument('--dir', default=os.environ.get('EVENT_LOG_DIR', os.path.join('instance', 'events')))
+    args = parser.parse_args(argv)
+
+    event_log = GameEventLog(args.dir)
+    game_id = args.game_id if args.game_id is not None else event_log.latest_game_id()
+    if game_id is None:
+        print('No event logs found')
+        return 1
+
+    if args.command == 'replay':
+        for event, state in event_log.replay(game_id):
+            print(json.dumps({
+                'event': event,
+                'status': state['status'],
+                'question': state['current_question'],
+                'logo_id': state['current_logo_id'],
+                'scores': state['scores']
+            }, separators=(',', ':')))
+    else:
+        started = time.perf_counter()
+        state, offset = event_log.recover(game_id)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps(state, indent=2))
+        print(f'Recovered {state["events"]} events up to byte {offset} in {elapsed_ms:.2f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
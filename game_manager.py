@@ -1,23 +1,109 @@
-import random
+import time
 import json
+import logging
+import threading
 from datetime import datetime
-from models import db
+from sqlalchemy import select, insert, literal, exists, and_, func
+from sqlalchemy.exc import IntegrityError
+from models import db, Team, Logo, Game, Guess, GameTeam, QuestionResult
+from guess_archive import archive_game
+from question_analytics import QuestionAnalytics
+from answers import AnswerDictionary
+from event_log import PendingEvents
+from broadcaster import StateBroadcaster
+from metrics import QUESTION_CLOSE_SECONDS, QUESTIONS_CLOSED
+
+logger = logging.getLogger('autoquizer.game')
 
 class GameManager:
     """Manages game logic and flow"""
     
-    def start_round(self, game, logos):
+    def __init__(self, event_log=None):
+        self.analytics = QuestionAnalytics()
+        self.answers = AnswerDictionary()
+        self.broadcaster = StateBroadcaster()
+        self.event_log = None
+        self.events = None
+        self._restored = False
+        self._restore_lock = threading.Lock()
+        if event_log is not None:
+            self.attach_event_log(event_log)
+    
+    def attach_event_log(self, event_log):
+        """Write game events to event_log once their transaction commits"""
+        self.event_log = event_log
+        if self.events is None:
+            self.events = PendingEvents(event_log)
+        else:
+            self.events.event_log = event_log
+    
+    def detach_event_log(self):
+        """Stop writing game events and remove the session listeners"""
+        if self.events is not None:
+            self.events.detach()
+        self.events = None
+        self.event_log = None
+    
+    def discard_game(self, game_id):
+        """Drop the cached answer ids and analytics of a game that has ended"""
+        self.analytics.discard_game(game_id)
+        self.answers.discard_game(game_id)
+    
+    def mark_changed(self):
+        """Wake status streams and waiters once the current transaction commits"""
+        self.broadcaster.mark_changed(db.session)
+    
+    def record_event(self, game, kind, timestamp=None, **fields):
+        """Queue a game event for the event log; written once the transaction commits"""
+        self.mark_changed()
+        if self.events is not None:
+            self.events.record(db.session, game.id, kind, timestamp, **fields)
+    
+    def restore(self, game):
+        """Rebuild in-memory state for a running game from its event log snapshot and tail"""
+        if self.event_log is None:
+            return None
+        state, _ = self.event_log.recover(game.id)
+        # Question numbers restart each round, so the log must be on the same (round, question)
+        logged = (state['current_round'], state['current_question'])
+        if logged == (game.current_round, game.current_question) and state['round_start_ms']:
+            self.analytics.restore(game, state['open_guesses'], state['round_start_ms'])
+        logger.info("Restored game %s from %s logged events", game.id, state['events'])
+        return state
+    
+    def ensure_restored(self):
+        """Restore the running game, if any, the first time this process needs it"""
+        if self._restored:
+            return
+        with self._restore_lock:
+            if self._restored:
+                return
+            try:
+                active_game = Game.query.filter_by(status='active').first()
+                if active_game:
+                    self.restore(active_game)
+            except Exception as e:
+                logger.warning("Game state restore skipped: %s", e)
+            self._restored = True
+    
+    def start_round(self, game):
         """Start a new round with first question"""
         try:
             game.current_question = 1
             game.status = 'active'
-            return self.start_question(game, logos)
+            self.record_event(
+                game, 'round_started',
+                round=game.current_round,
+                total_rounds=game.total_rounds,
+                questions_per_round=game.questions_per_round
+            )
+            return self.start_question(game)
         except Exception as e:
-            print(f"Error starting round: {e}")
+            logger.error("Error starting round: %s", e)
             return None
     
-    def start_question(self, game, logos):
-        """Start a new question with a random logo"""
+    def start_question(self, game):
+        """Start a new question with a random logo not yet used in this game"""
         try:
             # Get used logo IDs from database
             used_logo_ids = []
@@ -27,15 +113,16 @@ class GameManager:
                 except:
                     used_logo_ids = []
             
-            available_logos = [logo for logo in logos if logo.id not in used_logo_ids]
+            # The database picks the logo, so the catalog is never loaded into Python
+            logo_id = self._random_logo_id(used_logo_ids)
             
-            if not available_logos:
+            if logo_id is None:
                 # If all logos have been used, reset and use all logos again
-                available_logos = logos
+                logo_id = self._random_logo_id([])
                 used_logo_ids = []
             
-            if available_logos:
-                selected_logo = random.choice(available_logos)
+            if logo_id is not None:
+                selected_logo = db.session.get(Logo, logo_id)
                 game.current_logo_id = selected_logo.id
                 game.round_start_time = datetime.utcnow()
                 
@@ -43,29 +130,152 @@ class GameManager:
                 used_logo_ids.append(selected_logo.id)
                 game.used_logo_ids = json.dumps(used_logo_ids)
                 
+                self.record_event(
+                    game, 'question_started', game.round_start_time,
+                    round=game.current_round,
+                    question=game.current_question,
+                    logo_id=selected_logo.id,
+                    used_logo_ids=used_logo_ids
+                )
+                
                 return selected_logo
             
         except Exception as e:
-            print(f"Error starting question: {e}")
+            logger.error("Error starting question: %s", e)
             return None
     
-    def advance_question(self, game, logos):
+    def _random_logo_id(self, excluded_ids):
+        """Id of a random logo not in excluded_ids, or None if there is none"""
+        query = select(Logo.id).order_by(func.random()).limit(1)
+        if excluded_ids:
+            query = query.where(Logo.id.not_in(excluded_ids))
+        return db.session.scalar(query)
+    
+    def advance_question(self, game):
         """Advance to next question or complete game"""
         try:
             if game.current_question < game.questions_per_round:
                 # Move to next question in same round
                 game.current_question += 1
-                return self.start_question(game, logos)
+                return self.start_question(game)
             else:
                 # All questions complete - end the game
                 game.status = 'finished'
                 game.current_logo_id = None
                 game.round_start_time = None
+                self.record_event(game, 'game_finished')
                 return None
         except Exception as e:
-            print(f"Error advancing question: {e}")
+            logger.error("Error advancing question: %s", e)
             return None
     
+    def close_question(self, game):
+        """Finalize the current question and advance the game in one transaction.
+
+        Placeholder rows for teams that did not guess, the frozen
+        QuestionResult row and the advance are committed together. Returns
+        True if this call closed the question and False if it was already
+        closed by a concurrent request.
+        """
+        round_number = game.current_round
+        question_number = game.current_question
+        logo_id = game.current_logo_id
+        started = time.perf_counter()
+        
+        try:
+            # Claim the question first; a second closer fails on the unique constraint
+            result = QuestionResult(
+                game_id=game.id,
+                round_number=round_number,
+                question_number=question_number,
+                logo_id=logo_id,
+                closed_at=datetime.utcnow()
+            )
+            db.session.add(result)
+            db.session.flush()
+            
+            # Final stats of the question's guesses, read before placeholders exist
+            stats = self.analytics.freeze(game)
+            
+            # Bulk-insert placeholder rows (no answer, just the flag) for enrolled teams that have not guessed
+            already_guessed = exists().where(and_(
+                Guess.team_id == GameTeam.team_id,
+                Guess.game_id == game.id,
+                Guess.round_number == round_number,
+                Guess.logo_id == logo_id
+            ))
+            missing_teams = (
+                select(
+                    GameTeam.team_id,
+                    literal(game.id),
+                    literal(round_number),
+                    literal(logo_id),
+                    literal(question_number),
+                    literal(True),
+                    literal(False),
+                    literal(result.closed_at)
+                )
+                .join(Team, Team.id == GameTeam.team_id)
+                .where(GameTeam.game_id == game.id, ~already_guessed)
+            )
+            inserted = db.session.execute(
+                insert(Guess).from_select(
+                    ['team_id', 'game_id', 'round_number', 'logo_id', 'question_number',
+                     'is_placeholder', 'is_correct', 'timestamp'],
+                    missing_teams
+                )
+            )
+            
+            # Persist the frozen counters
+            result.correct_count = stats['correct']
+            result.incorrect_count = stats['incorrect']
+            result.missing_count = inserted.rowcount or 0
+            result.avg_latency_ms = stats['avg_latency_ms']
+            result.top_wrong_answers = json.dumps(stats['top_wrong_answers'])
+            result.latency_histogram = json.dumps(stats['latency_histogram'])
+            self.record_event(
+                game, 'question_closed', result.closed_at,
+                round=round_number,
+                question=question_number,
+                placeholders=result.missing_count
+            )
+            
+            self.advance_question(game)
+            finished = game.status == 'finished'
+            if finished:
+                archive_game(game)
+            
+            game_id = game.id
+            db.session.commit()
+            if finished:
+                self.discard_game(game_id)
+            QUESTION_CLOSE_SECONDS.observe(time.perf_counter() - started)
+            QUESTIONS_CLOSED.inc(outcome='closed')
+            logger.info("Closed question %s of game %s: %s correct, %s incorrect, %s placeholders",
+                        question_number, game.id, result.correct_count, result.incorrect_count,
+                        result.missing_count, extra={'close_ms': round((time.perf_counter() - started) * 1000, 2)})
+            return True
+            
+        except IntegrityError:
+            db.session.rollback()
+            QUESTIONS_CLOSED.inc(outcome='already_closed')
+            logger.info("Question %s of game %s was already closed", question_number, game.id)
+            return False
+    
+    def correct_answers(self, logo):
+        """Lowercased answers accepted for a logo"""
+        answers = {logo.correct_answer.lower()}
+        if logo.alternative_answers:
+            try:
+                answers.update(answer.lower() for answer in json.loads(logo.alternative_answers))
+            except:
+                pass
+        return answers
+    
+    def grade(self, logo, guess):
+        """True if a normalized guess is one of the logo's accepted answers"""
+        return guess in self.correct_answers(logo)
+    
     def is_round_expired(self, game):
         """Check if the current round has expired (30 seconds)"""
         if not game.round_start_time:
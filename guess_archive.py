@@ -0,0 +1,119 @@
+import json
+import zlib
+import logging
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Team, Game, Guess, Answer, ArchivedGame, ArchivedQuestion
+from event_log import epoch_ms
+
+logger = logging.getLogger('autoquizer.db')
+
+# Game statuses whose guesses still belong in the live table
+LIVE_STATUSES = ('active', 'round_complete')
+
+def encode_payload(columns):
+    """Serialize guess columns into the compact archive representation"""
+    return zlib.compress(json.dumps(columns, separators=(',', ':')).encode('utf-8'))
+
+def decode_payload(payload):
+    """Expand an archived payload back into one dict per guess"""
+    columns = json.loads(zlib.decompress(payload).decode('utf-8'))
+    base = columns.get('t0') or 0
+    return [
+        {
+            'team_id': team_id,
+            'guess_text': answer,
+            'is_placeholder': answer is None,
+            'is_correct': bool(correct),
+            'timestamp_ms': base + offset
+        }
+        for team_id, answer, correct, offset in zip(
+            columns['team_ids'], columns['answers'], columns['correct'], columns['offsets']
+        )
+    ]
+
+def archive_game(game):
+    """Move a finished game's guesses into per-question archive partitions.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    if db.session.get(ArchivedGame, game.id):
+        return False
+
+    rows = db.session.execute(
+        select(
+            Guess.round_number, Guess.question_number, Guess.logo_id,
+            Guess.team_id, Answer.text, Guess.is_correct, Guess.timestamp
+        )
+        .outerjoin(Answer, Answer.id == Guess.answer_id)
+        .where(Guess.game_id == game.id)
+        .order_by(Guess.round_number, Guess.question_number, Guess.team_id)
+    ).all()
+
+    # Group rows into one columnar partition per question
+    partitions = {}
+    scores = {}
+    for row in rows:
+        key = (row.round_number, row.question_number)
+        columns = partitions.get(key)
+        if columns is None:
+            columns = partitions[key] = {
+                'logo_id': row.logo_id,
+                'team_ids': [], 'answers': [], 'correct': [], 'timestamps': []
+            }
+        columns['team_ids'].append(row.team_id)
+        columns['answers'].append(row.text)
+        columns['correct'].append(1 if row.is_correct else 0)
+        columns['timestamps'].append(epoch_ms(row.timestamp) if row.timestamp else 0)
+        scores[row.team_id] = scores.get(row.team_id, 0) + (1 if row.is_correct else 0)
+
+    for (round_number, question_number), columns in partitions.items():
+        # Store timestamps as offsets from the earliest guess to keep them small
+        timestamps = columns.pop('timestamps')
+        base = min(timestamps)
+        columns['t0'] = base
+        columns['offsets'] = [timestamp - base for timestamp in timestamps]
+        logo_id = columns.pop('logo_id')
+        db.session.add(ArchivedQuestion(
+            game_id=game.id,
+            round_number=round_number,
+            question_number=question_number,
+            logo_id=logo_id,
+            guess_count=len(columns['team_ids']),
+            payload=encode_payload(columns)
+        ))
+
+    # Keep team names with the summary so history survives team removal
+    team_names = {}
+    if scores:
+        team_names = dict(db.session.execute(
+            select(Team.id, Team.name).where(Team.id.in_(scores.keys()))
+        ).all())
+    team_scores = {
+        str(team_id): {'name': team_names.get(team_id), 'score': score}
+        for team_id, score in scores.items()
+    }
+
+    db.session.add(ArchivedGame(
+        game_id=game.id,
+        total_questions=len(partitions),
+        guess_count=len(rows),
+        team_scores=json.dumps(team_scores),
+        archived_at=datetime.utcnow()
+    ))
+
+    Guess.query.filter_by(game_id=game.id).delete(synchronize_session=False)
+    Answer.query.filter_by(game_id=game.id).delete(synchronize_session=False)
+
+    logger.info("Archived %s guesses for game %s into %s partitions", len(rows), game.id, len(partitions))
+    return True
+
+def archive_finished_games():
+    """Archive guesses left in the live table by games that are no longer running"""
+    stale_games = Game.query.filter(
+        Game.id.in_(select(Guess.game_id).distinct()),
+        Game.status.notin_(LIVE_STATUSES)
+    ).all()
+    for game in stale_games:
+        archive_game(game)
+    return len(stale_games)
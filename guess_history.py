@@ -0,0 +1,186 @@
+"""
+Guess history of a game, read page by page.
+
+Guesses are ordered by (round_number, question_number, team_id), the order
+of the ix_guess_game_question index, and pages are addressed by the key of
+their last row (keyset pagination) instead of an offset, so every page is
+an index range scan however deep into the game it starts. Games that have
+been archived are read from their per-question partitions in the same
+order, so clients cannot tell the two apart.
+
+Exports walk the same pages one short query at a time: memory stays flat
+for any number of guesses and no read transaction is held open across a
+download, which with SQLite's rollback journal would stall guess commits.
+"""
+
+import io
+import csv
+import json
+from sqlalchemy import select, tuple_
+from models import db, Team, Logo, Game, Guess, Answer, ArchivedGame, ArchivedQuestion
+from guess_archive import decode_payload
+from event_log import epoch_ms
+from serialization import dumps_bytes
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per query while exporting, and bytes collected before a chunk is sent
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_COLUMNS = (
+    'round_number', 'question_number', 'logo_id', 'logo_name', 'team_id', 'team_name',
+    'guess_text', 'is_correct', 'is_placeholder', 'timestamp_ms'
+)
+
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+def encode_cursor(key):
+    return '.'.join(str(part) for part in key)
+
+def decode_cursor(cursor):
+    """(round_number, question_number, team_id) from a cursor, or None for the first page"""
+    if not cursor:
+        return None
+    parts = cursor.split('.')
+    if len(parts) != 3:
+        raise ValueError('Invalid cursor')
+    return tuple(int(part) for part in parts)
+
+def _live_page(game_id, after, limit, team_id):
+    query = (
+        select(
+            Guess.round_number, Guess.question_number, Guess.logo_id, Logo.name.label('logo_name'),
+            Guess.team_id, Team.name.label('team_name'), Answer.text,
+            Guess.is_correct, Guess.is_placeholder, Guess.timestamp
+        )
+        .outerjoin(Logo, Logo.id == Guess.logo_id)
+        .outerjoin(Team, Team.id == Guess.team_id)
+        .outerjoin(Answer, Answer.id == Guess.answer_id)
+        .where(Guess.game_id == game_id)
+        .order_by(Guess.round_number, Guess.question_number, Guess.team_id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(Guess.round_number, Guess.question_number, Guess.team_id) > after)
+    if team_id is not None:
+        query = query.where(Guess.team_id == team_id)
+    return [
+        {
+            'round_number': row.round_number,
+            'question_number': row.question_number,
+            'logo_id': row.logo_id,
+            'logo_name': row.logo_name,
+            'team_id': row.team_id,
+            'team_name': row.team_name,
+            'guess_text': row.text,
+            'is_correct': bool(row.is_correct),
+            'is_placeholder': bool(row.is_placeholder),
+            'timestamp_ms': epoch_ms(row.timestamp) if row.timestamp else None
+        }
+        for row in db.session.execute(query)
+    ]
+
+def _archived_page(archived, after, limit, team_id, names):
+    query = (
+        select(ArchivedQuestion)
+        .where(ArchivedQuestion.game_id == archived.game_id)
+        .order_by(ArchivedQuestion.round_number, ArchivedQuestion.question_number)
+    )
+    if after is not None:
+        query = query.where(tuple_(ArchivedQuestion.round_number, ArchivedQuestion.question_number) >= after[:2])
+
+    # Partitions are decompressed one at a time and only until the page is full
+    guesses = []
+    for partition in db.session.scalars(query.execution_options(yield_per=1)):
+        logo = db.session.get(Logo, partition.logo_id) if partition.logo_id else None
+        for guess in decode_payload(partition.payload):
+            key = (partition.round_number, partition.question_number, guess['team_id'])
+            if after is not None and key <= after:
+                continue
+            if team_id is not None and guess['team_id'] != team_id:
+                continue
+            guesses.append({
+                'round_number': partition.round_number,
+                'question_number': partition.question_number,
+                'logo_id': partition.logo_id,
+                'logo_name': logo.name if logo else None,
+                'team_name': names.get(str(guess['team_id']), {}).get('name'),
+                **guess
+            })
+            if len(guesses) == limit:
+                return guesses
+    return guesses
+
+def _archived_team_names(archived):
+    # Archived games keep their team names so results survive team removal
+    try:
+        return json.loads(archived.team_scores or '{}')
+    except ValueError:
+        return {}
+
+def guess_page(game_id, after=None, limit=DEFAULT_PAGE_SIZE, team_id=None):
+    """One page of a game's guesses after the key `after`; returns (guesses, next_cursor)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    archived = db.session.get(ArchivedGame, game_id)
+    if archived is not None:
+        guesses = _archived_page(archived, after, limit, team_id, _archived_team_names(archived))
+    else:
+        guesses = _live_page(game_id, after, limit, team_id)
+
+    next_cursor = None
+    if len(guesses) == limit:
+        last = guesses[-1]
+        next_cursor = encode_cursor((last['round_number'], last['question_number'], last['team_id']))
+    return guesses, next_cursor
+
+def iter_guesses(game_id, team_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """Every guess of a game in history order, fetched one keyset page at a time"""
+    after = None
+    while True:
+        guesses, next_cursor = guess_page(game_id, after, batch_size, team_id)
+        yield from guesses
+        # Each page is its own short read; release it before the client takes the next chunk
+        db.session.rollback()
+        if next_cursor is None:
+            return
+        after = decode_cursor(next_cursor)
+
+def _csv_lines(guesses):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for guess in guesses:
+        writer.writerow([guess.get(column) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _ndjson_lines(guesses):
+    for guess in guesses:
+        yield dumps_bytes({column: guess.get(column) for column in EXPORT_COLUMNS}) + b'\n'
+
+def export_chunks(game_id, format, team_id=None, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Byte chunks of a game's results as CSV or NDJSON"""
+    if format not in EXPORT_MIMETYPES:
+        raise ValueError(f'Unknown format {format!r}; use csv or ndjson')
+    lines = (_csv_lines if format == 'csv' else _ndjson_lines)(iter_guesses(game_id, team_id))
+
+    # Collect lines into chunks so a large export is not sent as a million tiny writes
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b''.join(chunk)
+
+def game_exists(game_id):
+    return db.session.get(Game, game_id) is not None or db.session.get(ArchivedGame, game_id) is not None
@@ -0,0 +1,104 @@
+"""
+Idempotency keys for retried requests.
+
+A client sends an Idempotency-Key header (or idempotency_key in the JSON
+body) with a guess and sends the same key again when it retries. The first
+request with a key runs normally and its outcome is kept in memory for a
+few minutes; a retry gets that outcome back without touching the database,
+and a retry that arrives while the first request is still running waits
+for it instead of racing it.
+
+Keys live in one process. A retry that reaches another worker, or arrives
+after the key expired, runs again and gets the duplicate-guess 409.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from flask import request
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 128
+
+def request_idempotency_key():
+    """Idempotency key from the request header, or from the JSON body for simple clients"""
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None and request.is_json:
+        key = (request.get_json(silent=True) or {}).get('idempotency_key')
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        return None
+    return key
+
+class _Entry:
+    __slots__ = ('fingerprint', 'expires', 'done', 'response')
+
+    def __init__(self, fingerprint, expires):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = threading.Event()
+        self.response = None
+
+class IdempotencyCache:
+    """Outcomes of requests by key for ttl seconds, keeping at most max_entries.
+
+    claim() tells the caller whether to run the request; the caller that
+    runs it then calls complete() with the outcome to keep, or release()
+    when the outcome should not be replayed (e.g. a transient error).
+    """
+
+    def __init__(self, ttl=300, max_entries=50000, wait=5.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait = wait
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key, fingerprint):
+        """('new', None) if the caller should run the request, ('replay', response) with the
+        kept outcome, ('mismatch', None) if key was used for a different request, or
+        ('pending', None) if the first request is still running after waiting for it"""
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                self._expire(now)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = _Entry(fingerprint, now + self.ttl)
+                    return 'new', None
+            if entry.fingerprint != fingerprint:
+                return 'mismatch', None
+            if not entry.done.wait(self.wait):
+                return 'pending', None
+            if entry.response is not None:
+                return 'replay', entry.response
+            # The first request ended without an outcome worth keeping; run this one instead
+
+    def complete(self, key, response):
+        """Keep response for retries of key and wake any waiting on it"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            entry.response = response
+            entry.done.set()
+
+    def release(self, key):
+        """Forget key, so the next request with it runs again"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    def _expire(self, now):
+        # Entries are in claim order, so expired ones are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires > now and len(self._entries) < self.max_entries:
+                break
+            self._entries.popitem(last=False)
+            entry.done.set()
+
+    def __len__(self):
+        return len(self._entries)
+
+guess_results = IdempotencyCache(ttl=float(os.environ.get('GUESS_IDEMPOTENCY_TTL', '300')))
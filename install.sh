@@ -65,32 +65,7 @@ export DATABASE_URL="sqlite:///game.db"
 
 # Initialize database and load sample data
 echo "🗄️ Initializing database..."
-python3 -c "
-from app import app, db
-import json
-from models import Logo
-
-with app.app_context():
-    db.create_all()
-    
-    # Load sample logos if none exist
-    if Logo.query.count() == 0:
-        try:
-            with open('data/sample_logos.json', 'r') as f:
-                sample_logos = json.load(f)
-                for logo_data in sample_logos:
-                    logo = Logo(
-                        name=logo_data['name'],
-                        image_url=logo_data['image_url'],
-                        correct_answer=logo_data['correct_answer'],
-                        alternative_answers=json.dumps(logo_data.get('alternative_answers', []))
-                    )
-                    db.session.add(logo)
-                db.session.commit()
-                print(f'Loaded {len(sample_logos)} sample logos')
-        except FileNotFoundError:
-            print('Sample logos file not found, starting with empty logo database')
-"
+flask --app main init-db
 
 echo "✅ Database initialized successfully!"
 echo
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed via extra= and is structured data
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+class StructuredFormatter(logging.Formatter):
+    """Renders records as logfmt-style key=value lines or as JSON objects"""
+
+    def __init__(self, fmt='text'):
+        super().__init__()
+        self.json = fmt == 'json'
+
+    def format(self, record):
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+        fields = _fields(record)
+        if self.json:
+            entry = {
+                'ts': timestamp,
+                'level': record.levelname,
+                'logger': record.name,
+                'msg': record.getMessage(),
+                **fields
+            }
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f'{timestamp} {record.levelname:<7} {record.name}: {record.getMessage()}'
+        if fields:
+            line += ' ' + ' '.join(f'{key}={json.dumps(value, default=str)}' for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves message formatting to the listener thread.
+
+    The stock QueueHandler formats the record in the calling thread so it
+    can be pickled; this app only queues in-process, so the request thread
+    only pays for building the record.
+    """
+
+    def prepare(self, record):
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Passes one in every `rate` records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate == 1:
+            return True
+        with self._lock:
+            self._count += 1
+            keep = self._count % self.rate == 1
+        if keep:
+            record.sample_rate = self.rate
+        return keep
+
+def _parse_levels(spec):
+    """Parse 'autoquizer.guess=WARNING,werkzeug=ERROR' into a dict"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+_listener = None
+
+def configure_logging():
+    """Route all logging through a background thread with per-subsystem levels.
+
+    LOG_LEVEL            root level (default INFO)
+    LOG_LEVELS           per-logger overrides, e.g. autoquizer.guess=WARNING,werkzeug=ERROR
+    LOG_FORMAT           text (default) or json
+    LOG_SAMPLE_GUESSES   keep 1 in N individual guess logs (default 10)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(StructuredFormatter(os.environ.get('LOG_FORMAT', 'text')))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+    for name, level in _parse_levels(os.environ.get('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    guess_sampling = int(os.environ.get('LOG_SAMPLE_GUESSES', '10'))
+    if guess_sampling > 1:
+        logging.getLogger('autoquizer.guess').addFilter(SamplingFilter(guess_sampling))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
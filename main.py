@@ -1,4 +1,9 @@
-from app import app
+from app import create_app
+import db_setup
+
+app = create_app()
 
 if __name__ == '__main__':
+    with app.app_context():
+        db_setup.init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
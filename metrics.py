@@ -0,0 +1,240 @@
+import time
+import threading
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    """Base class for a labelled metric family"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class Registry:
+    """Holds metric families and renders the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'autoquizer_http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route', 'status')
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'autoquizer_http_requests_in_flight', 'Requests currently being handled'
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    'autoquizer_http_request_sql_queries', 'SQL statements executed per request', ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'autoquizer_http_request_sql_seconds', 'Time spent in SQL per request', ('route',)
+)
+SQL_QUERIES = REGISTRY.counter(
+    'autoquizer_sql_queries_total', 'SQL statements executed'
+)
+SQL_SECONDS = REGISTRY.counter(
+    'autoquizer_sql_seconds_total', 'Time spent executing SQL statements'
+)
+GUESSES = REGISTRY.counter(
+    'autoquizer_guesses_total', 'Guesses accepted', ('result',)
+)
+GUESS_RETRIES = REGISTRY.counter(
+    'autoquizer_guess_retries_total',
+    'Guess submissions answered without storing a guess: replayed, duplicate, mismatch or pending',
+    ('outcome',)
+)
+QUESTION_CLOSE_SECONDS = REGISTRY.histogram(
+    'autoquizer_question_close_seconds', 'Time to finalize a question and advance the game'
+)
+QUESTIONS_CLOSED = REGISTRY.counter(
+    'autoquizer_questions_closed_total', 'Question close attempts by outcome', ('outcome',)
+)
+STREAMS_OPEN = REGISTRY.gauge(
+    'autoquizer_streams_open', 'Open server-sent event status streams', ('stream',)
+)
+RATE_LIMITED = REGISTRY.counter(
+    'autoquizer_rate_limited_total', 'Requests rejected with 429 by policy and bucket key', ('policy', 'key')
+)
+REQUESTS_SHED = REGISTRY.counter(
+    'autoquizer_requests_shed_total', 'Requests rejected with 503 to shed load', ('reason',)
+)
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+    REQUESTS_IN_FLIGHT.inc()
+
+def _teardown_request(exc):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    REQUESTS_IN_FLIGHT.dec()
+    route = _route()
+    status = g.pop('metrics_status', 500 if exc is not None else 200)
+    REQUEST_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route, status=status)
+    REQUEST_QUERIES.observe(g.get('sql_queries', 0), route=route)
+    REQUEST_SQL_SECONDS.observe(g.get('sql_seconds', 0.0), route=route)
+
+def _after_request(response):
+    g.metrics_status = response.status_code
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    SQL_QUERIES.inc()
+    SQL_SECONDS.inc(elapsed)
+    if has_request_context() and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.sql_seconds += elapsed
+
+def instrument_engine(engine):
+    """Count and time every SQL statement issued through the engine"""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+def init_app(app):
+    """Record per-route latency, in-flight requests and SQL usage, and serve /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics in text exposition format"""
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -59,6 +59,18 @@ class GameTeam(db.Model):
     def __repr__(self):
         return f'<GameTeam game:{self.game_id} team:{self.team_id}>'
 
+class Answer(db.Model):
+    """Answer model: one row per distinct normalized answer text in a game"""
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    text = db.Column(db.String(100), nullable=False)
+    
+    # Dictionary key; also the index used to look answers up by text
+    __table_args__ = (db.UniqueConstraint('game_id', 'text', name='_game_answer_uc'),)
+    
+    def __repr__(self):
+        return f'<Answer {self.text}>'
+
 class Guess(db.Model):
     """Guess model for storing team guesses"""
     id = db.Column(db.Integer, primary_key=True)
@@ -67,15 +79,65 @@ class Guess(db.Model):
     round_number = db.Column(db.Integer, nullable=False)
     logo_id = db.Column(db.Integer, db.ForeignKey('logo.id'), nullable=False)
     question_number = db.Column(db.Integer, nullable=False)
-    guess_text = db.Column(db.String(100), nullable=False)
+    answer_id = db.Column(db.Integer, db.ForeignKey('answer.id'))  # None for placeholders
+    is_placeholder = db.Column(db.Boolean, nullable=False, default=False)  # Team did not answer in time
     is_correct = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Legacy field for backward compatibility - will be removed after migration
-    guess = db.Column(db.String(100), nullable=True)
+    # Unique constraint to prevent duplicate guesses per team/question; the index
+    # serves results in (question, team) order for keyset-paginated history
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'game_id', 'round_number', 'logo_id', name='_team_game_round_logo_uc'),
+        db.Index('ix_guess_game_question', 'game_id', 'round_number', 'question_number', 'team_id'),
+    )
+    
+    def __repr__(self):
+        return f'<Guess {self.answer_id} - {self.is_correct}>'
+
+class ArchivedGame(db.Model):
+    """ArchivedGame model for storing the summary of a finished game"""
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    total_questions = db.Column(db.Integer, default=0)
+    guess_count = db.Column(db.Integer, default=0)
+    team_scores = db.Column(db.Text)  # JSON string of {team_id: {"name", "score"}}
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArchivedGame {self.game_id}>'
+
+class ArchivedQuestion(db.Model):
+    """ArchivedQuestion model for storing one question's guesses in compact form"""
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False, index=True)
+    round_number = db.Column(db.Integer, nullable=False)
+    question_number = db.Column(db.Integer, nullable=False)
+    logo_id = db.Column(db.Integer)
+    guess_count = db.Column(db.Integer, default=0)
+    payload = db.Column(db.LargeBinary, nullable=False)  # zlib-compressed JSON of guess columns
+    
+    # One partition per question of an archived game
+    __table_args__ = (db.UniqueConstraint('game_id', 'round_number', 'question_number', name='_archived_question_uc'),)
+    
+    def __repr__(self):
+        return f'<ArchivedQuestion game:{self.game_id} q:{self.question_number}>'
+
+class QuestionResult(db.Model):
+    """QuestionResult model for freezing the outcome of a closed question"""
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    round_number = db.Column(db.Integer, nullable=False)
+    question_number = db.Column(db.Integer, nullable=False)
+    logo_id = db.Column(db.Integer, db.ForeignKey('logo.id'))
+    correct_count = db.Column(db.Integer, default=0)
+    incorrect_count = db.Column(db.Integer, default=0)
+    missing_count = db.Column(db.Integer, default=0)  # Teams that got a placeholder answer
+    avg_latency_ms = db.Column(db.Integer)
+    top_wrong_answers = db.Column(db.Text)  # JSON string of [{"answer", "count"}]
+    latency_histogram = db.Column(db.Text)  # JSON string of [{"le", "count"}]
+    closed_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Unique constraint to prevent duplicate guesses per team/question
-    __table_args__ = (db.UniqueConstraint('team_id', 'game_id', 'round_number', 'logo_id', name='_team_game_round_logo_uc'),)
+    # A question can only be closed once - concurrent closers lose on this constraint
+    __table_args__ = (db.UniqueConstraint('game_id', 'round_number', 'question_number', name='_question_result_uc'),)
     
     def __repr__(self):
-        return f'<Guess {self.guess_text} - {self.is_correct}>'
+        return f'<QuestionResult game:{self.game_id} q:{self.question_number}>'
@@ -0,0 +1,129 @@
+import threading
+from collections import Counter
+from sqlalchemy import select
+from models import db, Guess, Answer
+
+# Upper bounds (seconds) of the time-to-answer histogram buckets
+LATENCY_BUCKETS = (2, 5, 10, 15, 20, 25, 30)
+
+# How many distinct wrong answers are kept when a question is frozen
+TOP_WRONG_ANSWERS = 5
+
+class QuestionStats:
+    """Running counters for a single question"""
+
+    def __init__(self):
+        self.correct = 0
+        self.incorrect = 0
+        self.wrong_answers = Counter()
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_total = 0.0
+
+    def add(self, guess_text, is_correct, latency):
+        """Fold one guess into the counters"""
+        if is_correct:
+            self.correct += 1
+        else:
+            self.incorrect += 1
+            self.wrong_answers[guess_text] += 1
+
+        if latency is not None:
+            latency = max(0.0, latency)
+            self.latency_total += latency
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_buckets[index] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+
+    def to_dict(self):
+        """Summarize the counters for storage or display"""
+        answered = self.correct + self.incorrect
+        return {
+            'correct': self.correct,
+            'incorrect': self.incorrect,
+            'accuracy': round(self.correct / answered, 4) if answered else None,
+            'avg_latency_ms': int(self.latency_total * 1000 / answered) if answered else None,
+            'top_wrong_answers': [
+                {'answer': answer, 'count': count}
+                for answer, count in self.wrong_answers.most_common(TOP_WRONG_ANSWERS)
+            ],
+            'latency_histogram': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], self.latency_buckets)
+            ]
+        }
+
+class QuestionAnalytics:
+    """Maintains per-question counters incrementally as guesses arrive.
+
+    The counters back the live view of the open question and are per
+    process: with several workers each one shows the guesses it served.
+    Closed questions are frozen from the database, so stored stats are complete.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record_guess(self, game, guess_text, is_correct, timestamp):
+        """Count a guess against the game's current question"""
+        latency = None
+        if game.round_start_time and timestamp:
+            latency = (timestamp - game.round_start_time).total_seconds()
+
+        key = (game.id, game.current_round, game.current_question)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QuestionStats()
+            stats.add(guess_text, is_correct, latency)
+
+    def restore(self, game, guesses, round_start_ms):
+        """Reload the counters of the game's open question from logged guesses"""
+        stats = QuestionStats()
+        for team_id, guess_text, is_correct, timestamp_ms in guesses:
+            stats.add(guess_text, is_correct, (timestamp_ms - round_start_ms) / 1000)
+        with self._lock:
+            self._stats[(game.id, game.current_round, game.current_question)] = stats
+
+    def live(self, game_id, round_number, question_number):
+        """Current counters for a question that is still open"""
+        with self._lock:
+            stats = self._stats.get((game_id, round_number, question_number))
+            return stats.to_dict() if stats else QuestionStats().to_dict()
+
+    def freeze(self, game):
+        """Drop the live counters of the game's current question and return its final stats.
+
+        The live counters only hold the guesses this process served, so the
+        stored stats always come from one scan of the question's guesses.
+        """
+        key = (game.id, game.current_round, game.current_question)
+        with self._lock:
+            self._stats.pop(key, None)
+
+        stats = QuestionStats()
+        rows = db.session.execute(
+            select(Answer.text, Guess.is_correct, Guess.timestamp)
+            .outerjoin(Answer, Answer.id == Guess.answer_id)
+            .where(
+                Guess.game_id == game.id,
+                Guess.round_number == game.current_round,
+                Guess.logo_id == game.current_logo_id,
+                Guess.is_placeholder.is_(False)
+            )
+        ).all()
+        for row in rows:
+            latency = None
+            if game.round_start_time and row.timestamp:
+                latency = (row.timestamp - game.round_start_time).total_seconds()
+            stats.add(row.text, row.is_correct, latency)
+        return stats.to_dict()
+
+    def discard_game(self, game_id):
+        """Drop any counters still held for a game"""
+        with self._lock:
+            for key in [key for key in self._stats if key[0] == game_id]:
+                del self._stats[key]
@@ -0,0 +1,220 @@
+"""
+Admission control for the hot endpoints.
+
+Team status polls and guesses are limited by in-memory token buckets keyed
+by team (from the team token or name), and optionally by client IP, and
+answered with 429 and Retry-After once a bucket is empty. A process-wide cap on requests
+being handled turns overload into quick 503s instead of a growing queue on
+SQLite's writer lock, and the expensive read-only admin endpoints are shed
+first, once the process is busy. A long-poll gives its slot back while it
+sleeps and takes one again for the work it does after waking.
+
+Limits are per process and configured from the environment:
+
+    RATE_LIMITS              1 to enable (default), 0 to disable everything
+    RATE_LIMIT_STATUS        status polls per team, "rate/burst" per second (default 2/10)
+    RATE_LIMIT_GUESS         guesses per team (default 1/3)
+    RATE_LIMIT_IP            requests per client IP on limited endpoints (unset by default;
+                             a whole venue often shares one NAT address)
+    MAX_CONCURRENT_REQUESTS  requests handled at once (default 64, 0 for no cap)
+    ADMISSION_QUEUE_TIMEOUT  seconds a request may wait for a slot (default 0.5)
+    ADMIN_SHED_AT            in-flight requests at which expensive admin reads are shed
+                             (default three quarters of MAX_CONCURRENT_REQUESTS)
+"""
+
+import os
+import math
+import time
+import threading
+from flask import g, request, jsonify
+from auth import read_team_token, request_team_token
+import metrics
+
+# Endpoint -> policy whose per-team bucket applies
+TEAM_POLICIES = {
+    'game.get_team_status': 'status',
+    'game.submit_guess': 'guess',
+}
+
+# Read-only admin endpoints that are expensive enough to shed under load
+SHEDDABLE_ENDPOINTS = {
+    'game.get_admin_status',
+    'game.get_logos',
+    'game.get_teams',
+    'game.get_game_history',
+    'game.get_game_history_detail',
+    'game.get_question_analytics',
+    'game.get_game_guesses',
+    'game.export_game_results',
+}
+
+# Cheap endpoints that stay available at the cap, so monitoring and pages keep loading
+UNCAPPED_ENDPOINTS = {'metrics', 'static', 'serve_asset', 'game.server_time'}
+
+def parse_limit(value, default):
+    """(rate, burst) from "rate/burst", e.g. "2/10" is 2 per second with bursts of 10"""
+    try:
+        rate, burst = (value or default).split('/')
+        return float(rate), float(burst)
+    except ValueError:
+        rate, burst = default.split('/')
+        return float(rate), float(burst)
+
+class RateLimiter:
+    """Token buckets by key: each holds up to burst tokens and refills at rate per second"""
+
+    def __init__(self, rate, burst, max_keys=50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, now=None):
+        """0 if key may proceed (a token is spent), else the seconds until it may retry"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [key for key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+class AdmissionControl:
+    """Per-team and optional per-IP rate limits, a concurrency cap and admin load shedding as request hooks"""
+
+    def __init__(self, enabled=True, limits=None, ip_limit=None, max_concurrent=64,
+                 queue_timeout=0.5, shed_at=None):
+        self.enabled = enabled
+        self.limiters = {policy: RateLimiter(*limit) for policy, limit in (limits or {}).items()}
+        self.ip_limiter = RateLimiter(*ip_limit) if ip_limit else None
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.shed_at = shed_at if shed_at is not None else max_concurrent * 3 // 4
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._in_flight = 0
+        self._count_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        max_concurrent = int(os.environ.get('MAX_CONCURRENT_REQUESTS', '64'))
+        shed_at = os.environ.get('ADMIN_SHED_AT')
+        ip_limit = os.environ.get('RATE_LIMIT_IP')
+        return cls(
+            enabled=os.environ.get('RATE_LIMITS', '1') == '1',
+            limits={
+                'status': parse_limit(os.environ.get('RATE_LIMIT_STATUS'), '2/10'),
+                'guess': parse_limit(os.environ.get('RATE_LIMIT_GUESS'), '1/3'),
+            },
+            ip_limit=parse_limit(ip_limit, '50/200') if ip_limit else None,
+            max_concurrent=max_concurrent,
+            queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '0.5')),
+            shed_at=int(shed_at) if shed_at else None
+        )
+
+    def _team_key(self):
+        claims = read_team_token(request_team_token())
+        if claims:
+            return f'team:{claims[0]}'
+        team_name = (request.view_args or {}).get('team_name')
+        if team_name is None and request.method == 'POST':
+            team_name = (request.get_json(silent=True) or {}).get('team_name')
+        return f'name:{team_name}' if team_name else None
+
+    def _reject(self, status, reason, retry_after):
+        retry_after = max(1, math.ceil(retry_after))
+        response = jsonify({'error': reason, 'retry_after': retry_after})
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def _before_request(self):
+        if not self.enabled:
+            return None
+        endpoint = request.endpoint
+
+        policy = TEAM_POLICIES.get(endpoint)
+        if policy is not None:
+            team_key = self._team_key()
+            if team_key is not None:
+                retry_after = self.limiters[policy].take(team_key)
+                if retry_after:
+                    metrics.RATE_LIMITED.inc(policy=policy, key='team')
+                    return self._reject(429, 'Too many requests', retry_after)
+            if self.ip_limiter is not None:
+                retry_after = self.ip_limiter.take(request.remote_addr)
+                if retry_after:
+                    metrics.RATE_LIMITED.inc(policy=policy, key='ip')
+                    return self._reject(429, 'Too many requests', retry_after)
+
+        if self._slots is None or endpoint in UNCAPPED_ENDPOINTS:
+            return None
+
+        if endpoint in SHEDDABLE_ENDPOINTS and self._in_flight >= self.shed_at:
+            metrics.REQUESTS_SHED.inc(reason='admin')
+            return self._reject(503, 'Server busy, try again shortly', 1)
+
+        if not self._acquire():
+            return self.busy_response()
+        return None
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            metrics.REQUESTS_SHED.inc(reason='concurrency')
+            return False
+        g.admission_slot = True
+        with self._count_lock:
+            self._in_flight += 1
+        return True
+
+    def _release(self):
+        if g.pop('admission_slot', False):
+            with self._count_lock:
+                self._in_flight -= 1
+            self._slots.release()
+            return True
+        return False
+
+    def busy_response(self):
+        return self._reject(503, 'Server busy, try again shortly', 1)
+
+    def release_slot(self):
+        """Give the request's slot back while it sleeps, e.g. during a long-poll wait"""
+        if self._release():
+            g.admission_released = True
+
+    def reacquire_slot(self):
+        """Take a slot again after release_slot(); False if none freed up in time"""
+        if not g.pop('admission_released', False):
+            return True
+        return self._acquire()
+
+    def _teardown_request(self, exc):
+        self._release()
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+admission = AdmissionControl.from_env()
+
+def init_app(app):
+    """Rate limit team endpoints and cap concurrent requests"""
+    admission.init_app(app)
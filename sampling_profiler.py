@@ -0,0 +1,202 @@
+import os
+import sys
+import math
+import time
+import threading
+from collections import Counter
+from flask import request, jsonify, Response
+from auth import admin_required
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Shortest sampling interval accepted, in seconds; shorter ones would spin a core
+MIN_INTERVAL = 0.001
+
+def _positive_seconds(value, name, minimum=0.0):
+    """value as a float number of seconds, or None if not given; ValueError if it is not positive"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f'{name} must be a number of seconds')
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number of seconds')
+    if not math.isfinite(seconds) or seconds <= 0 or seconds < minimum:
+        raise ValueError(f'{name} must be at least {minimum} seconds' if minimum else f'{name} must be positive')
+    return seconds
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f'{code.co_name} ({filename}:{frame.f_lineno})'
+
+class SamplingProfiler:
+    """Samples the Python stacks of in-flight requests on a background thread.
+
+    While stopped, the only per-request cost is one attribute check.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.running = False
+        self.started_at = None
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._active = {}
+        self._stop = threading.Event()
+
+    def start(self, interval=None, duration=None):
+        """Begin sampling; stops automatically after duration seconds if given.
+
+        Raises ValueError for an interval or duration that is not a positive number.
+        """
+        interval = _positive_seconds(interval, 'interval', MIN_INTERVAL)
+        duration = _positive_seconds(duration, 'duration')
+        with self._lock:
+            if self.running:
+                return False
+            if interval:
+                self.interval = interval
+            self.running = True
+            self.started_at = time.time()
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._run, args=(self._stop, duration), name='sampling-profiler', daemon=True
+            ).start()
+            return True
+
+    def stop(self):
+        """Stop sampling and keep the collected stacks"""
+        with self._lock:
+            if not self.running:
+                return False
+            self.running = False
+            self._stop.set()
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self, stop_event, duration):
+        deadline = time.monotonic() + duration if duration else None
+        own_ident = threading.get_ident()
+        try:
+            while not stop_event.wait(self.interval):
+                if deadline and time.monotonic() >= deadline:
+                    break
+                active = dict(self._active)
+                if not active:
+                    continue
+                frames = sys._current_frames()
+                collected = []
+                for ident, route in active.items():
+                    frame = frames.get(ident)
+                    if frame is None or ident == own_ident:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(route)
+                    collected.append(';'.join(reversed(stack)))
+                with self._lock:
+                    self._stacks.update(collected)
+                    self.samples += 1
+        finally:
+            # However sampling ends, a later start() must be able to run
+            with self._lock:
+                if self._stop is stop_event:
+                    self.running = False
+
+    def _before_request(self):
+        if self.running:
+            rule = request.url_rule
+            self._active[threading.get_ident()] = f"{request.method} {rule.rule if rule is not None else 'unmatched'}"
+
+    def _teardown_request(self, exc):
+        if self._active:
+            self._active.pop(threading.get_ident(), None)
+
+    def collapsed(self, route=None):
+        """Stacks in collapsed format ('frame;frame;frame count'), flamegraph.pl compatible"""
+        with self._lock:
+            items = list(self._stacks.items())
+        lines = [
+            f'{stack} {count}' for stack, count in sorted(items)
+            if route is None or stack.startswith(f'{route};')
+        ]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def summary(self, top=15):
+        """Sample counts per route and the hottest leaf frames of each"""
+        with self._lock:
+            items = list(self._stacks.items())
+        routes = {}
+        for stack, count in items:
+            frames = stack.split(';')
+            entry = routes.setdefault(frames[0], {'samples': 0, 'leaf_frames': Counter()})
+            entry['samples'] += count
+            entry['leaf_frames'][frames[-1]] += count
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'sample_ticks': self.samples,
+            'routes': {
+                route: {
+                    'samples': entry['samples'],
+                    'top_frames': [
+                        {'frame': frame, 'samples': count}
+                        for frame, count in entry['leaf_frames'].most_common(top)
+                    ]
+                }
+                for route, entry in sorted(routes.items(), key=lambda item: item[1]['samples'], reverse=True)
+            }
+        }
+
+    def init_app(self, app):
+        """Register request hooks and the admin-only control/export endpoints"""
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+        @app.route('/api/admin/profile/cpu', methods=['GET'])
+        @admin_required
+        def get_cpu_profile():
+            """Export samples as JSON summary or collapsed stacks (?format=collapsed)"""
+            if request.args.get('format') == 'collapsed':
+                return Response(self.collapsed(request.args.get('route')), mimetype='text/plain')
+            return jsonify(self.summary())
+
+        @app.route('/api/admin/profile/cpu/start', methods=['POST'])
+        @admin_required
+        def start_cpu_profile():
+            """Start sampling in-flight requests"""
+            data = request.get_json(silent=True) or {}
+            try:
+                started = self.start(interval=data.get('interval'), duration=data.get('duration'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({'success': True, 'started': started, 'interval': self.interval})
+
+        @app.route('/api/admin/profile/cpu/stop', methods=['POST'])
+        @admin_required
+        def stop_cpu_profile():
+            """Stop sampling"""
+            return jsonify({'success': True, 'stopped': self.stop(), 'sample_ticks': self.samples})
+
+        @app.route('/api/admin/profile/cpu', methods=['DELETE'])
+        @admin_required
+        def reset_cpu_profile():
+            """Discard collected samples"""
+            self.reset()
+            return jsonify({'success': True})
+
+sampling_profiler = SamplingProfiler(interval=float(os.environ.get('SAMPLING_PROFILER_INTERVAL', '0.005')))
@@ -0,0 +1,168 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional accelerators; everything falls back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Only text formats are worth compressing; images and msgpack barely shrink
+COMPRESSIBLE_MIMETYPES = (JSON_MIMETYPE, 'text/plain', 'text/html', 'text/csv', 'application/x-ndjson')
+
+if orjson is not None:
+    # Datetimes go through the provider's default() so output matches the stdlib encoder
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed.
+
+    Produces the same documents as the default provider (sorted keys,
+    http-date datetimes); calls with options orjson cannot express fall
+    back to the standard library.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        options = _ORJSON_OPTIONS
+        if kwargs.pop('indent', None) == 2:
+            options |= orjson.OPT_INDENT_2
+        if kwargs.get('separators', (',', ':')) == (',', ':'):
+            kwargs.pop('separators', None)
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def dumps_bytes(payload):
+    """Compact JSON bytes for payload"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        payload, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':')
+    ).encode('utf-8')
+
+def wants_msgpack():
+    """True when the client prefers MessagePack and it is available"""
+    if msgpack is None:
+        return False
+    return request.accept_mimetypes.best_match((JSON_MIMETYPE, MSGPACK_MIMETYPE)) == MSGPACK_MIMETYPE
+
+def respond(payload, status=200):
+    """Response for payload as JSON, or MessagePack for clients that send Accept: application/msgpack"""
+    if wants_msgpack():
+        body, mimetype = msgpack.packb(payload, default=str), MSGPACK_MIMETYPE
+    else:
+        body, mimetype = dumps_bytes(payload) + b'\n', JSON_MIMETYPE
+    response = current_app.response_class(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+class ResponseCompressor:
+    """Compresses larger text responses and caches the compressed bytes of unchanged bodies.
+
+    Admin and team dashboards poll the same status document every couple of
+    seconds; identical bodies are recognised by digest, answered with 304 when
+    the client already has them and otherwise served from the cache without
+    compressing again.
+    """
+
+    def __init__(self, enabled=True, min_size=1024, level=5, cache_size=64):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.level = level
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _negotiate(self):
+        encodings = request.accept_encodings
+        if brotli is not None and encodings['br']:
+            return 'br'
+        if encodings['gzip']:
+            return 'gzip'
+        return None
+
+    def _compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.level)
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    def encoded(self, body, digest, encoding):
+        """Compressed body, reused while the same body keeps being served"""
+        key = (digest, encoding)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        data = self._compress(body, encoding)
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def _after_request(self, response):
+        if (not self.enabled or response.direct_passthrough or response.is_streamed
+                or response.status_code != 200 or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES + (MSGPACK_MIMETYPE,)):
+            return response
+
+        body = response.get_data()
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if request.method == 'GET' and 'ETag' not in response.headers:
+            response.set_etag(digest, weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self._negotiate()
+        if encoding is None or len(body) < self.min_size:
+            return response
+        response.set_data(self.encoded(body, digest, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+compressor = ResponseCompressor(
+    enabled=os.environ.get('RESPONSE_COMPRESSION', '1') == '1',
+    min_size=int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+)
+
+def init_app(app):
+    """Use the fast JSON provider and compress responses.
+
+    Register before other after_request hooks so compression runs last.
+    """
+    app.json = FastJSONProvider(app)
+    compressor.init_app(app)
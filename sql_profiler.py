@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from flask import g, request, has_request_context, jsonify
+from sqlalchemy import event
+from auth import admin_required
+
+logger = logging.getLogger('autoquizer.perf')
+
+# Statements with the same shape issued this many times from one call site are flagged
+DEFAULT_REPEAT_THRESHOLD = 3
+
+# Frames from these directories are skipped when looking for the call site
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = (os.path.abspath(__file__),)
+
+_IN_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r'\s+')
+
+def statement_shape(statement):
+    """Normalize a statement so queries differing only in values compare equal"""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def _call_site():
+    """First stack frame in application code outside the profiler itself"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_ROOT) and filename not in _SKIP_FILES and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, _ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+class QueryCapture:
+    """Statements recorded while a capture is active"""
+
+    def __init__(self, threshold=DEFAULT_REPEAT_THRESHOLD):
+        self.threshold = threshold
+        self.queries = []
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_seconds(self):
+        return sum(query['seconds'] for query in self.queries)
+
+    def repeated(self):
+        """Groups of identical-shape statements from one call site (likely N+1 patterns)"""
+        groups = {}
+        for query in self.queries:
+            key = (query['shape'], query['call_site'])
+            groups[key] = groups.get(key, 0) + 1
+        return [
+            {'shape': shape, 'call_site': call_site, 'count': count}
+            for (shape, call_site), count in groups.items()
+            if count >= self.threshold
+        ]
+
+    def to_dict(self):
+        return {
+            'query_count': self.count,
+            'sql_ms': round(self.total_seconds * 1000, 3),
+            'repeated': self.repeated(),
+            'queries': [
+                {
+                    'statement': query['statement'],
+                    'ms': round(query['seconds'] * 1000, 3),
+                    'call_site': query['call_site']
+                }
+                for query in self.queries
+            ]
+        }
+
+class SQLProfiler:
+    """Opt-in per-request SQL recorder with N+1 detection"""
+
+    def __init__(self, enabled=False, threshold=DEFAULT_REPEAT_THRESHOLD, history=50):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.recent = deque(maxlen=history)
+        self._local = threading.local()
+
+    def _active_captures(self):
+        captures = list(getattr(self._local, 'captures', ()))
+        if self.enabled and has_request_context() and 'sql_capture' in g:
+            captures.append(g.sql_capture)
+        return captures
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._active_captures():
+            conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('profiler_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        captures = self._active_captures()
+        if not captures:
+            return
+        query = {
+            'statement': statement,
+            'shape': statement_shape(statement),
+            'seconds': elapsed,
+            'call_site': _call_site()
+        }
+        for capture in captures:
+            capture.queries.append(query)
+
+    def instrument_engine(self, engine):
+        """Listen to every statement issued through the engine"""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @contextmanager
+    def capture(self, threshold=None):
+        """Record every statement issued by this thread inside the block"""
+        capture = QueryCapture(threshold or self.threshold)
+        captures = getattr(self._local, 'captures', None)
+        if captures is None:
+            captures = self._local.captures = []
+        captures.append(capture)
+        try:
+            yield capture
+        finally:
+            captures.remove(capture)
+
+    @contextmanager
+    def assert_max_queries(self, limit):
+        """Fail if the block issues more than limit statements.
+
+            with sql_profiler.assert_max_queries(4):
+                client.get('/api/status/Team')
+        """
+        with self.capture() as capture:
+            yield capture
+        if capture.count > limit:
+            listing = '\n'.join(
+                f"  {query['call_site']}: {query['shape']}" for query in capture.queries
+            )
+            raise AssertionError(f'Expected at most {limit} queries, got {capture.count}:\n{listing}')
+
+    def _before_request(self):
+        if self.enabled:
+            g.sql_capture = QueryCapture(self.threshold)
+
+    def _after_request(self, response):
+        capture = g.pop('sql_capture', None)
+        if capture is None:
+            return response
+
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        response.headers['X-SQL-Queries'] = str(capture.count)
+        response.headers['X-SQL-Time-Ms'] = f'{capture.total_seconds * 1000:.3f}'
+
+        repeated = capture.repeated()
+        for group in repeated:
+            logger.warning("Possible N+1 on %s %s: %sx '%s' from %s",
+                           request.method, route, group['count'], group['shape'], group['call_site'])
+
+        self.recent.append({'method': request.method, 'route': route, **capture.to_dict()})
+        return response
+
+    def init_app(self, app):
+        """Profile requests when SQL_PROFILE=1 and serve recent profiles to admins"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        @app.route('/api/admin/profile/sql')
+        @admin_required
+        def get_sql_profiles():
+            """Recent per-request SQL profiles, flagged N+1 groups first"""
+            profiles = list(self.recent)
+            return jsonify({
+                'enabled': self.enabled,
+                'profiles': sorted(profiles, key=lambda profile: len(profile['repeated']), reverse=True)
+            })
+
+sql_profiler = SQLProfiler(
+    enabled=os.environ.get('SQL_PROFILE', '0') == '1',
+    threshold=int(os.environ.get('SQL_PROFILE_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD))
+)
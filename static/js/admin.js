@@ -1,11 +1,166 @@
+// Status polling: at most this often, every few seconds while a game runs
+// (scores change as guesses come in), rarely when idle
+const MIN_POLL_MS = 1000;
+const ACTIVE_POLL_MS = 5000;
+const IDLE_POLL_MS = 15000;
+
+// Team and logo lists: rows rendered beyond the visible ones on each side,
+// and how long typing in a search box settles before the list is fetched
+const LIST_OVERSCAN = 10;
+const SEARCH_DEBOUNCE_MS = 250;
+
+class VirtualList {
+    // Scrolling list backed by a paginated endpoint (offset, limit, total).
+    // Only the window in view is fetched and only its rows exist in the DOM;
+    // on refresh, rows whose data changed are patched in place and the rest
+    // are left alone.
+    constructor(container, options) {
+        this.container = container;
+        this.url = options.url;
+        this.key = options.key;
+        this.rowHeight = options.rowHeight;
+        this.createRow = options.createRow;
+        this.updateRow = options.updateRow;
+        this.emptyText = options.emptyText;
+        this.onTotal = options.onTotal;
+        
+        this.params = options.params || {};
+        this.total = 0;
+        this.loaded = [0, 0];
+        this.items = new Map();
+        this.rows = new Map();
+        this.requestId = 0;
+        this.renderFrame = null;
+        this.fetchTimeout = null;
+        
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-list-spacer';
+        this.empty = document.createElement('div');
+        this.empty.className = 'text-center text-muted py-3';
+        this.container.classList.add('virtual-list');
+        this.container.replaceChildren(this.spacer);
+        this.container.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+    }
+    
+    setParams(params) {
+        this.params = params;
+        this.container.scrollTop = 0;
+        this.refresh();
+    }
+    
+    visibleRange() {
+        const first = Math.floor(this.container.scrollTop / this.rowHeight);
+        const count = Math.ceil(this.container.clientHeight / this.rowHeight) + 1;
+        return [first, Math.min(this.total, first + count)];
+    }
+    
+    async refresh() {
+        // Fetch the rows in view plus the overscan on either side
+        clearTimeout(this.fetchTimeout);
+        const first = Math.floor(this.container.scrollTop / this.rowHeight);
+        const offset = Math.max(0, first - LIST_OVERSCAN);
+        const limit = Math.ceil(this.container.clientHeight / this.rowHeight) + 2 * LIST_OVERSCAN;
+        const requestId = ++this.requestId;
+        
+        try {
+            const query = new URLSearchParams({ ...this.params, offset, limit });
+            const response = await fetch(`${this.url}?${query}`);
+            const data = await response.json();
+            
+            // A newer fetch (scroll, search or poll) supersedes this one
+            if (requestId !== this.requestId) {
+                return;
+            }
+            if (data.error) {
+                console.error('Error:', data.error);
+                return;
+            }
+            
+            const items = data[this.key];
+            this.total = data.total;
+            this.loaded = [data.offset, data.offset + items.length];
+            this.items.clear();
+            items.forEach((item, index) => this.items.set(data.offset + index, item));
+            if (this.onTotal) {
+                this.onTotal(this.total);
+            }
+            this.render();
+        } catch (error) {
+            console.error(`Failed to load ${this.key}:`, error);
+        }
+    }
+    
+    scheduleRender() {
+        if (!this.renderFrame) {
+            this.renderFrame = requestAnimationFrame(() => this.render());
+        }
+    }
+    
+    render() {
+        this.renderFrame = null;
+        this.spacer.style.height = `${this.total * this.rowHeight}px`;
+        if (this.total === 0) {
+            this.empty.textContent = this.emptyText(this.params);
+            this.container.prepend(this.empty);
+        } else {
+            this.empty.remove();
+        }
+        
+        const [first, last] = this.visibleRange();
+        const visible = new Set();
+        for (let index = first; index < last; index++) {
+            const item = this.items.get(index);
+            if (!item) {
+                continue;
+            }
+            visible.add(item.id);
+            
+            let row = this.rows.get(item.id);
+            if (!row) {
+                row = { element: this.createRow(), signature: null, index: null };
+                row.element.style.height = `${this.rowHeight}px`;
+                this.rows.set(item.id, row);
+                this.spacer.appendChild(row.element);
+            }
+            
+            // Only touch rows whose data or position changed
+            const signature = JSON.stringify(item);
+            if (row.signature !== signature) {
+                this.updateRow(row.element, item);
+                row.signature = signature;
+            }
+            if (row.index !== index) {
+                row.element.style.transform = `translateY(${index * this.rowHeight}px)`;
+                row.index = index;
+            }
+        }
+        
+        // Rows scrolled out of view (or no longer in the list) leave the DOM
+        for (const [id, row] of this.rows) {
+            if (!visible.has(id)) {
+                row.element.remove();
+                this.rows.delete(id);
+            }
+        }
+        
+        // Scrolled past the fetched window: load the new one once scrolling settles
+        if (first < this.loaded[0] || last > this.loaded[1]) {
+            clearTimeout(this.fetchTimeout);
+            this.fetchTimeout = setTimeout(() => this.refresh(), 100);
+        }
+    }
+}
+
 class AdminDashboard {
     constructor() {
         this.currentGameState = null;
+        this.clock = new ServerClock();
         this.updateInterval = null;
         this.timerInterval = null;
         this.autoProgressInterval = null;
         
         this.initializeElements();
+        this.initializeLists();
         this.bindEvents();
         this.startStatusUpdates();
     }
@@ -25,13 +180,57 @@ class AdminDashboard {
             restartGameBtn: document.getElementById('restartGameBtn'),
             nextRoundBtn: document.getElementById('nextRoundBtn'),
             teamsContainer: document.getElementById('teamsContainer'),
+            teamCount: document.getElementById('teamCount'),
+            teamSearch: document.getElementById('teamSearch'),
+            teamSort: document.getElementById('teamSort'),
             logosContainer: document.getElementById('logosContainer'),
+            logoCount: document.getElementById('logoCount'),
+            logoSearch: document.getElementById('logoSearch'),
+            logoSort: document.getElementById('logoSort'),
             addLogoForm: document.getElementById('addLogoForm'),
             addLogoModal: document.getElementById('addLogoModal')
         };
     }
     
+    initializeLists() {
+        this.teamList = new VirtualList(this.elements.teamsContainer, {
+            url: '/api/admin/teams',
+            key: 'teams',
+            rowHeight: 56,
+            params: { sort: 'score' },
+            createRow: () => this.createTeamRow(),
+            updateRow: (row, team) => this.updateTeamRow(row, team),
+            emptyText: (params) => params.q ? 'No teams match your search' : 'No teams registered yet',
+            onTotal: (total) => { this.elements.teamCount.textContent = total; }
+        });
+        
+        this.logoList = new VirtualList(this.elements.logosContainer, {
+            url: '/api/admin/logos',
+            key: 'logos',
+            rowHeight: 72,
+            params: { sort: 'name' },
+            createRow: () => this.createLogoRow(),
+            updateRow: (row, logo) => this.updateLogoRow(row, logo),
+            emptyText: (params) => params.q ? 'No logos match your search' : 'No logos added yet',
+            onTotal: (total) => { this.elements.logoCount.textContent = total; }
+        });
+    }
+    
+    bindListControls(list, search, sort) {
+        let searchTimeout = null;
+        const apply = () => list.setParams({ q: search.value.trim(), sort: sort.value });
+        search.addEventListener('input', () => {
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(apply, SEARCH_DEBOUNCE_MS);
+        });
+        sort.addEventListener('change', apply);
+    }
+    
     bindEvents() {
+        // Search and sort the team and logo lists on the server
+        this.bindListControls(this.teamList, this.elements.teamSearch, this.elements.teamSort);
+        this.bindListControls(this.logoList, this.elements.logoSearch, this.elements.logoSort);
+        
         // Game control buttons
         if (this.elements.startGameBtn) {
             this.elements.startGameBtn.addEventListener('click', () => this.startGame());
@@ -59,15 +258,26 @@ class AdminDashboard {
     }
     
     startStatusUpdates() {
+        this.clock.sync();
         this.updateStatus();
-        this.updateInterval = setInterval(() => {
-            this.updateStatus();
-        }, 2000); // Update every 2 seconds
+    }
+    
+    scheduleUpdate() {
+        // Poll again when the question's deadline passes, or after the usual
+        // interval; admin actions refresh immediately on their own
+        clearTimeout(this.updateInterval);
+        const game = this.currentGameState && this.currentGameState.game;
+        let delay = game ? ACTIVE_POLL_MS : IDLE_POLL_MS;
+        if (game && game.next_change_at) {
+            delay = Math.min(delay, game.next_change_at * 1000 - this.clock.now() + 250);
+        }
+        this.updateInterval = setTimeout(() => this.updateStatus(), Math.max(MIN_POLL_MS, delay));
     }
     
     async updateStatus() {
         try {
-            const response = await fetch('/api/admin/status');
+            // Game state and counts only; the lists fetch just the rows in view
+            const response = await fetch('/api/admin/status?summary=1');
             const data = await response.json();
             
             if (data.error) {
@@ -80,13 +290,15 @@ class AdminDashboard {
             
         } catch (error) {
             console.error('Failed to update status:', error);
+        } finally {
+            this.scheduleUpdate();
         }
     }
     
     updateUI(data) {
         this.updateGameStatus(data.game);
-        this.updateTeams(data.teams);
-        this.updateLogos(data.logos);
+        this.teamList.refresh();
+        this.logoList.refresh();
     }
     
     updateGameStatus(game) {
@@ -141,11 +353,11 @@ class AdminDashboard {
             this.elements.questionsPerRound.textContent = game.questions_per_round || 10;
             
             // Update timer
-            this.updateTimer(game.time_remaining);
+            this.updateTimer(game.question_deadline);
             
             // Set up automatic question progression for active games
             if (game.status === 'active') {
-                this.setupAutoProgress(game.time_remaining);
+                this.setupAutoProgress(game.question_deadline);
             }
             
             // Update next round button
@@ -165,11 +377,12 @@ class AdminDashboard {
         }
     }
     
-    setupAutoProgress(timeRemaining) {
+    setupAutoProgress(deadline) {
         // Clear existing auto-progress
         this.clearAutoProgress();
         
         // Set timer to advance question when time runs out
+        const timeRemaining = deadline ? this.clock.secondsUntil(deadline) : 0;
         if (timeRemaining > 0) {
             this.autoProgressInterval = setTimeout(() => {
                 this.advanceQuestion();
@@ -179,11 +392,18 @@ class AdminDashboard {
     
     async advanceQuestion() {
         try {
+            // Tell the server which question this timer belonged to so a
+            // question that was already closed is not closed twice
+            const game = this.currentGameState && this.currentGameState.game;
             const response = await fetch('/api/admin/next_question', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
+                },
+                body: JSON.stringify(game ? {
+                    round: game.current_round,
+                    question: game.current_question
+                } : {})
             });
             
             const data = await response.json();
@@ -204,38 +424,37 @@ class AdminDashboard {
         }
     }
     
-    updateTimer(timeRemaining) {
+    updateTimer(deadline) {
         const totalTime = 30;
-        const progressPercent = (timeRemaining / totalTime) * 100;
-        
-        this.elements.timeProgress.style.width = `${progressPercent}%`;
-        this.elements.timeRemaining.textContent = `${Math.ceil(timeRemaining)}s`;
         
-        // Change color based on time remaining
-        this.elements.timeProgress.className = 'progress-bar';
-        if (timeRemaining <= 10) {
-            this.elements.timeProgress.classList.add('bg-danger');
-        } else if (timeRemaining <= 20) {
-            this.elements.timeProgress.classList.add('bg-warning');
-        } else {
-            this.elements.timeProgress.classList.add('bg-success');
-        }
+        // Count down to the server's absolute deadline instead of decrementing a copy of time_remaining
+        const render = () => {
+            const timeRemaining = deadline ? this.clock.secondsUntil(deadline) : 0;
+            this.elements.timeProgress.style.width = `${(timeRemaining / totalTime) * 100}%`;
+            this.elements.timeRemaining.textContent = `${Math.ceil(timeRemaining)}s`;
+            
+            // Change color based on time remaining
+            this.elements.timeProgress.className = 'progress-bar';
+            if (timeRemaining <= 10) {
+                this.elements.timeProgress.classList.add('bg-danger');
+            } else if (timeRemaining <= 20) {
+                this.elements.timeProgress.classList.add('bg-warning');
+            } else {
+                this.elements.timeProgress.classList.add('bg-success');
+            }
+            return timeRemaining;
+        };
         
         // Clear existing timer
         this.clearTimer();
         
         // Start countdown timer
-        if (timeRemaining > 0) {
+        if (render() > 0) {
             this.timerInterval = setInterval(() => {
-                timeRemaining--;
-                const newProgressPercent = (timeRemaining / totalTime) * 100;
-                this.elements.timeProgress.style.width = `${newProgressPercent}%`;
-                this.elements.timeRemaining.textContent = `${Math.ceil(Math.max(0, timeRemaining))}s`;
-                
-                if (timeRemaining <= 0) {
+                if (render() <= 0) {
                     this.clearTimer();
                 }
-            }, 1000);
+            }, 250);
         }
     }
     
@@ -246,80 +465,61 @@ class AdminDashboard {
         }
     }
     
-    updateTeams(teams) {
-        if (!teams || teams.length === 0) {
-            this.elements.teamsContainer.innerHTML = '<div class="text-center text-muted">No teams registered yet</div>';
-            return;
-        }
-        
-        // Sort teams by score (descending)
-        const sortedTeams = teams.sort((a, b) => b.score - a.score);
-        
-        let html = '<div class="table-responsive"><table class="table table-striped"><thead><tr><th>Rank</th><th>Team</th><th>Members</th><th>Score</th><th>Actions</th></tr></thead><tbody>';
-        
-        sortedTeams.forEach((team, index) => {
-            const rankIcon = index === 0 ? '🥇' : index === 1 ? '🥈' : index === 2 ? '🥉' : `${index + 1}.`;
-            
-            html += `
-                <tr>
-                    <td><strong>${rankIcon}</strong></td>
-                    <td><strong>${team.name}</strong></td>
-                    <td><small>${team.members.join(', ')}</small></td>
-                    <td><span class="badge bg-primary">${team.score}</span></td>
-                    <td>
-                        <button class="btn btn-sm btn-outline-danger" onclick="adminDashboard.removeTeam(${team.id})" title="Remove Team">
-                            <i class="fas fa-trash"></i>
-                        </button>
-                    </td>
-                </tr>
-            `;
-        });
-        
-        html += '</tbody></table></div>';
-        this.elements.teamsContainer.innerHTML = html;
+    createTeamRow() {
+        const row = document.createElement('div');
+        row.className = 'virtual-row';
+        row.innerHTML = `
+            <strong class="list-rank"></strong>
+            <div class="flex-grow-1 text-truncate">
+                <strong class="team-name"></strong><br>
+                <small class="team-members text-muted"></small>
+            </div>
+            <span class="badge bg-primary team-score"></span>
+            <button class="btn btn-sm btn-outline-danger" title="Remove Team">
+                <i class="fas fa-trash"></i>
+            </button>
+        `;
+        return row;
     }
     
-    updateLogos(logos) {
-        if (!logos || logos.length === 0) {
-            this.elements.logosContainer.innerHTML = '<div class="text-center text-muted">No logos added yet</div>';
-            return;
+    updateTeamRow(row, team) {
+        const rankIcon = team.rank === 1 ? '🥇' : team.rank === 2 ? '🥈' : team.rank === 3 ? '🥉' : `${team.rank}.`;
+        row.querySelector('.list-rank').textContent = rankIcon;
+        row.querySelector('.team-name').textContent = team.name;
+        row.querySelector('.team-members').textContent = team.members.join(', ');
+        row.querySelector('.team-score').textContent = team.score;
+        row.querySelector('button').onclick = () => this.removeTeam(team.id);
+    }
+    
+    createLogoRow() {
+        const row = document.createElement('div');
+        row.className = 'virtual-row';
+        row.innerHTML = `
+            <img class="list-thumbnail rounded" loading="lazy" alt="">
+            <div class="flex-grow-1 text-truncate">
+                <h6 class="logo-name mb-0 text-truncate"></h6>
+                <small><strong>Answer:</strong> <span class="logo-answer"></span></small><br>
+                <small class="text-muted"><strong>Alternatives:</strong> <span class="logo-alternatives"></span></small>
+            </div>
+            <button class="btn btn-sm btn-outline-danger" title="Delete Logo">
+                <i class="fas fa-trash"></i>
+            </button>
+        `;
+        return row;
+    }
+    
+    updateLogoRow(row, logo) {
+        const image = row.querySelector('img');
+        if (image.getAttribute('src') !== logo.image_url) {
+            image.src = logo.image_url;
         }
-        
-        let html = '';
-        logos.forEach(logo => {
-            const alternativesList = logo.alternative_answers.length > 0 
-                ? logo.alternative_answers.join(', ') 
-                : 'None';
-            
-            html += `
-                <div class="card mb-3">
-                    <div class="row g-0">
-                        <div class="col-md-4">
-                            <img src="${logo.image_url}" class="img-fluid rounded-start h-100 object-fit-cover" 
-                                 alt="${logo.name}" style="max-height: 120px; object-fit: contain;">
-                        </div>
-                        <div class="col-md-8">
-                            <div class="card-body">
-                                <div class="d-flex justify-content-between align-items-start">
-                                    <div>
-                                        <h6 class="card-title">${logo.name}</h6>
-                                        <p class="card-text">
-                                            <small><strong>Answer:</strong> ${logo.correct_answer}</small><br>
-                                            <small><strong>Alternatives:</strong> ${alternativesList}</small>
-                                        </p>
-                                    </div>
-                                    <button class="btn btn-sm btn-outline-danger" onclick="adminDashboard.deleteLogo(${logo.id})">
-                                        <i class="fas fa-trash"></i>
-                                    </button>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            `;
-        });
-        
-        this.elements.logosContainer.innerHTML = html;
+        image.alt = logo.name;
+        row.querySelector('.logo-name').textContent = logo.name;
+        row.querySelector('.logo-answer').textContent = logo.correct_answer;
+        row.querySelector('.logo-alternatives').textContent = logo.alternative_answers.length > 0
+            ? logo.alternative_answers.join(', ')
+            : 'None';
+        row.querySelector('button').onclick = () => this.deleteLogo(logo.id);
     }
     
     async startGame() {
@@ -573,9 +773,7 @@ class AdminDashboard {
     }
     
     destroy() {
-        if (this.updateInterval) {
-            clearInterval(this.updateInterval);
-        }
+        clearTimeout(this.updateInterval);
         this.clearTimer();
         this.clearAutoProgress();
     }
@@ -0,0 +1,36 @@
+// Offset between this browser's clock and the server's, so countdowns can
+// run against the server's absolute question deadline
+class ServerClock {
+    constructor() {
+        this.offset = 0;
+        this.roundTrip = Infinity;
+    }
+    
+    async sync(samples = 3) {
+        for (let i = 0; i < samples; i++) {
+            try {
+                const sent = Date.now();
+                const response = await fetch('/api/time', { cache: 'no-store' });
+                const data = await response.json();
+                const received = Date.now();
+                
+                // The fastest round trip gives the tightest estimate of when the server read its clock
+                if (received - sent < this.roundTrip) {
+                    this.roundTrip = received - sent;
+                    this.offset = data.server_time * 1000 - (sent + received) / 2;
+                }
+            } catch (error) {
+                console.error('Failed to sync clock:', error);
+            }
+        }
+    }
+    
+    now() {
+        return Date.now() + this.offset;
+    }
+    
+    secondsUntil(timestamp) {
+        // timestamp is a server Unix time in seconds
+        return Math.max(0, timestamp * 1000 - this.now()) / 1000;
+    }
+}
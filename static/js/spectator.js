@@ -0,0 +1,177 @@
+// Poll this often when the server has no push stream
+const SPECTATOR_POLL_MS = 2000;
+
+class SpectatorView {
+    constructor() {
+        this.state = null;
+        this.etag = null;
+        this.source = null;
+        this.clock = new ServerClock();
+        this.pollTimeout = null;
+        this.timerInterval = null;
+        
+        this.initializeElements();
+        this.clock.sync();
+        this.connect();
+    }
+    
+    initializeElements() {
+        this.elements = {
+            waitingMessage: document.getElementById('waitingMessage'),
+            gameActive: document.getElementById('gameActive'),
+            roundInfo: document.getElementById('roundInfo'),
+            questionInfo: document.getElementById('questionInfo'),
+            timeRemaining: document.getElementById('timeRemaining'),
+            currentLogo: document.getElementById('currentLogo'),
+            guessCount: document.getElementById('guessCount'),
+            leaderboard: document.getElementById('leaderboard')
+        };
+    }
+    
+    connect() {
+        // Pushed updates when the server runs in streaming mode (asgi.py), conditional polling otherwise
+        if (!window.EventSource) {
+            this.poll();
+            return;
+        }
+        let received = false;
+        this.source = new EventSource('/api/stream/spectator');
+        this.source.onmessage = (event) => {
+            received = true;
+            this.updateUI(JSON.parse(event.data));
+        };
+        this.source.onerror = () => {
+            // Once connected EventSource reconnects by itself; a stream that never opened is not there
+            if (!received) {
+                this.source.close();
+                this.source = null;
+                this.poll();
+            }
+        };
+    }
+    
+    async poll() {
+        try {
+            // no-cache revalidates with If-None-Match, so an unchanged frame costs a 304
+            const response = await fetch('/api/spectator/status', { cache: 'no-cache' });
+            const etag = response.headers.get('ETag');
+            if (response.ok && (etag === null || etag !== this.etag)) {
+                this.etag = etag;
+                this.updateUI(await response.json());
+            }
+        } catch (error) {
+            console.error('Failed to update spectator view:', error);
+        }
+        this.schedulePoll();
+    }
+    
+    schedulePoll() {
+        // Poll every couple of seconds, and just after the question's deadline
+        let delay = SPECTATOR_POLL_MS;
+        const game = this.state && this.state.game;
+        if (game && game.next_change_at) {
+            const untilChange = game.next_change_at * 1000 - this.clock.now() + 250;
+            if (untilChange > 0) {
+                delay = Math.min(delay, untilChange);
+            }
+        }
+        this.pollTimeout = setTimeout(() => this.poll(), delay);
+    }
+    
+    updateUI(state) {
+        this.state = state;
+        const game = state.game;
+        
+        if (!game) {
+            this.elements.waitingMessage.style.display = 'block';
+            this.elements.gameActive.style.display = 'none';
+            this.clearTimer();
+        } else {
+            this.elements.waitingMessage.style.display = 'none';
+            this.elements.gameActive.style.display = 'block';
+            this.elements.roundInfo.textContent = `Round ${game.current_round} of ${game.total_rounds}`;
+            this.elements.questionInfo.textContent = `Question ${game.current_question} of ${game.questions_per_round}`;
+            this.elements.guessCount.textContent = `${game.guesses} of ${game.teams}`;
+            
+            if (game.logo_url) {
+                this.elements.currentLogo.src = game.logo_url;
+                this.elements.currentLogo.style.display = 'block';
+            } else {
+                this.elements.currentLogo.style.display = 'none';
+            }
+            
+            this.updateTimer(game.question_deadline);
+        }
+        
+        this.updateLeaderboard(state.leaderboard);
+    }
+    
+    updateTimer(deadline) {
+        const render = () => {
+            const timeRemaining = deadline ? this.clock.secondsUntil(deadline) : 0;
+            this.elements.timeRemaining.textContent = Math.ceil(timeRemaining);
+            return timeRemaining;
+        };
+        
+        this.clearTimer();
+        if (render() > 0) {
+            this.timerInterval = setInterval(() => {
+                if (render() <= 0) {
+                    this.clearTimer();
+                }
+            }, 250);
+        }
+    }
+    
+    clearTimer() {
+        if (this.timerInterval) {
+            clearInterval(this.timerInterval);
+            this.timerInterval = null;
+        }
+    }
+    
+    updateLeaderboard(teams) {
+        const leaderboard = this.elements.leaderboard;
+        if (!teams || teams.length === 0) {
+            leaderboard.innerHTML = '<div class="text-center text-muted">No teams registered yet</div>';
+            return;
+        }
+        
+        // Built with textContent: team names come from the public registration form
+        leaderboard.replaceChildren(...teams.map((team, index) => {
+            const row = document.createElement('div');
+            row.className = 'd-flex justify-content-between align-items-center py-2 px-3 mb-2 rounded';
+            row.style.backgroundColor = 'rgba(255, 255, 255, 0.05)';
+            
+            const name = document.createElement('div');
+            const rank = document.createElement('span');
+            rank.className = 'badge bg-secondary me-3';
+            rank.textContent = index + 1;
+            const strong = document.createElement('strong');
+            strong.textContent = team.name;
+            name.append(rank, strong);
+            
+            const score = document.createElement('h5');
+            score.className = 'mb-0 ' + (index === 0 ? 'text-warning' : 'text-muted');
+            score.textContent = team.score;
+            
+            row.append(name, score);
+            return row;
+        }));
+    }
+    
+    destroy() {
+        clearTimeout(this.pollTimeout);
+        if (this.source) {
+            this.source.close();
+        }
+        this.clearTimer();
+    }
+}
+
+// Handle page unload
+window.addEventListener('beforeunload', () => {
+    if (window.spectatorView) {
+        window.spectatorView.destroy();
+    }
+});
@@ -1,8 +1,25 @@
+// Guess submission: an attempt that gets no answer within the timeout is
+// retried with the same idempotency key, so a retry never records a second guess
+const GUESS_TIMEOUT_MS = 8000;
+const GUESS_ATTEMPTS = 4;
+
+// Status polling when the server does not offer long-polling: often while the
+// team has a question to answer, rarely while idle, never faster than MIN_POLL_MS
+const MIN_POLL_MS = 1000;
+const ACTIVE_POLL_MS = 2000;
+const IDLE_POLL_MS = 15000;
+const ERROR_POLL_MS = 2000;
+
 class TeamDashboard {
     constructor(teamName) {
         this.teamName = teamName;
+        this.teamToken = localStorage.getItem(`teamToken:${teamName}`);
         this.currentGameState = null;
-        this.updateInterval = null;
+        this.version = null;
+        this.polling = false;
+        this.retryAfter = 0;
+        this.pendingGuess = null;
+        this.clock = new ServerClock();
         this.timerInterval = null;
         
         this.initializeElements();
@@ -40,32 +57,97 @@ class TeamDashboard {
         }
     }
     
-    startStatusUpdates() {
-        this.updateStatus();
-        this.updateInterval = setInterval(() => {
-            this.updateStatus();
-        }, 2000); // Update every 2 seconds
+    async startStatusUpdates() {
+        // Countdowns read the clock on every tick, so they pick up the offset once it arrives
+        this.clock.sync();
+        
+        // Long-poll where the server offers it: each request is held until the game state
+        // changes or the current question's deadline passes, whichever comes first.
+        // Otherwise schedule each poll from the state the last one returned
+        this.polling = true;
+        while (this.polling) {
+            const started = Date.now();
+            const longPoll = Boolean(this.currentGameState && this.currentGameState.long_poll);
+            const ok = await this.updateStatus(longPoll);
+            let pause = longPoll ? MIN_POLL_MS - (Date.now() - started) : this.pollDelay(this.currentGameState);
+            // Back off after errors, and for as long as a 429 asks
+            if (!ok) {
+                pause = Math.max(pause, ERROR_POLL_MS);
+            }
+            pause = Math.max(pause, this.retryAfter * 1000);
+            this.retryAfter = 0;
+            if (pause > 0) {
+                await new Promise(resolve => setTimeout(resolve, pause));
+            }
+        }
+    }
+    
+    pollDelay(state) {
+        // Before and after a game nothing changes without an admin, so poll rarely
+        if (!state || state.game_status !== 'active') {
+            return IDLE_POLL_MS;
+        }
+        let untilChange = Infinity;
+        if (state.next_change_at) {
+            untilChange = state.next_change_at * 1000 - this.clock.now() + 250;
+        }
+        // Once the team has guessed, stay quiet until the question's deadline
+        if (state.has_guessed && untilChange > 0 && untilChange !== Infinity) {
+            return Math.max(MIN_POLL_MS, untilChange);
+        }
+        return Math.max(MIN_POLL_MS, Math.min(ACTIVE_POLL_MS, untilChange));
+    }
+    
+    teamHeaders(headers = {}) {
+        if (this.teamToken) {
+            headers['X-Team-Token'] = this.teamToken;
+        }
+        return headers;
     }
     
-    async updateStatus() {
+    async updateStatus(longPoll = false) {
         try {
-            const response = await fetch(`/api/status/${encodeURIComponent(this.teamName)}`);
+            // With a token the server identifies the team without a name lookup
+            let url = this.teamToken ? '/api/status' : `/api/status/${encodeURIComponent(this.teamName)}`;
+            if (longPoll && this.version !== null) {
+                url += `?since=${this.version}&wait=25`;
+            }
+            const response = await fetch(url, { headers: this.teamHeaders() });
             const data = await response.json();
             
             if (data.error) {
+                this.retryAfter = Number(response.headers.get('Retry-After')) || 0;
                 console.error('Error:', data.error);
-                return;
+                return false;
+            }
+            
+            if (data.version !== undefined) {
+                this.version = data.version;
+            }
+            
+            // The server re-issues the token once the team is enrolled in a game
+            if (data.team_token) {
+                this.teamToken = data.team_token;
+                localStorage.setItem(`teamToken:${this.teamName}`, data.team_token);
             }
             
             this.currentGameState = data;
             this.updateUI(data);
+            return true;
             
         } catch (error) {
             console.error('Failed to update status:', error);
+            return false;
         }
     }
     
     updateUI(gameState) {
+        // A guess left pending on an earlier question must not reuse its key on the next one
+        if (this.pendingGuess && (this.pendingGuess.round !== gameState.current_round ||
+                this.pendingGuess.question !== gameState.current_question)) {
+            this.pendingGuess = null;
+        }
+        
         // Update score
         if (this.elements.teamScore) {
             this.elements.teamScore.textContent = gameState.team_score;
@@ -116,7 +198,7 @@ class TeamDashboard {
         }
         
         // Update timer
-        this.updateTimer(gameState.time_remaining);
+        this.updateTimer(gameState.question_deadline);
         
         // Update guess form state
         this.updateGuessForm(gameState);
@@ -134,26 +216,26 @@ class TeamDashboard {
         this.clearTimer();
     }
     
-    updateTimer(timeRemaining) {
-        if (this.elements.timeRemaining) {
-            this.elements.timeRemaining.textContent = Math.ceil(timeRemaining);
-        }
+    updateTimer(deadline) {
+        // Count down to the server's absolute deadline instead of decrementing a copy of time_remaining
+        const render = () => {
+            const timeRemaining = deadline ? this.clock.secondsUntil(deadline) : 0;
+            if (this.elements.timeRemaining) {
+                this.elements.timeRemaining.textContent = Math.ceil(timeRemaining);
+            }
+            return timeRemaining;
+        };
         
         // Clear existing timer
         this.clearTimer();
         
         // Start new timer if round is active
-        if (timeRemaining > 0) {
+        if (render() > 0) {
             this.timerInterval = setInterval(() => {
-                timeRemaining--;
-                if (this.elements.timeRemaining) {
-                    this.elements.timeRemaining.textContent = Math.ceil(Math.max(0, timeRemaining));
-                }
-                
-                if (timeRemaining <= 0) {
+                if (render() <= 0) {
                     this.clearTimer();
                 }
-            }, 1000);
+            }, 250);
         }
     }
     
@@ -191,6 +273,58 @@ class TeamDashboard {
         }
     }
     
+    newIdempotencyKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+    
+    async sendGuess(pending) {
+        // Timeouts, network errors, overload and server errors are retried with
+        // the same key; the server answers a retry of a stored guess with its outcome
+        let lastError = null;
+        let delay = 0;
+        for (let attempt = 0; attempt < GUESS_ATTEMPTS; attempt++) {
+            if (delay) {
+                await new Promise(resolve => setTimeout(resolve, delay));
+            }
+            const controller = new AbortController();
+            const timeout = setTimeout(() => controller.abort(), GUESS_TIMEOUT_MS);
+            try {
+                const response = await fetch('/api/submit_guess', {
+                    method: 'POST',
+                    headers: this.teamHeaders({
+                        'Content-Type': 'application/json',
+                        'Idempotency-Key': pending.key
+                    }),
+                    body: JSON.stringify({
+                        team_name: this.teamName,
+                        guess: pending.text,
+                        current_round: pending.round,
+                        current_question: pending.question
+                    }),
+                    signal: controller.signal
+                });
+                
+                // A Retry-After (rate limit, overload, or the first attempt still running) means try again
+                const retryAfter = Number(response.headers.get('Retry-After')) || 0;
+                if (retryAfter || response.status >= 500) {
+                    lastError = new Error(`Server answered ${response.status}`);
+                    delay = Math.max(1000 * 2 ** attempt, retryAfter * 1000);
+                    continue;
+                }
+                return await response.json();
+            } catch (error) {
+                lastError = error;
+                delay = 1000 * 2 ** attempt;
+            } finally {
+                clearTimeout(timeout);
+            }
+        }
+        throw lastError;
+    }
+    
     async submitGuess() {
         const guess = this.elements.guessInput.value.trim();
         
@@ -199,31 +333,39 @@ class TeamDashboard {
             return;
         }
         
+        // Submitting the same guess to the same question again reuses its key; anything else gets a new one
+        const state = this.currentGameState || {};
+        if (!this.pendingGuess || this.pendingGuess.text !== guess ||
+                this.pendingGuess.round !== state.current_round || this.pendingGuess.question !== state.current_question) {
+            this.pendingGuess = {
+                text: guess,
+                key: this.newIdempotencyKey(),
+                round: state.current_round,
+                question: state.current_question
+            };
+        }
+        
         try {
             // Disable form while submitting
             this.elements.guessInput.disabled = true;
             this.elements.submitBtn.disabled = true;
             this.elements.submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Submitting...';
             
-            const response = await fetch('/api/submit_guess', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    team_name: this.teamName,
-                    guess: guess
-                })
-            });
-            
-            const data = await response.json();
+            const data = await this.sendGuess(this.pendingGuess);
             
             if (data.success) {
+                this.pendingGuess = null;
                 this.showGuessResult(data.is_correct, data.correct_answer);
                 // Clear the input
                 this.elements.guessInput.value = '';
                 // Update status immediately
                 this.updateStatus();
+            } else if (data.duplicate) {
+                // An earlier attempt (or a teammate) already answered; the status shows it
+                this.pendingGuess = null;
+                this.elements.guessInput.value = '';
+                alert(data.error);
+                this.updateStatus();
             } else {
                 alert(data.error || 'Failed to submit guess');
                 // Re-enable form
@@ -242,37 +384,15 @@ class TeamDashboard {
         }
     }
     
-    showGuessResult(isCorrect, correctAnswer) {
-        if (!this.elements.guessStatus || !this.elements.guessAlert || !this.elements.guessMessage) {
-            return;
-        }
-        
-        this.elements.guessStatus.style.display = 'block';
-        
-        if (isCorrect) {
-            this.elements.guessAlert.className = 'alert alert-success';
-            this.elements.guessMessage.innerHTML = '<i class="fas fa-check-circle me-2"></i>Correct! Well done!';
-        } else {
-            this.elements.guessAlert.className = 'alert alert-info';
-            this.elements.guessMessage.innerHTML = '<i class="fas fa-info-circle me-2"></i>Guess submitted. Wait for the round to end to see the correct answer.';
-        }
-        
-        // Hide after 3 seconds
-        setTimeout(() => {
-            if (this.elements.guessStatus) {
-                this.elements.guessStatus.style.display = 'none';
-            }
-        }, 3000);
-    }
-    
     async updateLeaderboard() {
         try {
-            const response = await fetch('/api/admin/status');
+            // The spectator view is shared by every client and revalidated by ETag; it carries no answers
+            const response = await fetch('/api/spectator/status');
             const data = await response.json();
             
-            if (data.teams && this.elements.leaderboard) {
-                // Sort teams by score
-                const sortedTeams = data.teams.sort((a, b) => b.score - a.score);
+            if (data.leaderboard && this.elements.leaderboard) {
+                // Already sorted by score
+                const sortedTeams = data.leaderboard;
                 
                 let html = '';
                 sortedTeams.forEach((team, index) => {
@@ -288,8 +408,6 @@ class TeamDashboard {
                                 <div>
                                     <strong>${team.name}</strong>
                                     ${isCurrentTeam ? '<small class="text-primary ms-2">(Your Team)</small>' : ''}
-                                    <br>
-                                    <small class="text-muted">${team.members.join(', ')}</small>
                                 </div>
                             </div>
                             <div class="text-end">
@@ -311,9 +429,7 @@ class TeamDashboard {
     }
     
     destroy() {
-        if (this.updateInterval) {
-            clearInterval(this.updateInterval);
-        }
+        this.polling = false;
         this.clearTimer();
     }
 }
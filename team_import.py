@@ -0,0 +1,208 @@
+"""
+Bulk team registration.
+
+    flask --app main import-teams teams.csv [--enroll] [--output results.json]
+
+CSV files have a header row with team_name and members columns, members
+separated by semicolons. NDJSON files have one {"team_name": ..., "members":
+[...]} object per line. Rows are validated in memory, names are checked
+against existing teams with set-based queries and new teams are inserted in
+batches inside one transaction, so thousands of teams take seconds.
+"""
+
+import io
+import re
+import csv
+import json
+import time
+import logging
+import click
+from datetime import datetime
+from sqlalchemy import select, insert
+from models import db, Team, Game, GameTeam
+from auth import issue_team_token
+
+logger = logging.getLogger('autoquizer.team')
+
+# Letters, numbers, spaces and hyphens, as on the registration form
+TEAM_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9\s\-]+$')
+TEAM_NAME_MAX_LENGTH = 100
+
+MEMBER_SEPARATOR = ';'
+
+# As on the registration form, which allows up to ten members
+MAX_MEMBERS = 10
+MEMBER_NAME_MAX_LENGTH = 100
+
+# Rows per INSERT and names per IN (...) lookup, well under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+# Largest upload accepted in one request
+MAX_IMPORT_ROWS = 10000
+
+def validate_team(team_name, members):
+    """Error message for a registration, or None if it is valid"""
+    if not team_name:
+        return 'Team name is required'
+    if not TEAM_NAME_PATTERN.match(team_name):
+        return 'Team name can only contain letters, numbers, spaces, and hyphens'
+    if len(team_name) > TEAM_NAME_MAX_LENGTH:
+        return f'Team name can be at most {TEAM_NAME_MAX_LENGTH} characters'
+    if not isinstance(members, list) or not all(isinstance(member, str) for member in members):
+        return 'Members must be a list of names'
+    if not members:
+        return 'At least one team member is required'
+    if len(members) > MAX_MEMBERS:
+        return f'A team can have at most {MAX_MEMBERS} members'
+    if not all(members):
+        return 'Member names cannot be empty'
+    if any(len(member) > MEMBER_NAME_MAX_LENGTH for member in members):
+        return f'Member names can be at most {MEMBER_NAME_MAX_LENGTH} characters'
+    return None
+
+def clean_members(members):
+    """Member names with surrounding whitespace stripped; anything but a list of strings is left for validate_team"""
+    if isinstance(members, list) and all(isinstance(member, str) for member in members):
+        return [member.strip() for member in members]
+    return members
+
+def _split_members(members):
+    return [member.strip() for member in members.split(MEMBER_SEPARATOR) if member.strip()]
+
+def parse_csv(text):
+    """Rows of a CSV upload with team_name and members columns"""
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or 'team_name' not in reader.fieldnames:
+        raise ValueError('CSV needs a header row with team_name and members columns')
+    return [{'team_name': row.get('team_name'), 'members': row.get('members') or ''} for row in reader]
+
+def parse_ndjson(text):
+    """Rows of an NDJSON upload; lines that are not JSON become None and are reported per row"""
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            rows.append(None)
+    return rows
+
+def parse_upload(text, format):
+    if format == 'csv':
+        return parse_csv(text)
+    if format == 'ndjson':
+        return parse_ndjson(text)
+    raise ValueError(f'Unknown format {format!r}; use csv or ndjson')
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def register_teams(rows, game_manager, enroll=False, batch_size=BATCH_SIZE):
+    """Register every valid row; returns a summary with one result per row.
+
+    Rows are dicts with team_name and members (a list, or a string separated
+    by semicolons). With enroll, the new teams join the active game. Nothing
+    is committed when a name is taken concurrently (IntegrityError).
+    """
+    started = time.perf_counter()
+    results = []
+    pending = {}
+    for number, row in enumerate(rows, 1):
+        result = {'row': number}
+        results.append(result)
+        if not isinstance(row, dict):
+            result.update(status='error', error='Row must be an object with team_name and members')
+            continue
+        team_name = str(row.get('team_name') or '').strip()
+        members = row.get('members') or []
+        if isinstance(members, str):
+            members = _split_members(members)
+        members = clean_members(members)
+        result['team_name'] = team_name
+        error = validate_team(team_name, members)
+        if error is None and team_name in pending:
+            error = 'Team name appears more than once in the upload'
+        if error is not None:
+            result.update(status='error', error=error)
+            continue
+        pending[team_name] = (result, members)
+
+    # One IN (...) query per batch instead of a lookup per team
+    names = list(pending)
+    for chunk in _chunks(names, batch_size):
+        for team_name in db.session.scalars(select(Team.name).where(Team.name.in_(chunk))):
+            result, _ = pending.pop(team_name)
+            result.update(status='error', error='Team name already exists')
+
+    game = Game.query.filter_by(status='active').first() if enroll else None
+    now = datetime.utcnow()
+    created = []
+    for chunk in _chunks(list(pending.values()), batch_size):
+        team_ids = db.session.scalars(
+            insert(Team).returning(Team.id, sort_by_parameter_order=True),
+            [
+                {'name': result['team_name'], 'members': json.dumps(members), 'score': 0, 'created_at': now}
+                for result, members in chunk
+            ]
+        ).all()
+        for (result, _), team_id in zip(chunk, team_ids):
+            result.update(status='created', team_id=team_id)
+            created.append(team_id)
+
+    if game is not None and created:
+        for chunk in _chunks(created, batch_size):
+            db.session.execute(insert(GameTeam), [
+                {'game_id': game.id, 'team_id': team_id, 'joined_at': now} for team_id in chunk
+            ])
+        game_manager.record_event(game, 'teams_enrolled', team_ids=created)
+    if created:
+        game_manager.mark_changed()
+    db.session.commit()
+
+    # Tokens after the commit, so none is handed out for a team that was rolled back
+    game_id = game.id if game is not None and created else None
+    for result in results:
+        if result.get('status') == 'created':
+            result['team_token'] = issue_team_token(result['team_id'], game_id)
+
+    logger.info(
+        "Bulk registration: %s teams created, %s rejected in %.0f ms",
+        len(created), len(results) - len(created), (time.perf_counter() - started) * 1000
+    )
+    return {
+        'created': len(created),
+        'failed': len(results) - len(created),
+        'enrolled_game_id': game_id,
+        'results': results
+    }
+
+def register_commands(app, game_manager):
+    """Add `flask import-teams` to the app's CLI"""
+
+    @app.cli.command('import-teams')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']),
+                  help='File format; taken from the extension when omitted')
+    @click.option('--enroll', is_flag=True, help='Enroll the new teams in the active game')
+    @click.option('--output', type=click.Path(dir_okay=False), help='Write per-row results (with team tokens) as JSON')
+    def import_teams_command(path, format, enroll, output):
+        """Register teams from a CSV or NDJSON file"""
+        if format is None:
+            format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            rows = parse_upload(f.read(), format)
+        started = time.perf_counter()
+        summary = register_teams(rows, game_manager, enroll=enroll)
+        for result in summary['results']:
+            if result['status'] == 'error':
+                click.echo(f"row {result['row']}: {result.get('team_name') or '-'}: {result['error']}", err=True)
+        if output:
+            with open(output, 'w') as f:
+                json.dump(summary, f, indent=2)
+        click.echo(
+            f"{summary['created']} teams created, {summary['failed']} rejected "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            + (f", enrolled in game {summary['enrolled_game_id']}" if summary['enrolled_game_id'] else '')
+        )
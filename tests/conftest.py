@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Set before app.py is imported: no event log files and no rate limits
+os.environ['EVENT_LOG_ENABLED'] = '0'
+os.environ['RATE_LIMITS'] = '0'
+
+from sqlalchemy import select
+from app import create_app, game_manager
+from models import db, Logo, Game
+import db_setup
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh SQLite file with a small logo catalog"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'game.db'}"
+    })
+    with app.app_context():
+        db_setup.init_db(seed=False)
+        for index in range(5):
+            db.session.add(Logo(
+                name=f'Logo {index}',
+                image_url=f'/static/logos/{index}.png',
+                correct_answer=f'brand {index}',
+                alternative_answers=json.dumps([])
+            ))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        # Game ids restart in the next test's database, so drop what is cached for these
+        for game_id in db.session.scalars(select(Game.id)).all():
+            game_manager.discard_game(game_id)
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['is_admin'] = True
+    return client
+
+def register_teams(client, names):
+    """Register teams and enroll them in the active game; returns their tokens by name"""
+    tokens = {}
+    for name in names:
+        token = client.post('/api/register_team', json={'team_name': name, 'members': ['a']}).get_json()['team_token']
+        status = client.get('/api/status', headers={'X-Team-Token': token}).get_json()
+        tokens[name] = status.get('team_token', token)
+    return tokens
@@ -0,0 +1,63 @@
+import threading
+from sqlalchemy import select, func
+from app import game_manager
+from models import db, Game, Guess, QuestionResult
+from conftest import register_teams
+
+CLOSERS = 4
+
+def test_concurrent_close_finalizes_question_once(app, admin_client):
+    assert admin_client.post('/api/admin/start_game').status_code == 200
+    tokens = register_teams(admin_client, ['red', 'green', 'blue', 'gold'])
+    for name in ('red', 'green'):
+        response = admin_client.post('/api/submit_guess', json={'guess': 'nope'},
+                                     headers={'X-Team-Token': tokens[name]})
+        assert response.status_code == 200
+
+    with app.app_context():
+        game_id = db.session.scalar(select(Game.id))
+
+    # Every closer loads the game at question 1 before any of them closes it
+    barrier = threading.Barrier(CLOSERS)
+    outcomes = []
+    errors = []
+
+    def close():
+        try:
+            with app.app_context():
+                game = db.session.get(Game, game_id)
+                assert game.current_question == 1
+                barrier.wait()
+                outcomes.append(game_manager.close_question(game))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=close) for _ in range(CLOSERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(outcomes) == [False] * (CLOSERS - 1) + [True]
+
+    with app.app_context():
+        results = db.session.scalars(select(QuestionResult).where(QuestionResult.game_id == game_id)).all()
+        assert len(results) == 1
+        assert (results[0].round_number, results[0].question_number) == (1, 1)
+        assert results[0].incorrect_count == 2
+        assert results[0].missing_count == 2
+
+        # One placeholder for each team that did not guess, and one row per team
+        rows = db.session.execute(
+            select(Guess.team_id, func.count(), func.sum(Guess.is_placeholder))
+            .where(Guess.game_id == game_id, Guess.question_number == 1)
+            .group_by(Guess.team_id)
+        ).all()
+        assert len(rows) == 4
+        assert all(count == 1 for _, count, _ in rows)
+        assert sum(placeholders for _, _, placeholders in rows) == 2
+
+        # The game advanced exactly once
+        game = db.session.get(Game, game_id)
+        assert (game.current_round, game.current_question) == (1, 2)
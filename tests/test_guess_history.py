@@ -0,0 +1,53 @@
+from sqlalchemy import select
+from app import game_manager
+from models import db, Game, ArchivedGame
+from conftest import register_teams
+
+TEAMS = ['red', 'green', 'blue', 'gold', 'pink']
+QUESTIONS = 3
+
+def page_through(client, game_id, limit):
+    """Every guess of the game by following next_cursor, and the number of pages"""
+    guesses, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/admin/games/{game_id}/guesses?limit={limit}'
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        guesses.extend(body['guesses'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            return guesses, pages
+
+def test_cursor_pages_over_archived_game(app, admin_client):
+    assert admin_client.post('/api/admin/start_game').status_code == 200
+    tokens = register_teams(admin_client, TEAMS)
+    with app.app_context():
+        game_id = db.session.scalar(select(Game.id))
+
+    for question in range(QUESTIONS):
+        # Some teams answer; closing the question adds placeholders for the rest
+        for name in TEAMS[:question + 2]:
+            response = admin_client.post('/api/submit_guess', json={'guess': f'guess {question}'},
+                                         headers={'X-Team-Token': tokens[name]})
+            assert response.status_code == 200
+        with app.app_context():
+            assert game_manager.close_question(db.session.get(Game, game_id))
+
+    live = admin_client.get(f'/api/admin/games/{game_id}/guesses?limit=1000').get_json()['guesses']
+    assert len(live) == QUESTIONS * len(TEAMS)
+
+    assert admin_client.post('/api/admin/stop_game').status_code == 200
+    with app.app_context():
+        assert db.session.get(ArchivedGame, game_id) is not None
+
+    archived, pages = page_through(admin_client, game_id, limit=4)
+    assert pages > 1
+    assert archived == live
+    keys = [(g['round_number'], g['question_number'], g['team_id']) for g in archived]
+    assert keys == sorted(set(keys))
+
+def test_invalid_cursor(admin_client):
+    response = admin_client.get('/api/admin/games/1/guesses?cursor=not-a-cursor')
+    assert response.status_code == 400
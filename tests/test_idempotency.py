@@ -0,0 +1,62 @@
+import uuid
+from sqlalchemy import select, func
+import app as app_module
+from models import db, Game, Guess, Logo
+from conftest import register_teams
+
+def start_with_team(app, client):
+    """Start a game with one enrolled team; returns its token and the current answer"""
+    assert client.post('/api/admin/start_game').status_code == 200
+    token = register_teams(client, ['red'])['red']
+    with app.app_context():
+        game = db.session.scalar(select(Game).where(Game.status == 'active'))
+        answer = db.session.get(Logo, game.current_logo_id).correct_answer
+    return token, answer
+
+def guess_count(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(Guess))
+
+def submit(client, token, guess, key):
+    return client.post('/api/submit_guess', json={'guess': guess},
+                       headers={'X-Team-Token': token, 'Idempotency-Key': key})
+
+def test_retry_replays_first_outcome(app, admin_client):
+    token, answer = start_with_team(app, admin_client)
+    key = str(uuid.uuid4())
+
+    first = submit(admin_client, token, answer, key)
+    assert first.status_code == 200
+    assert first.get_json()['is_correct'] is True
+
+    retry = submit(admin_client, token, answer, key)
+    assert retry.status_code == 200
+    assert retry.get_json() == {**first.get_json(), 'replayed': True}
+    assert guess_count(app) == 1
+
+def test_key_reused_for_another_guess_is_rejected(app, admin_client):
+    token, answer = start_with_team(app, admin_client)
+    key = str(uuid.uuid4())
+
+    assert submit(admin_client, token, answer, key).status_code == 200
+    response = submit(admin_client, token, 'something else', key)
+    assert response.status_code == 422
+    assert guess_count(app) == 1
+
+def test_server_error_releases_key(app, admin_client, monkeypatch):
+    token, answer = start_with_team(app, admin_client)
+    key = str(uuid.uuid4())
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('database unavailable')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(app_module, 'record_guess', fail)
+        assert submit(admin_client, token, answer, key).status_code == 500
+    assert guess_count(app) == 0
+
+    # The failure was not kept, so the retry runs instead of replaying the 500
+    retry = submit(admin_client, token, answer, key)
+    assert retry.status_code == 200
+    assert 'replayed' not in retry.get_json()
+    assert guess_count(app) == 1
@@ -0,0 +1,69 @@
+from datetime import datetime
+from sqlalchemy import select, text
+from models import db, Team, Game, Guess, Answer, QuestionResult
+import db_setup
+
+CLOSED_AT = datetime(2025, 1, 1, 12, 0, 30)
+
+# The guess table as it was before answers were dictionary-encoded
+LEGACY_GUESS_TABLE = """
+    CREATE TABLE guess (
+        id INTEGER PRIMARY KEY,
+        team_id INTEGER NOT NULL,
+        game_id INTEGER NOT NULL,
+        round_number INTEGER NOT NULL,
+        guess VARCHAR(100),
+        is_correct BOOLEAN,
+        timestamp DATETIME,
+        logo_id INTEGER,
+        question_number INTEGER,
+        guess_text TEXT,
+        CONSTRAINT _team_game_round_logo_uc UNIQUE (team_id, game_id, round_number, logo_id)
+    )
+"""
+
+# (id, team, question, logo, guess, guess_text, is_correct, timestamp)
+LEGACY_ROWS = [
+    (1, 1, 1, 1, 'brand 0_1', 'brand 0', 1, '2025-01-01 12:00:10.000000'),
+    (2, 2, 1, 1, 'nissan_1', 'nissan', 0, '2025-01-01 12:00:20.000000'),
+    # Written when question 1 closed: a placeholder, whatever its word
+    (3, 3, 1, 1, 'apple_1', 'apple', 0, '2025-01-01 12:00:30.000000'),
+    # From before guess_text existed; question 2 has no result, so only dummy words are placeholders
+    (4, 1, 2, 2, 'nissan_2', None, 0, '2025-01-01 12:01:10.000000'),
+    (5, 2, 2, 2, 'cat_2', None, 0, '2025-01-01 12:01:30.000000'),
+]
+
+def test_legacy_guess_table_is_dictionary_encoded(app):
+    with app.app_context():
+        game = Game(status='finished')
+        db.session.add(game)
+        db.session.add_all(Team(name=name, members='["a"]', score=0) for name in ('red', 'green', 'blue'))
+        db.session.flush()
+        db.session.add(QuestionResult(game_id=game.id, round_number=1, question_number=1, logo_id=1, closed_at=CLOSED_AT))
+        db.session.execute(text("DROP TABLE guess"))
+        db.session.execute(text(LEGACY_GUESS_TABLE))
+        for row in LEGACY_ROWS:
+            db.session.execute(text(
+                "INSERT INTO guess (id, team_id, game_id, round_number, question_number, logo_id, "
+                "guess, guess_text, is_correct, timestamp) "
+                "VALUES (:id, :team, :game, 1, :question, :logo, :guess, :guess_text, :is_correct, :timestamp)"
+            ), dict(zip(('id', 'team', 'question', 'logo', 'guess', 'guess_text', 'is_correct', 'timestamp'), row),
+                    game=game.id))
+        db.session.commit()
+
+        assert db_setup.migrate_guess_answers() is True
+        assert 'guess_text' not in db_setup._columns('guess')
+        assert 'guess' not in db_setup._columns('guess')
+
+        answers = dict(db.session.execute(select(Answer.id, Answer.text).where(Answer.game_id == game.id)).all())
+        assert sorted(answers.values()) == ['brand 0', 'nissan']
+
+        guesses = {guess.id: guess for guess in db.session.scalars(select(Guess))}
+        assert len(guesses) == len(LEGACY_ROWS)
+        assert [answers.get(guesses[n].answer_id) for n in range(1, 6)] == ['brand 0', 'nissan', None, 'nissan', None]
+        assert [guesses[n].is_placeholder for n in range(1, 6)] == [False, False, True, False, True]
+        assert guesses[1].is_correct is True
+        assert guesses[4].timestamp == datetime(2025, 1, 1, 12, 1, 10)
+
+        # Already migrated: nothing left to do
+        assert db_setup.migrate_guess_answers() is False
@@ -0,0 +1,52 @@
+"""SQL statement budgets for the hot endpoints.
+
+Each budget is the endpoint's current count; a change that adds queries
+(an N+1, a lost cache) fails here instead of showing up under load.
+"""
+
+import pytest
+from sqlalchemy import select
+from models import db, Game, Logo
+from sql_profiler import sql_profiler
+from conftest import register_teams
+
+TEAM_STATUS_QUERIES = 3
+SUBMIT_GUESS_QUERIES = 11
+ADMIN_STATUS_QUERIES = 3
+ADMIN_SUMMARY_QUERIES = 4
+
+@pytest.fixture
+def tokens(admin_client):
+    """An active game with four enrolled teams"""
+    assert admin_client.post('/api/admin/start_game').status_code == 200
+    return register_teams(admin_client, ['red', 'green', 'blue', 'gold'])
+
+def current_answer(app):
+    with app.app_context():
+        game = db.session.scalar(select(Game).where(Game.status == 'active'))
+        return db.session.get(Logo, game.current_logo_id).correct_answer
+
+def test_team_status(client, tokens):
+    with sql_profiler.assert_max_queries(TEAM_STATUS_QUERIES):
+        response = client.get('/api/status', headers={'X-Team-Token': tokens['red']})
+    assert response.status_code == 200
+    assert response.get_json()['game_status'] == 'active'
+
+def test_submit_guess(app, client, tokens):
+    answer = current_answer(app)
+    with sql_profiler.assert_max_queries(SUBMIT_GUESS_QUERIES):
+        response = client.post('/api/submit_guess', json={'guess': answer}, headers={'X-Team-Token': tokens['red']})
+    assert response.status_code == 200
+    assert response.get_json()['is_correct'] is True
+
+def test_admin_status(admin_client, tokens):
+    with sql_profiler.assert_max_queries(ADMIN_STATUS_QUERIES):
+        response = admin_client.get('/api/admin/status')
+    assert response.status_code == 200
+    assert len(response.get_json()['teams']) == 4
+
+def test_admin_status_summary(admin_client, tokens):
+    with sql_profiler.assert_max_queries(ADMIN_SUMMARY_QUERIES):
+        response = admin_client.get('/api/admin/status?summary=1')
+    assert response.status_code == 200
+    assert response.get_json()['team_count'] == 4
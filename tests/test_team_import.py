@@ -0,0 +1,35 @@
+from sqlalchemy import select, func
+from models import db, Team, GameTeam
+from conftest import register_teams
+
+def test_bulk_import_reports_duplicate_and_existing_names(app, admin_client):
+    assert admin_client.post('/api/admin/start_game').status_code == 200
+    register_teams(admin_client, ['red'])
+
+    response = admin_client.post('/api/admin/teams/bulk', json={'enroll': True, 'teams': [
+        {'team_name': 'green', 'members': ['ann', 'bob']},
+        {'team_name': 'red', 'members': ['cy']},
+        {'team_name': 'blue', 'members': 'dee; eve'},
+        {'team_name': 'green', 'members': ['fay']},
+        {'team_name': 'gold', 'members': ['  ']},
+    ]})
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['created'], summary['failed']) == (2, 3)
+
+    results = {result['row']: result for result in summary['results']}
+    assert [results[row]['status'] for row in range(1, 6)] == ['created', 'error', 'created', 'error', 'error']
+    assert results[2]['error'] == 'Team name already exists'
+    assert results[4]['error'] == 'Team name appears more than once in the upload'
+    assert results[5]['error'] == 'Member names cannot be empty'
+    assert all(results[row]['team_token'] for row in (1, 3))
+
+    with app.app_context():
+        members = dict(db.session.execute(select(Team.name, Team.members)).all())
+        assert set(members) == {'red', 'green', 'blue'}
+        assert members['blue'] == '["dee", "eve"]'
+        assert db.session.scalar(select(func.count()).select_from(GameTeam)) == 3
+
+    # The new teams are enrolled, so their tokens work without another registration
+    status = admin_client.get('/api/status', headers={'X-Team-Token': results[1]['team_token']})
+    assert status.get_json()['game_status'] == 'active'